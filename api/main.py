@@ -1,14 +1,26 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from pathlib import Path
 from core.config import settings
+from services.llm_client import get_anthropic_client, close_anthropic_client
 from api.routers import auth, exercises, muscles, mesocycles, microcycles, training_days, day_exercises, ai_generator, clients, client_interviews, client_metrics, translation, workout_logs, patient_context
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Shared Anthropic client (one keep-alive connection pool per process)
+    if settings.ANTHROPIC_API_KEY:
+        get_anthropic_client()
+    yield
+    await close_anthropic_client()
+
+
 app = FastAPI(
     title="FitPilot API",
     version="1.0.0",
-    description="API for workout routine management with AI-powered generation"
+    description="API for workout routine management with AI-powered generation",
+    lifespan=lifespan
 )
 
 # CORS configuration - explicit origins for credentials, plus local network for dev/mobile testing
@@ -2,8 +2,10 @@
 Router para la generación de entrenamientos con IA.
 """
 
+import json
 from datetime import timedelta
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Query, status, BackgroundTasks
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import Optional
 
@@ -18,15 +20,30 @@ from schemas.ai_generator import (
     QuestionnaireConfig,
     QuestionnaireStep,
     GenerationStatus,
+    AIJobStatus,
     GeneratedMacrocycle,
     SaveWorkoutRequest,
     CreationMode,
 )
 from schemas.client_interview import InterviewValidationResponse
 from core.dependencies import get_current_user
-from services.ai_generator import AIWorkoutGenerator, ExerciseMapper
+from services.ai_generator import (
+    AIWorkoutGenerator,
+    prompt_cache_usage,
+    trim_to_single_microcycle,
+    finalize_generated_program,
+)
+from services.generation_cache import generation_cache
+from services.single_flight import generation_flights
+from services.llm_telemetry import fetch_llm_stats
+from services.token_predictor import token_predictor
+from services.llm_client import LLMPriority, llm_concurrency_stats
+from services.ai_jobs import create_job, get_job, enqueue_generation_job
 from services.interview_mapper import InterviewToAIRequestMapper
 from services.patient_context import build_patient_context
+from services.program_sequence import rebuild_program_sequence
+from services.exercise_catalog import AICatalogSnapshot, get_ai_catalog, get_catalog_version
+from prompts.workout_generator import prompt_prefix_cache_stats
 
 router = APIRouter()
 
@@ -53,26 +70,6 @@ def _enforce_single_microcycle(request: AIWorkoutRequest) -> Optional[str]:
     return warning
 
 
-def _trim_to_single_microcycle(macrocycle_dict: dict) -> dict:
-    """
-    Asegura que solo se conserve 1 microciclo en la respuesta generada.
-    """
-    if not macrocycle_dict:
-        return macrocycle_dict
-
-    mesocycles = macrocycle_dict.get("mesocycles", [])
-    if not mesocycles:
-        return macrocycle_dict
-
-    mesocycles = mesocycles[:1]
-    macrocycle_dict["mesocycles"] = mesocycles
-
-    first_meso = mesocycles[0]
-    microcycles = first_meso.get("microcycles", [])
-    first_meso["microcycles"] = microcycles[:1] if microcycles else []
-    return macrocycle_dict
-
-
 def _attach_patient_context(request: AIWorkoutRequest, db: Session) -> None:
     """
     Añade patient_context al request si el modo es CLIENT y no viene explícito.
@@ -627,6 +624,11 @@ async def test_generate_workout(
     return mock_response
 
 
+def _sse_event(event: str, data) -> str:
+    """Formatea un evento Server-Sent Events."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
 @router.post("/generate", response_model=AIWorkoutResponse)
 async def generate_workout(
     request: AIWorkoutRequest,
@@ -648,32 +650,10 @@ async def generate_workout(
     # Limitar a un solo microciclo para ahorrar tokens
     single_cycle_warning = _enforce_single_microcycle(request)
 
-    # Obtener ejercicios disponibles con datos de músculos
-    exercises = db.query(Exercise).all()
-    exercise_list = [
-        {
-            "id": ex.id,
-            "name": ex.get_name("es"),
-            "type": ex.type.value if ex.type else "multiarticular",
-            "category": ex.category,  # Categoría del ejercicio
-            "primary_muscles": ex.primary_muscle_names,  # Lista de músculos primarios
-            "secondary_muscles": ex.secondary_muscle_names,  # Lista de músculos secundarios
-            "difficulty_level": ex.difficulty_level,
-            "equipment_needed": ex.equipment_needed,
-            "resistance_profile": ex.resistance_profile.value if ex.resistance_profile else None,
-            # Clasificación de ejercicio
-            "exercise_class": ex.exercise_class.value if ex.exercise_class else "strength",
-            "cardio_subclass": ex.cardio_subclass.value if ex.cardio_subclass else None,
-            # Campos específicos para cardio
-            "intensity_zone": ex.intensity_zone,
-            "target_heart_rate_min": ex.target_heart_rate_min,
-            "target_heart_rate_max": ex.target_heart_rate_max,
-            "calories_per_minute": ex.calories_per_minute,
-        }
-        for ex in exercises
-    ]
+    # Snapshot compartido del catálogo (ejercicios con músculos e índices)
+    catalog = get_ai_catalog(db)
 
-    if not exercise_list:
+    if not catalog.exercises:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="No hay ejercicios en la base de datos. Por favor, agregue ejercicios primero."
@@ -685,42 +665,134 @@ async def generate_workout(
     # Generar programa
     try:
         generator = AIWorkoutGenerator()
-        result = await generator.generate_workout(request, exercise_list)
-
-        # Mapear ejercicios inválidos a equivalentes válidos
-        if result.success and result.macrocycle:
-            mapper = ExerciseMapper(exercise_list)
-            macrocycle_dict = _trim_to_single_microcycle(result.macrocycle.model_dump())
-            mapped_macrocycle = mapper.map_exercises_in_program(macrocycle_dict)
-            result.macrocycle = GeneratedMacrocycle(**mapped_macrocycle)
-
-            # Agregar warnings si hubo remapeos
-            if mapper.mapped_count > 0:
-                result.warnings = result.warnings or []
-                result.warnings.append(
-                    f"{mapper.mapped_count} ejercicio(s) fueron remapeados a equivalentes válidos del catálogo"
-                )
+        result = await generator.generate_workout(request, catalog)
 
-            # Agregar warning si hay ejercicios sin mapear
-            if mapper.unmapped_exercises:
-                result.warnings = result.warnings or []
-                unique_unmapped = list(set(mapper.unmapped_exercises))[:5]
-                result.warnings.append(
-                    f"No se encontraron equivalentes para: {', '.join(unique_unmapped)}"
-                    + (f" y {len(mapper.unmapped_exercises) - 5} más" if len(mapper.unmapped_exercises) > 5 else "")
-                )
+        return await finalize_generated_program(result, catalog, single_cycle_warning)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
 
-        if single_cycle_warning:
-            result.warnings = result.warnings or []
-            result.warnings.append(single_cycle_warning)
 
-        return result
+@router.post("/generate/stream")
+async def generate_workout_stream(
+    request: AIWorkoutRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Igual que /generate pero por Server-Sent Events: emite cada día de
+    entrenamiento en cuanto la IA lo termina de escribir.
+
+    Eventos:
+    - `phase`: inicio/fin de cada fase ({phase, name, status})
+    - `training_day`: {index, training_day} de la semana generada
+    - `result`: AIWorkoutResponse final (con ejercicios remapeados)
+    - `error`: {error}
+    """
+    if current_user.role.value not in ["trainer", "admin"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Solo los entrenadores pueden generar programas"
+        )
+
+    single_cycle_warning = _enforce_single_microcycle(request)
+
+    catalog = get_ai_catalog(db)
+    if not catalog.exercises:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No hay ejercicios en la base de datos. Por favor, agregue ejercicios primero."
+        )
+
+    # Todo acceso a la DB ocurre antes de abrir el stream (la sesión se cierra al responder)
+    _attach_patient_context(request, db)
+
+    try:
+        generator = AIWorkoutGenerator()
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
         )
 
+    async def event_stream():
+        async for event in generator.generate_workout_stream(request, catalog):
+            data = event["data"]
+            if event["event"] == "result":
+                data = (await finalize_generated_program(data, catalog, single_cycle_warning)).model_dump(mode="json")
+            yield _sse_event(event["event"], data)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/jobs", response_model=AIJobStatus, status_code=status.HTTP_202_ACCEPTED)
+async def create_generation_job(
+    request: AIWorkoutRequest,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Encola la generación de un programa y responde de inmediato con el job.
+
+    El progreso y el resultado se consultan con GET /api/ai/jobs/{job_id}.
+    Con AI_JOBS_USE_CELERY la generación corre en un worker de Celery; si no,
+    en segundo plano dentro del mismo proceso.
+    """
+    if current_user.role.value not in ["trainer", "admin"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Solo los entrenadores pueden generar programas"
+        )
+
+    single_cycle_warning = _enforce_single_microcycle(request)
+
+    catalog = get_ai_catalog(db)
+    if not catalog.exercises:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No hay ejercicios en la base de datos. Por favor, agregue ejercicios primero."
+        )
+
+    # El job recibe el request completo: el worker no vuelve a consultar al paciente
+    _attach_patient_context(request, db)
+
+    job = create_job(current_user.id)
+    enqueue_generation_job(job["job_id"], request, single_cycle_warning, background_tasks)
+
+    return AIJobStatus(**job)
+
+
+@router.get("/jobs/{job_id}", response_model=AIJobStatus)
+def get_generation_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Estado de un job de generación: progreso (0-100), fase actual, días
+    generados y, al completarse, el AIWorkoutResponse.
+    """
+    if current_user.role.value not in ["trainer", "admin"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Solo los entrenadores pueden consultar generaciones"
+        )
+
+    job = get_job(job_id)
+    if not job or (current_user.role != UserRole.ADMIN and job["requested_by"] != current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job de generación no encontrado"
+        )
+
+    return AIJobStatus(**job)
+
 
 @router.post("/preview", response_model=AIWorkoutResponse)
 async def preview_workout(
@@ -740,54 +812,16 @@ async def preview_workout(
     # Limitar a un solo microciclo
     single_cycle_warning = _enforce_single_microcycle(request)
 
-    exercises = db.query(Exercise).all()
-    exercise_list = [
-        {
-            "id": ex.id,
-            "name": ex.get_name("es"),
-            "type": ex.type.value if ex.type else "multiarticular",
-            "category": ex.category,
-            "primary_muscles": ex.primary_muscle_names,
-            "secondary_muscles": ex.secondary_muscle_names,
-            "difficulty_level": ex.difficulty_level,
-            "equipment_needed": ex.equipment_needed,
-            "resistance_profile": ex.resistance_profile.value if ex.resistance_profile else None,
-            # Clasificación de ejercicio
-            "exercise_class": ex.exercise_class.value if ex.exercise_class else "strength",
-            "cardio_subclass": ex.cardio_subclass.value if ex.cardio_subclass else None,
-            # Campos específicos para cardio
-            "intensity_zone": ex.intensity_zone,
-            "target_heart_rate_min": ex.target_heart_rate_min,
-            "target_heart_rate_max": ex.target_heart_rate_max,
-            "calories_per_minute": ex.calories_per_minute,
-        }
-        for ex in exercises
-    ]
+    catalog = get_ai_catalog(db)
 
     _attach_patient_context(request, db)
 
     try:
-        generator = AIWorkoutGenerator()
-        result = await generator.generate_preview(request, exercise_list)
-
-        # Mapear ejercicios inválidos a equivalentes válidos
-        if result.success and result.macrocycle:
-            mapper = ExerciseMapper(exercise_list)
-            macrocycle_dict = _trim_to_single_microcycle(result.macrocycle.model_dump())
-            mapped_macrocycle = mapper.map_exercises_in_program(macrocycle_dict)
-            result.macrocycle = GeneratedMacrocycle(**mapped_macrocycle)
-
-            if mapper.mapped_count > 0:
-                result.warnings = result.warnings or []
-                result.warnings.append(
-                    f"{mapper.mapped_count} ejercicio(s) fueron remapeados a equivalentes válidos"
-                )
+        # Las previews pasan antes que las generaciones completas en la cola de la IA
+        generator = AIWorkoutGenerator(priority=LLMPriority.PREVIEW)
+        result = await generator.generate_preview(request, catalog)
 
-        if single_cycle_warning:
-            result.warnings = result.warnings or []
-            result.warnings.append(single_cycle_warning)
-
-        return result
+        return await finalize_generated_program(result, catalog, single_cycle_warning)
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -795,6 +829,56 @@ async def preview_workout(
         )
 
 
+@router.get("/cache-stats")
+def get_prompt_cache_stats(
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Uso del prompt cache en este proceso: tokens cache_read vs cache_creation
+    por fase, aciertos de la memoización del prefijo cacheable, estado de la
+    cola de llamadas a la IA y aciertos de la caché de resultados.
+    """
+    if current_user.role.value not in ["trainer", "admin"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Solo los entrenadores pueden consultar estadísticas de IA"
+        )
+
+    return {
+        "catalog_version": get_catalog_version(),
+        "prompt_prefix": prompt_prefix_cache_stats(),
+        "phases": prompt_cache_usage.stats(),
+        "concurrency": llm_concurrency_stats(),
+        "generation_cache": generation_cache.stats(),
+        "in_flight": generation_flights.stats(),
+    }
+
+
+@router.get("/stats")
+def get_llm_stats(
+    days: int = Query(30, ge=1, le=365, description="Ventana en días"),
+    phase: Optional[str] = Query(None, description="single, legacy, base_week o progression"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Telemetría de las llamadas a la IA (llm_call_logs): percentiles p50/p90/p99
+    de latencia, tokens de salida y tamaño de prompt por fase, modelo y modo,
+    ratio de prompt cache, tasa de parseo y de truncado por max_tokens, y
+    remapeos de ExerciseMapper por generación.
+    """
+    if current_user.role.value not in ["trainer", "admin"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Solo los entrenadores pueden consultar estadísticas de IA"
+        )
+
+    stats = fetch_llm_stats(db, days, phase)
+    # Ajustes del predictor de max_tokens / modo por fases (si ya cargó historial)
+    stats["predictor"] = token_predictor.stats()
+    return stats
+
+
 @router.post("/save")
 async def save_generated_workout(
     save_request: SaveWorkoutRequest,
@@ -829,10 +913,21 @@ async def save_generated_workout(
 
     try:
         # Convertir el macrocycle a diccionario para trabajar con él
-        macrocycle_data = _trim_to_single_microcycle(save_request.workout_data.macrocycle.model_dump())
-
-        # Obtener IDs de ejercicios válidos de la DB
-        valid_exercise_ids = {ex.id for ex in db.query(Exercise.id).all()}
+        macrocycle_data = trim_to_single_microcycle(save_request.workout_data.macrocycle.model_dump())
+
+        # IDs de ejercicios válidos: sólo los referenciados, contra la DB (el
+        # snapshot del catálogo puede estar desfasado hasta su TTL)
+        referenced_exercise_ids = {
+            ex_data.get("exercise_id")
+            for meso_data in macrocycle_data.get("mesocycles", [])
+            for micro_data in meso_data.get("microcycles", [])
+            for day_data in micro_data.get("training_days", [])
+            for ex_data in day_data.get("exercises", [])
+            if ex_data.get("exercise_id") is not None
+        }
+        valid_exercise_ids = {
+            row.id for row in db.query(Exercise.id).filter(Exercise.id.in_(referenced_exercise_ids))
+        } if referenced_exercise_ids else set()
 
         # Contador de ejercicios filtrados
         filtered_exercises_count = 0
@@ -986,6 +1081,8 @@ async def save_generated_workout(
         if current_day_offset > 0:
             macrocycle.end_date = start_date + timedelta(days=current_day_offset - 1)
 
+        rebuild_program_sequence(db, macrocycle.id)
+
         db.commit()
 
         # Construir respuesta con información de ejercicios filtrados
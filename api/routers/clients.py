@@ -6,6 +6,7 @@ from models.user import User, UserRole
 from schemas.client import ClientCreate, ClientUpdate, ClientResponse, ClientListResponse
 from core.security import get_password_hash
 from core.dependencies import get_current_user
+from core.pagination import TotalMode, count_total, paginate
 
 router = APIRouter()
 
@@ -15,10 +16,17 @@ def get_clients(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
     search: Optional[str] = None,
+    cursor: Optional[str] = None,
+    total: TotalMode = TotalMode.EXACT,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get all clients (users with role=client)"""
+    """
+    Get all clients (users with role=client)
+
+    - **cursor**: `next_cursor` from the previous page (keyset; takes precedence over skip)
+    - **total**: exact / estimate / none
+    """
 
     # Only trainers and admins can view clients
     if current_user.role not in [UserRole.TRAINER, UserRole.ADMIN]:
@@ -36,10 +44,13 @@ def get_clients(
             (User.email.ilike(search_filter))
         )
 
-    total = query.count()
-    clients = query.order_by(User.full_name).offset(skip).limit(limit).all()
+    total_count = count_total(query, total)
+    clients, next_cursor = paginate(
+        query, [User.full_name, User.id], descending=False,
+        limit=limit, cursor=cursor, skip=skip
+    )
 
-    return ClientListResponse(clients=clients, total=total)
+    return ClientListResponse(clients=clients, total=total_count, next_cursor=next_cursor)
 
 
 @router.post("/", response_model=ClientResponse, status_code=status.HTTP_201_CREATED)
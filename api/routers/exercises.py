@@ -18,6 +18,7 @@ from models.exercise_muscle import ExerciseMuscle
 from schemas.exercise import ExerciseCreate, ExerciseUpdate, ExerciseResponse, ExerciseListResponse
 from schemas.muscle import ExerciseMuscleResponse
 from core.dependencies import get_current_user, require_trainer
+from services.exercise_catalog import bump_catalog_version
 
 router = APIRouter()
 
@@ -248,6 +249,7 @@ def create_exercise(
             db.add(em)
 
     db.commit()
+    bump_catalog_version()
 
     # Reload with relationships
     new_exercise = db.query(Exercise).options(
@@ -346,6 +348,7 @@ def update_exercise(
                 db.add(em)
 
     db.commit()
+    bump_catalog_version()
 
     # Reload with relationships
     exercise = db.query(Exercise).options(
@@ -375,6 +378,7 @@ def delete_exercise(
 
     db.delete(exercise)
     db.commit()
+    bump_catalog_version()
 
     return None
 
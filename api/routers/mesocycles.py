@@ -14,6 +14,12 @@ from schemas.mesocycle import (
     DayExerciseCreate, DayExerciseUpdate, DayExerciseResponse
 )
 from core.dependencies import get_current_user
+from core.pagination import TotalMode, count_total, paginate
+from services.program_sequence import (
+    rebuild_program_sequence, refresh_program_assignment, SEQUENCE_DAY_FIELDS, SEQUENCE_MACROCYCLE_FIELDS
+)
+from services.metrics_calculator import PeriodMuscleVolumeResponse
+from services.muscle_volume import calculate_period_volume
 
 router = APIRouter()
 
@@ -27,13 +33,17 @@ def list_macrocycles(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=500),
     status: Optional[MesocycleStatus] = None,
-    client_id: Optional[str] = None
+    client_id: Optional[str] = None,
+    cursor: Optional[str] = None,
+    total: TotalMode = TotalMode.EXACT
 ):
     """
     Get list of macrocycles
 
-    - **skip**: Number of records to skip (pagination)
+    - **skip**: Number of records to skip (offset pagination, kept for compatibility)
+    - **cursor**: `next_cursor` from the previous page (keyset; takes precedence over skip)
     - **limit**: Maximum number of records to return
+    - **total**: exact / estimate / none
     - **status**: Filter by status (draft/active/completed/archived)
     - **client_id**: Filter by client (trainers only)
     """
@@ -58,14 +68,18 @@ def list_macrocycles(
         query = query.filter(Macrocycle.status == status)
 
     # Get total count
-    total = query.count()
+    total_count = count_total(query, total)
 
     # Apply pagination and order
-    macrocycles = query.order_by(Macrocycle.created_at.desc()).offset(skip).limit(limit).all()
+    macrocycles, next_cursor = paginate(
+        query, [Macrocycle.created_at, Macrocycle.id], descending=True,
+        limit=limit, cursor=cursor, skip=skip
+    )
 
     return {
-        "total": total,
-        "macrocycles": macrocycles
+        "total": total_count,
+        "macrocycles": macrocycles,
+        "next_cursor": next_cursor
     }
 
 
@@ -107,6 +121,30 @@ def get_macrocycle(
     return macrocycle
 
 
+@router.get("/{macrocycle_id}/muscle-volume", response_model=PeriodMuscleVolumeResponse)
+def get_macrocycle_muscle_volume(
+    macrocycle_id: str,
+    count_secondary: bool = Query(True, description="Count secondary muscles with 0.5x multiplier"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get the per-week muscle volume of the whole program.
+
+    One entry per microcycle plus the weekly average, compared against the
+    weekly target range. Computed with a constant number of queries.
+    """
+    macrocycle = db.query(Macrocycle).filter(Macrocycle.id == macrocycle_id).first()
+    if not macrocycle:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Macrocycle with id {macrocycle_id} not found"
+        )
+    _check_macrocycle_access(macrocycle, current_user)
+
+    return calculate_period_volume(db, macrocycle, "macrocycle", macrocycle_id, count_secondary)
+
+
 @router.post("", response_model=MacrocycleResponse, status_code=status.HTTP_201_CREATED)
 def create_macrocycle(
     macrocycle_data: MacrocycleCreate,
@@ -138,6 +176,8 @@ def create_macrocycle(
         for meso_data in macrocycle_data.mesocycles:
             _create_mesocycle_nested(db, new_macrocycle.id, meso_data)
 
+    rebuild_program_sequence(db, new_macrocycle.id)
+
     db.commit()
     db.refresh(new_macrocycle)
 
@@ -171,9 +211,14 @@ def update_macrocycle(
 
     # Update only provided fields
     update_data = macrocycle_data.model_dump(exclude_unset=True)
+    previous_client_id = macrocycle.client_id
     for field, value in update_data.items():
         setattr(macrocycle, field, value)
 
+    # Reasignar o activar el programa cambia de quién es el cursor
+    if update_data.keys() & SEQUENCE_MACROCYCLE_FIELDS:
+        refresh_program_assignment(db, macrocycle_id, previous_client_id)
+
     db.commit()
     db.refresh(macrocycle)
 
@@ -262,6 +307,7 @@ def create_mesocycle(
     _check_trainer_access(macrocycle, current_user)
 
     mesocycle = _create_mesocycle_nested(db, macrocycle_id, mesocycle_data)
+    rebuild_program_sequence(db, macrocycle_id)
 
     db.commit()
     db.refresh(mesocycle)
@@ -284,6 +330,27 @@ def get_mesocycle(
     return mesocycle
 
 
+@router.get("/{macrocycle_id}/mesocycles/{mesocycle_id}/muscle-volume", response_model=PeriodMuscleVolumeResponse)
+def get_mesocycle_muscle_volume(
+    macrocycle_id: str,
+    mesocycle_id: str,
+    count_secondary: bool = Query(True, description="Count secondary muscles with 0.5x multiplier"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get the per-week muscle volume of a mesocycle (training block).
+
+    One entry per microcycle plus the weekly average of the block, compared
+    against the weekly target range. Computed with a constant number of queries.
+    """
+    _get_mesocycle_or_404(db, macrocycle_id, mesocycle_id)
+    macrocycle = db.query(Macrocycle).filter(Macrocycle.id == macrocycle_id).first()
+    _check_macrocycle_access(macrocycle, current_user)
+
+    return calculate_period_volume(db, macrocycle, "mesocycle", mesocycle_id, count_secondary)
+
+
 @router.put("/{macrocycle_id}/mesocycles/{mesocycle_id}", response_model=MesocycleResponse)
 def update_mesocycle(
     macrocycle_id: str,
@@ -301,6 +368,9 @@ def update_mesocycle(
     for field, value in update_data.items():
         setattr(mesocycle, field, value)
 
+    if "block_number" in update_data:
+        rebuild_program_sequence(db, macrocycle_id)
+
     db.commit()
     db.refresh(mesocycle)
 
@@ -320,6 +390,7 @@ def delete_mesocycle(
     _check_trainer_access(macrocycle, current_user)
 
     db.delete(mesocycle)
+    rebuild_program_sequence(db, macrocycle_id)
     db.commit()
 
     return None
@@ -341,6 +412,7 @@ def create_microcycle(
     _check_trainer_access(macrocycle, current_user)
 
     microcycle = _create_microcycle_nested(db, mesocycle.id, microcycle_data)
+    rebuild_program_sequence(db, macrocycle_id)
 
     db.commit()
     db.refresh(microcycle)
@@ -366,6 +438,9 @@ def update_microcycle(
     for field, value in update_data.items():
         setattr(microcycle, field, value)
 
+    if "week_number" in update_data:
+        rebuild_program_sequence(db, macrocycle_id)
+
     db.commit()
     db.refresh(microcycle)
 
@@ -386,6 +461,7 @@ def delete_microcycle(
     _check_trainer_access(macrocycle, current_user)
 
     db.delete(microcycle)
+    rebuild_program_sequence(db, macrocycle_id)
     db.commit()
 
     return None
@@ -408,6 +484,7 @@ def create_training_day(
     _check_trainer_access(macrocycle, current_user)
 
     training_day = _create_training_day_nested(db, microcycle.id, day_data)
+    rebuild_program_sequence(db, macrocycle_id)
 
     db.commit()
     db.refresh(training_day)
@@ -434,6 +511,9 @@ def update_training_day(
     for field, value in update_data.items():
         setattr(training_day, field, value)
 
+    if update_data.keys() & SEQUENCE_DAY_FIELDS:
+        rebuild_program_sequence(db, macrocycle_id)
+
     db.commit()
     db.refresh(training_day)
 
@@ -455,6 +535,7 @@ def delete_training_day(
     _check_trainer_access(macrocycle, current_user)
 
     db.delete(training_day)
+    rebuild_program_sequence(db, macrocycle_id)
     db.commit()
 
     return None
@@ -3,11 +3,13 @@ from sqlalchemy.orm import Session
 from typing import Optional
 from models.base import get_db
 from models.user import User
-from models.mesocycle import Macrocycle, Microcycle, TrainingDay, DayExercise, IntensityLevel
+from models.mesocycle import Macrocycle, Mesocycle, Microcycle, TrainingDay, DayExercise, IntensityLevel
 from schemas.mesocycle import (
     MicrocycleCreate, MicrocycleUpdate, MicrocycleResponse
 )
 from core.dependencies import get_current_user
+from services.metrics_calculator import PeriodMuscleVolumeResponse
+from services.muscle_volume import calculate_period_volume
 
 router = APIRouter()
 
@@ -55,6 +57,47 @@ def list_microcycles_by_macrocycle(
     return microcycles
 
 
+@router.get("/{microcycle_id}/muscle-volume", response_model=PeriodMuscleVolumeResponse)
+def get_microcycle_muscle_volume(
+    microcycle_id: str,
+    count_secondary: bool = Query(True, description="Count secondary muscles with 0.5x multiplier"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get the weekly muscle volume of a microcycle.
+
+    Returns total and effective sets per muscle for the whole week, compared
+    against the weekly target range for the program objective and client level.
+    Computed with a constant number of queries (not one per training day).
+    """
+    macrocycle = db.query(Macrocycle).join(
+        Mesocycle, Mesocycle.macrocycle_id == Macrocycle.id
+    ).join(
+        Microcycle, Microcycle.mesocycle_id == Mesocycle.id
+    ).filter(Microcycle.id == microcycle_id).first()
+
+    if not macrocycle:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Microcycle with id {microcycle_id} not found"
+        )
+
+    # Check permissions
+    if current_user.role.value == "client" and macrocycle.client_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to access this microcycle"
+        )
+    elif current_user.role.value == "trainer" and macrocycle.trainer_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to access this microcycle"
+        )
+
+    return calculate_period_volume(db, macrocycle, "microcycle", microcycle_id, count_secondary)
+
+
 @router.get("/{microcycle_id}", response_model=MicrocycleResponse)
 def get_microcycle(
     microcycle_id: str,
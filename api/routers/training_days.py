@@ -1,17 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Body, Query
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session
 from typing import List
 from pydantic import BaseModel
 from models.base import get_db
 from models.user import User
 from models.mesocycle import Macrocycle, Mesocycle, Microcycle, TrainingDay, DayExercise
-from models.exercise import Exercise
-from models.exercise_muscle import ExerciseMuscle
 from schemas.mesocycle import (
     TrainingDayCreate, TrainingDayUpdate, TrainingDayResponse
 )
 from core.dependencies import get_current_user
-from services.metrics_calculator import MuscleVolumeResponse, calculate_muscle_volume
+from services.metrics_calculator import MuscleVolumeResponse
+from services.muscle_volume import calculate_training_day_volume
+from services.program_sequence import rebuild_program_sequence, SEQUENCE_DAY_FIELDS
 
 
 class ReorderRequest(BaseModel):
@@ -100,24 +100,7 @@ def get_muscle_volume(
     # Verify access through parent microcycle
     verify_microcycle_access(db, training_day.microcycle_id, current_user)
 
-    # Handle rest days
-    if training_day.rest_day:
-        return MuscleVolumeResponse(
-            training_day_id=training_day.id,
-            training_day_name=training_day.name or f"Día {training_day.day_number}",
-            total_effective_sets=0,
-            muscles=[]
-        )
-
-    # Now load with eager loading for muscle calculation
-    training_day = db.query(TrainingDay).options(
-        joinedload(TrainingDay.exercises)
-        .joinedload(DayExercise.exercise)
-        .joinedload(Exercise.exercise_muscles)
-        .joinedload(ExerciseMuscle.muscle)
-    ).filter(TrainingDay.id == training_day_id).first()
-
-    return calculate_muscle_volume(training_day, count_secondary)
+    return calculate_training_day_volume(db, training_day, count_secondary)
 
 
 @router.get("/{training_day_id}", response_model=TrainingDayResponse)
@@ -180,6 +163,8 @@ def create_training_day(
             day_exercise = DayExercise(**exercise_dict)
             db.add(day_exercise)
 
+    rebuild_program_sequence(db, microcycle.mesocycle.macrocycle_id)
+
     db.commit()
     db.refresh(new_training_day)
 
@@ -213,13 +198,16 @@ def update_training_day(
         )
 
     # Verify access through parent microcycle
-    verify_microcycle_access(db, training_day.microcycle_id, current_user)
+    microcycle = verify_microcycle_access(db, training_day.microcycle_id, current_user)
 
     # Update only provided fields
     update_data = training_day_data.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(training_day, field, value)
 
+    if update_data.keys() & SEQUENCE_DAY_FIELDS:
+        rebuild_program_sequence(db, microcycle.mesocycle.macrocycle_id)
+
     db.commit()
     db.refresh(training_day)
 
@@ -253,9 +241,10 @@ def delete_training_day(
         )
 
     # Verify access through parent microcycle
-    verify_microcycle_access(db, training_day.microcycle_id, current_user)
+    microcycle = verify_microcycle_access(db, training_day.microcycle_id, current_user)
 
     db.delete(training_day)
+    rebuild_program_sequence(db, microcycle.mesocycle.macrocycle_id)
     db.commit()
 
     return None
@@ -289,7 +278,7 @@ def duplicate_training_day(
         )
 
     # Verify access
-    verify_microcycle_access(db, original_day.microcycle_id, current_user)
+    microcycle = verify_microcycle_access(db, original_day.microcycle_id, current_user)
 
     # Create duplicate
     new_day = TrainingDay(
@@ -321,6 +310,8 @@ def duplicate_training_day(
         )
         db.add(new_exercise)
 
+    rebuild_program_sequence(db, microcycle.mesocycle.macrocycle_id)
+
     db.commit()
     db.refresh(new_day)
 
@@ -1,6 +1,5 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, HTTPException, status, Header, Response, Query
+from sqlalchemy.orm import Session, selectinload
 from datetime import datetime, timedelta, date
 from typing import Optional
 from models.base import get_db
@@ -13,26 +12,54 @@ from schemas.workout_log import (
     WorkoutLogUpdate,
     WorkoutLogResponse,
     WorkoutLogListResponse,
+    WorkoutSyncResponse,
     ExerciseSetLogCreate,
     ExerciseSetLogResponse,
+    ExerciseSetLogCreatedResponse,
+    ExerciseSetLogBatchCreate,
+    ExerciseSetLogBatchResponse,
     WeeklyProgressResponse,
-    DayProgress,
+    ProgressRangeResponse,
     CurrentWorkoutState,
-    ExerciseProgress,
     NextWorkoutResponse,
     NextWorkoutTrainingDay,
     MissedWorkoutResponse,
-    MissedWorkoutsListResponse
+    MissedWorkoutsListResponse,
+    TrainerMissedWorkoutResponse,
+    TrainerMissedWorkoutsListResponse,
+    ExerciseHistoryResponse,
+    HomeBootstrapResponse,
+    MuscleWorkloadResponse,
+    ClientWorkloadResponse,
+    WorkloadFlagResponse,
+    WorkloadFlagsListResponse
 )
 from core.dependencies import get_current_user
+from core.pagination import TotalMode, count_total, paginate
+from services.workout_state import build_workout_state, compute_workout_state_etag, etag_matches
+from services.workout_progress import (
+    get_active_macrocycle, get_progress_weeks, week_bounds, fetch_day_progress_rows, build_weekly_progress
+)
+from services.program_sequence import get_next_in_sequence, lookup_next_in_sequence, advance_client_cursor
+from services.missed_workouts import fetch_missed_workouts
+from services.set_logging import find_foreign_day_exercises, insert_set_logs
+from services.workout_sync import fetch_changes, InvalidSyncCursor
+from services.exercise_performance import record_set_performance, get_exercise_history, get_exercise_ids
+from services.personal_records import detect_personal_records, get_set_personal_records
+from services.metrics_calculator import VolumeComparisonResponse
+from services.muscle_volume import calculate_volume_comparison
+from services.muscle_workload import (
+    record_workout_load, remove_workout_load, get_client_workload, fetch_workload_flags, workload_risk
+)
 
 router = APIRouter()
 
+# Límites para /progress/range (gráficas de historial)
+DEFAULT_PROGRESS_RANGE_WEEKS = 4
+MAX_PROGRESS_RANGE_WEEKS = 12
 
-def get_day_name_es(day_number: int) -> str:
-    """Get Spanish day name from day number (1=Monday)"""
-    days = ["Lun", "Mar", "Mier", "Jue", "Vie", "Sab", "Dom"]
-    return days[(day_number - 1) % 7]
+# Rango por defecto de /client/{client_id}/volume-comparison
+DEFAULT_VOLUME_COMPARISON_WEEKS = 12
 
 
 def verify_training_day_access(db: Session, training_day_id: str, current_user: User) -> TrainingDay:
@@ -65,6 +92,30 @@ def verify_training_day_access(db: Session, training_day_id: str, current_user:
     return training_day
 
 
+def verify_client_data_access(db: Session, client_id: str, current_user: User) -> None:
+    """
+    Verify user can read a client's training data.
+
+    Clients only their own; trainers only clients with a program they created
+    (Macrocycle.trainer_id); admins everything.
+    """
+    if current_user.role == UserRole.CLIENT and client_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to view this client's history"
+        )
+    if current_user.role == UserRole.TRAINER:
+        owns_client = db.query(Macrocycle.id).filter(
+            Macrocycle.client_id == client_id,
+            Macrocycle.trainer_id == current_user.id
+        ).first()
+        if not owns_client:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not authorized to view this client's history"
+            )
+
+
 @router.get("/next", response_model=NextWorkoutResponse)
 def get_next_workout(
     db: Session = Depends(get_db),
@@ -74,6 +125,9 @@ def get_next_workout(
     Obtiene el próximo entrenamiento pendiente para el cliente.
     Usa sistema secuencial: devuelve el primer TrainingDay sin WorkoutLog completado.
     El orden es: mesocycle.block_number → microcycle.week_number → training_day.day_number
+
+    Se resuelve desde el índice program_sequence y el cursor del cliente,
+    que se actualizan al guardar el programa y al completar workouts.
     """
     if current_user.role != UserRole.CLIENT:
         raise HTTPException(
@@ -81,62 +135,78 @@ def get_next_workout(
             detail="This endpoint is only for clients"
         )
 
-    # 1. Obtener macrociclo activo del cliente
-    macrocycle = db.query(Macrocycle).filter(
-        Macrocycle.client_id == current_user.id,
-        Macrocycle.status == MesocycleStatus.ACTIVE
-    ).first()
+    # Lookup indexado: macrociclo activo → cursor del cliente → training day
+    return _next_workout_response(get_next_in_sequence(db, current_user.id))
 
-    if not macrocycle:
+
+def _next_workout_response(next_in_sequence) -> NextWorkoutResponse:
+    if next_in_sequence is None:
         return NextWorkoutResponse(training_day=None, position=None, total=None)
 
-    # 2. Obtener todos los training_days ordenados (excluyendo días de descanso)
-    training_days = db.query(TrainingDay).join(
-        Microcycle, TrainingDay.microcycle_id == Microcycle.id
-    ).join(
-        Mesocycle, Microcycle.mesocycle_id == Mesocycle.id
-    ).filter(
-        Mesocycle.macrocycle_id == macrocycle.id,
-        TrainingDay.rest_day == False
-    ).order_by(
-        Mesocycle.block_number,
-        Microcycle.week_number,
-        TrainingDay.day_number
-    ).all()
-
-    if not training_days:
+    training_day, position, total = next_in_sequence
+
+    if not total:
         return NextWorkoutResponse(training_day=None, position=None, total=None)
 
-    # 3. Obtener IDs de training_days que tienen WorkoutLog completado
-    # Usamos .value porque el enum de PostgreSQL usa valores en minúsculas
-    completed_ids = set(
-        row[0] for row in db.query(WorkoutLog.training_day_id).filter(
-            WorkoutLog.client_id == current_user.id,
-            WorkoutLog.status == WorkoutStatus.COMPLETED.value
-        ).all()
+    if training_day is None:
+        # Todos los entrenamientos están completados
+        return NextWorkoutResponse(
+            training_day=None,
+            position=total,
+            total=total,
+            all_completed=True
+        )
+
+    return NextWorkoutResponse(
+        training_day=NextWorkoutTrainingDay(
+            id=training_day.id,
+            name=training_day.name,
+            focus=training_day.focus,
+            day_number=training_day.day_number,
+            rest_day=training_day.rest_day
+        ),
+        position=position,  # 1-based para mostrar "Día 5 de 24"
+        total=total
     )
 
-    # 4. Encontrar el primer training_day no completado
-    for index, td in enumerate(training_days):
-        if td.id not in completed_ids:
-            return NextWorkoutResponse(
-                training_day=NextWorkoutTrainingDay(
-                    id=td.id,
-                    name=td.name,
-                    focus=td.focus,
-                    day_number=td.day_number,
-                    rest_day=td.rest_day
-                ),
-                position=index + 1,  # 1-based para mostrar "Día 5 de 24"
-                total=len(training_days)
-            )
 
-    # 5. Todos los entrenamientos están completados
-    return NextWorkoutResponse(
-        training_day=None,
-        position=len(training_days),
-        total=len(training_days),
-        all_completed=True
+@router.get("/sync", response_model=WorkoutSyncResponse)
+def sync_workout_logs(
+    since: Optional[str] = None,
+    limit: int = Query(500, ge=1, le=1000),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Delta sync for the mobile app.
+
+    Returns the workout logs, logged sets and deletions of the current client
+    that changed after the opaque `since` cursor (omit it for a full sync).
+    Store the returned `cursor` and send it on the next call; while `has_more`
+    is true, keep calling with the new cursor.
+
+    - **limit**: Maximum rows per entity type in this page
+    """
+    if current_user.role != UserRole.CLIENT:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="This endpoint is only for clients"
+        )
+
+    try:
+        changes, cursor, has_more = fetch_changes(db, current_user.id, since, limit)
+    except InvalidSyncCursor:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid sync cursor"
+        )
+
+    return WorkoutSyncResponse(
+        cursor=cursor,
+        has_more=has_more,
+        workout_logs=changes["w"],
+        exercise_sets=changes["s"],
+        deleted=changes["t"]
     )
 
 
@@ -178,40 +248,20 @@ def start_workout(
     return workout_log
 
 
-@router.get("/{workout_log_id}", response_model=WorkoutLogResponse)
-def get_workout_log(
-    workout_log_id: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
-    """Get a specific workout log by ID"""
-    workout_log = db.query(WorkoutLog).filter(WorkoutLog.id == workout_log_id).first()
-
-    if not workout_log:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Workout log with id {workout_log_id} not found"
-        )
-
-    # Verify access
-    if current_user.role == UserRole.CLIENT and workout_log.client_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to access this workout log"
-        )
-
-    return workout_log
-
-
 @router.get("/{workout_log_id}/state", response_model=CurrentWorkoutState)
 def get_workout_state(
     workout_log_id: str,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Get the current state of a workout in progress.
     Returns exercise progress with completed sets.
+
+    Returns an ETag based on the newest logged set; polls sending a matching
+    If-None-Match header get a 304 without rebuilding the snapshot.
     """
     workout_log = db.query(WorkoutLog).filter(WorkoutLog.id == workout_log_id).first()
 
@@ -228,52 +278,12 @@ def get_workout_state(
             detail="Not authorized to access this workout log"
         )
 
-    # Get training day with exercises
-    training_day = db.query(TrainingDay).filter(
-        TrainingDay.id == workout_log.training_day_id
-    ).first()
-
-    # Build exercise progress
-    exercises_progress = []
-    completed_exercises = 0
-
-    # Ordenar por fase (warmup -> main -> cooldown) y luego por order_index
-    phase_order = {'warmup': 0, 'main': 1, 'cooldown': 2}
-    sorted_exercises = sorted(
-        training_day.exercises,
-        key=lambda x: (phase_order.get(x.phase, 1), x.order_index)
-    )
+    etag = compute_workout_state_etag(db, workout_log)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
 
-    for day_exercise in sorted_exercises:
-        # Get completed sets for this exercise
-        completed_sets = db.query(ExerciseSetLog).filter(
-            ExerciseSetLog.workout_log_id == workout_log_id,
-            ExerciseSetLog.day_exercise_id == day_exercise.id
-        ).order_by(ExerciseSetLog.set_number).all()
-
-        is_completed = len(completed_sets) >= day_exercise.sets
-        if is_completed:
-            completed_exercises += 1
-
-        exercise_name = day_exercise.exercise.name_es or day_exercise.exercise.name_en if day_exercise.exercise else "Unknown"
-
-        exercises_progress.append(ExerciseProgress(
-            day_exercise_id=day_exercise.id,
-            exercise_name=exercise_name,
-            total_sets=day_exercise.sets,
-            completed_sets=len(completed_sets),
-            is_completed=is_completed,
-            sets_data=[ExerciseSetLogResponse.model_validate(s) for s in completed_sets]
-        ))
-
-    return CurrentWorkoutState(
-        workout_log=WorkoutLogResponse.model_validate(workout_log),
-        training_day_name=training_day.name,
-        training_day_focus=training_day.focus,
-        total_exercises=len(training_day.exercises),
-        completed_exercises=completed_exercises,
-        exercises_progress=exercises_progress
-    )
+    response.headers["ETag"] = etag
+    return build_workout_state(db, workout_log)
 
 
 @router.patch("/{workout_log_id}", response_model=WorkoutLogResponse)
@@ -305,11 +315,26 @@ def update_workout_log(
     update_data = workout_data.model_dump(exclude_unset=True)
 
     # If completing the workout, set completed_at
-    if update_data.get("status") == WorkoutStatus.COMPLETED.value and not workout_log.completed_at:
+    completing = update_data.get("status") == WorkoutStatus.COMPLETED.value and not workout_log.completed_at
+    if completing:
         update_data["completed_at"] = datetime.utcnow()
 
+    was_completed = workout_log.status == WorkoutStatus.COMPLETED.value
     for field, value in update_data.items():
         setattr(workout_log, field, value)
+    is_completed = workout_log.status == WorkoutStatus.COMPLETED.value
+
+    # Completar (o reabrir) un workout mueve el cursor del programa
+    if "status" in update_data:
+        db.flush()
+        advance_client_cursor(db, workout_log.client_id, workout_log.training_day_id)
+
+    # La carga aguda/crónica cuenta mientras el workout está completado:
+    # se suma al completarlo y se resta al reabrirlo o abandonarlo
+    if is_completed and not was_completed:
+        record_workout_load(db, workout_log)
+    elif was_completed and not is_completed:
+        remove_workout_load(db, workout_log)
 
     db.commit()
     db.refresh(workout_log)
@@ -317,16 +342,8 @@ def update_workout_log(
     return workout_log
 
 
-@router.post("/{workout_log_id}/sets", response_model=ExerciseSetLogResponse, status_code=status.HTTP_201_CREATED)
-def log_exercise_set(
-    workout_log_id: str,
-    set_data: ExerciseSetLogCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
-    """
-    Log a completed set for an exercise.
-    """
+def get_writable_workout_log(db: Session, workout_log_id: str, current_user: User) -> WorkoutLog:
+    """Get a workout log owned by the current user that still accepts sets"""
     workout_log = db.query(WorkoutLog).filter(WorkoutLog.id == workout_log_id).first()
 
     if not workout_log:
@@ -349,6 +366,34 @@ def log_exercise_set(
             detail="Cannot log sets for a completed or abandoned workout"
         )
 
+    return workout_log
+
+
+@router.post("/{workout_log_id}/sets", response_model=ExerciseSetLogCreatedResponse, status_code=status.HTTP_201_CREATED)
+def log_exercise_set(
+    workout_log_id: str,
+    set_data: ExerciseSetLogCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Log a completed set for an exercise.
+
+    If idempotency_key is sent and a set with that key was already logged for
+    this workout, the existing set is returned instead of creating a duplicate.
+
+    The response flags any personal record (e1RM or rep-max) the set beat.
+    """
+    workout_log = get_writable_workout_log(db, workout_log_id, current_user)
+
+    if set_data.idempotency_key:
+        existing = db.query(ExerciseSetLog).filter(
+            ExerciseSetLog.workout_log_id == workout_log_id,
+            ExerciseSetLog.idempotency_key == set_data.idempotency_key
+        ).first()
+        if existing:
+            return _set_created_response(existing, get_set_personal_records(db, existing.id))
+
     # Verify day_exercise belongs to this training day
     day_exercise = db.query(DayExercise).filter(
         DayExercise.id == set_data.day_exercise_id,
@@ -361,21 +406,88 @@ def log_exercise_set(
             detail="Exercise does not belong to this training day"
         )
 
-    # Create set log
-    set_log = ExerciseSetLog(
-        workout_log_id=workout_log_id,
-        day_exercise_id=set_data.day_exercise_id,
-        set_number=set_data.set_number,
-        reps_completed=set_data.reps_completed,
-        weight_kg=set_data.weight_kg,
-        effort_value=set_data.effort_value,
-        notes=set_data.notes
+    if set_data.idempotency_key:
+        # Reintentos concurrentes con la misma clave: ON CONFLICT DO NOTHING
+        # y se devuelve la serie que insertó el otro request
+        inserted = insert_set_logs(db, workout_log, [set_data])
+        set_log = inserted.set_logs[0]
+        if not inserted.created_ids:
+            return _set_created_response(set_log, get_set_personal_records(db, set_log.id))
+    else:
+        set_log = ExerciseSetLog(
+            workout_log_id=workout_log_id,
+            client_id=workout_log.client_id,
+            day_exercise_id=set_data.day_exercise_id,
+            set_number=set_data.set_number,
+            reps_completed=set_data.reps_completed,
+            weight_kg=set_data.weight_kg,
+            effort_value=set_data.effort_value,
+            notes=set_data.notes
+        )
+        db.add(set_log)
+        db.flush()
+
+    exercise_ids = {day_exercise.id: day_exercise.exercise_id}
+    record_set_performance(db, workout_log, [set_log], exercise_ids)
+    personal_records = detect_personal_records(db, workout_log, [set_log], exercise_ids)
+
+    # Se arma antes del commit para no recargar la serie y los récords expirados
+    response = _set_created_response(set_log, personal_records)
+    db.commit()
+
+    return response
+
+
+def _set_created_response(set_log: ExerciseSetLog, personal_records: list) -> ExerciseSetLogCreatedResponse:
+    return ExerciseSetLogCreatedResponse(
+        **ExerciseSetLogResponse.model_validate(set_log).model_dump(),
+        is_personal_record=bool(personal_records),
+        personal_records=personal_records
+    )
+
+
+@router.post("/{workout_log_id}/sets:batch", response_model=ExerciseSetLogBatchResponse)
+def log_exercise_sets_batch(
+    workout_log_id: str,
+    batch_data: ExerciseSetLogBatchCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Log many sets at once (offline sync from the mobile app).
+
+    Every set carries a client-generated idempotency_key; replaying the same
+    batch is safe and only inserts sets that were not stored yet. All
+    day_exercise_ids are validated with one query and the sets are inserted in
+    a single transaction.
+    """
+    workout_log = get_writable_workout_log(db, workout_log_id, current_user)
+
+    invalid_ids = find_foreign_day_exercises(
+        db, workout_log, (item.day_exercise_id for item in batch_data.sets)
+    )
+    if invalid_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Exercises do not belong to this training day: {', '.join(sorted(invalid_ids))}"
+        )
+
+    inserted = insert_set_logs(db, workout_log, batch_data.sets)
+    created = set(inserted.created_ids)
+    new_sets = [s for s in inserted.set_logs if s.id in created]
+    exercise_ids = get_exercise_ids(db, new_sets)
+    record_set_performance(db, workout_log, new_sets, exercise_ids)
+    personal_records = detect_personal_records(db, workout_log, new_sets, exercise_ids)
+
+    response = ExerciseSetLogBatchResponse(
+        created=len(inserted.created_ids),
+        duplicates=inserted.duplicates,
+        sets=inserted.set_logs,
+        personal_records=personal_records
     )
-    db.add(set_log)
     db.commit()
-    db.refresh(set_log)
 
-    return set_log
+    return response
 
 
 @router.get("/client/{client_id}", response_model=WorkoutLogListResponse)
@@ -383,6 +495,8 @@ def get_client_workout_history(
     client_id: str,
     skip: int = 0,
     limit: int = 20,
+    cursor: Optional[str] = None,
+    total: TotalMode = TotalMode.EXACT,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -390,6 +504,10 @@ def get_client_workout_history(
     Get workout history for a client.
     Clients can only see their own history.
     Trainers can see history of their clients.
+
+    - **cursor**: `next_cursor` from the previous page (keyset; takes precedence over skip)
+    - **skip**: Offset pagination (kept for backward compatibility)
+    - **total**: exact / estimate / none
     """
     # Verify access
     if current_user.role == UserRole.CLIENT and client_id != current_user.id:
@@ -398,17 +516,18 @@ def get_client_workout_history(
             detail="Not authorized to view this client's history"
         )
 
+    query = db.query(WorkoutLog).filter(WorkoutLog.client_id == client_id)
+
     # Get total count
-    total = db.query(func.count(WorkoutLog.id)).filter(
-        WorkoutLog.client_id == client_id
-    ).scalar()
+    total_count = count_total(query, total)
 
-    # Get workout logs
-    workout_logs = db.query(WorkoutLog).filter(
-        WorkoutLog.client_id == client_id
-    ).order_by(WorkoutLog.started_at.desc()).offset(skip).limit(limit).all()
+    # Get workout logs (newest first)
+    workout_logs, next_cursor = paginate(
+        query, [WorkoutLog.started_at, WorkoutLog.id], descending=True,
+        limit=limit, cursor=cursor, skip=skip
+    )
 
-    return WorkoutLogListResponse(total=total, workout_logs=workout_logs)
+    return WorkoutLogListResponse(total=total_count, workout_logs=workout_logs, next_cursor=next_cursor)
 
 
 @router.get("/progress/weekly", response_model=WeeklyProgressResponse)
@@ -431,94 +550,75 @@ def get_weekly_progress(
     if target_date is None:
         target_date = date.today()
 
-    # Get week start (Monday) and end (Sunday)
-    week_start = target_date - timedelta(days=target_date.weekday())
-    week_end = week_start + timedelta(days=6)
+    # Get week start (Monday)
+    week_start, _ = week_bounds(target_date)
 
-    # Get active macrocycle for this client
-    macrocycle = db.query(Macrocycle).filter(
-        Macrocycle.client_id == current_user.id,
-        Macrocycle.status == MesocycleStatus.ACTIVE
-    ).first()
+    macrocycle = get_active_macrocycle(db, current_user.id)
+
+    return get_progress_weeks(
+        db, current_user.id, macrocycle.id if macrocycle else None, week_start, weeks=1
+    )[0]
+
+
+@router.get("/progress/range", response_model=ProgressRangeResponse)
+def get_progress_range(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get progress for several consecutive weeks (history charts).
+
+    - **start**: Any date in the first week (default: 4 weeks before `end`)
+    - **end**: Any date in the last week (default: today)
+
+    Weeks run Monday to Sunday. At most 12 weeks can be requested at once.
+    """
+    if current_user.role != UserRole.CLIENT:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="This endpoint is only for clients"
+        )
+
+    if end is None:
+        end = date.today()
+    if start is None:
+        start = end - timedelta(weeks=DEFAULT_PROGRESS_RANGE_WEEKS - 1)
 
-    days_progress = []
-    total_workouts_planned = 0
-    total_workouts_completed = 0
-
-    for i in range(7):
-        current_date = week_start + timedelta(days=i)
-        day_number = i + 1  # 1=Monday
-        day_name = get_day_name_es(day_number)
-
-        day_progress = DayProgress(
-            date=current_date,
-            day_number=day_number,
-            day_name=day_name,
-            total_sets=0,
-            completed_sets=0,
-            completion_percentage=0.0,
-            has_workout=False,
-            is_rest_day=False
-        )
-
-        if macrocycle:
-            # Find training day for this date
-            training_day = db.query(TrainingDay).join(
-                Microcycle, TrainingDay.microcycle_id == Microcycle.id
-            ).join(
-                Mesocycle, Microcycle.mesocycle_id == Mesocycle.id
-            ).filter(
-                Mesocycle.macrocycle_id == macrocycle.id,
-                TrainingDay.date == current_date
-            ).first()
-
-            if training_day:
-                day_progress.training_day_id = training_day.id
-                day_progress.training_day_name = training_day.name
-                day_progress.is_rest_day = training_day.rest_day
-
-                if not training_day.rest_day:
-                    day_progress.has_workout = True
-                    total_workouts_planned += 1
-
-                    # Calculate total sets for this day
-                    total_sets = sum(ex.sets for ex in training_day.exercises)
-                    day_progress.total_sets = total_sets
-
-                    # Get completed sets from workout logs
-                    workout_log = db.query(WorkoutLog).filter(
-                        WorkoutLog.client_id == current_user.id,
-                        WorkoutLog.training_day_id == training_day.id,
-                        WorkoutLog.status.in_([WorkoutStatus.IN_PROGRESS.value, WorkoutStatus.COMPLETED.value])
-                    ).order_by(WorkoutLog.started_at.desc()).first()
-
-                    if workout_log:
-                        completed_sets = db.query(func.count(ExerciseSetLog.id)).filter(
-                            ExerciseSetLog.workout_log_id == workout_log.id
-                        ).scalar()
-
-                        day_progress.completed_sets = completed_sets
-
-                        if total_sets > 0:
-                            day_progress.completion_percentage = round(
-                                (completed_sets / total_sets) * 100, 1
-                            )
-
-                        if workout_log.status == WorkoutStatus.COMPLETED.value:
-                            total_workouts_completed += 1
-
-        days_progress.append(day_progress)
+    if start > end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start must be before end"
+        )
+
+    first_week_start, _ = week_bounds(start)
+    _, last_week_end = week_bounds(end)
+    weeks = ((last_week_end - first_week_start).days + 1) // 7
+
+    if weeks > MAX_PROGRESS_RANGE_WEEKS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Range cannot exceed {MAX_PROGRESS_RANGE_WEEKS} weeks"
+        )
+
+    macrocycle = get_active_macrocycle(db, current_user.id)
+    weekly = get_progress_weeks(
+        db, current_user.id, macrocycle.id if macrocycle else None, first_week_start, weeks
+    )
 
+    total_planned = sum(w.total_workouts_planned for w in weekly)
+    total_completed = sum(w.total_workouts_completed for w in weekly)
     overall_percentage = 0.0
-    if total_workouts_planned > 0:
-        overall_percentage = round((total_workouts_completed / total_workouts_planned) * 100, 1)
-
-    return WeeklyProgressResponse(
-        week_start=week_start,
-        week_end=week_end,
-        days=days_progress,
-        total_workouts_planned=total_workouts_planned,
-        total_workouts_completed=total_workouts_completed,
+    if total_planned > 0:
+        overall_percentage = round((total_completed / total_planned) * 100, 1)
+
+    return ProgressRangeResponse(
+        start_date=first_week_start,
+        end_date=last_week_end,
+        weeks=weekly,
+        total_workouts_planned=total_planned,
+        total_workouts_completed=total_completed,
         overall_completion_percentage=overall_percentage
     )
 
@@ -592,76 +692,325 @@ def get_missed_workouts(
             detail="This endpoint is only for clients"
         )
 
-    today = date.today()
-    cutoff_date = today - timedelta(days=days_back)
+    total, rows = fetch_missed_workouts(db, days_back, client_id=current_user.id)
 
-    # Obtener macrociclo activo
-    macrocycle = db.query(Macrocycle).filter(
-        Macrocycle.client_id == current_user.id,
-        Macrocycle.status == MesocycleStatus.ACTIVE
-    ).first()
+    return _missed_workouts_response(total, rows)
 
-    if not macrocycle:
-        return MissedWorkoutsListResponse(total=0, missed_workouts=[])
 
-    # Obtener todos los training_days pasados (no días de descanso)
-    past_training_days = db.query(TrainingDay).join(
-        Microcycle, TrainingDay.microcycle_id == Microcycle.id
-    ).join(
-        Mesocycle, Microcycle.mesocycle_id == Mesocycle.id
-    ).filter(
-        Mesocycle.macrocycle_id == macrocycle.id,
-        TrainingDay.rest_day == False,
-        TrainingDay.date < today,
-        TrainingDay.date >= cutoff_date
-    ).all()
+def _missed_workouts_response(total: int, rows: list) -> MissedWorkoutsListResponse:
+    missed_workouts = [
+        MissedWorkoutResponse(
+            training_day_id=row["training_day_id"],
+            training_day_name=row["training_day_name"],
+            scheduled_date=row["scheduled_date"],
+            days_overdue=row["days_overdue"],
+            status=row["status"],
+            abandon_reason=row["abandon_reason"],
+            can_reschedule=True  # Sólo se consideran macrociclos activos
+        )
+        for row in rows
+    ]
+
+    return MissedWorkoutsListResponse(
+        total=total,
+        missed_workouts=missed_workouts
+    )
 
-    missed_workouts = []
 
-    for td in past_training_days:
-        # Buscar workout log para este día
-        workout_log = db.query(WorkoutLog).filter(
+@router.get("/home", response_model=HomeBootstrapResponse)
+def get_home_bootstrap(
+    days_back: int = 14,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Everything the mobile app shows on launch in a single call.
+
+    Equivalent to /today, /next, /progress/weekly and /missed, but the active
+    macrocycle is resolved once (together with the program cursor) and today's
+    training day comes from the same result set as the weekly progress.
+
+    Args:
+        days_back: Días hacia atrás para los entrenamientos perdidos (default: 14)
+    """
+    if current_user.role != UserRole.CLIENT:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="This endpoint is only for clients"
+        )
+
+    today = date.today()
+    week_start, week_end = week_bounds(today)
+
+    # 1. Macrociclo activo + cursor + próximo training day (una query)
+    next_in_sequence = lookup_next_in_sequence(db, current_user.id)
+    if next_in_sequence is None:
+        return HomeBootstrapResponse(
+            today=None,
+            next_workout=_next_workout_response(None),
+            weekly_progress=build_weekly_progress(week_start, {}),
+            missed=_missed_workouts_response(0, [])
+        )
+
+    macrocycle_id = next_in_sequence[0]
+
+    # 2. Progreso de la semana (una query); incluye el training day de hoy
+    rows = fetch_day_progress_rows(db, current_user.id, macrocycle_id, week_start, week_end)
+
+    # 3. Workout log más reciente de hoy (igual que /today)
+    todays_log = None
+    todays_row = rows.get(today)
+    if todays_row:
+        todays_log = db.query(WorkoutLog).options(
+            selectinload(WorkoutLog.exercise_sets)
+        ).filter(
             WorkoutLog.client_id == current_user.id,
-            WorkoutLog.training_day_id == td.id
+            WorkoutLog.training_day_id == todays_row["training_day_id"]
         ).order_by(WorkoutLog.started_at.desc()).first()
 
-        # Determinar si es un entrenamiento perdido
-        is_missed = False
-        status_str = "never_started"
-        abandon_reason = None
-
-        if not workout_log:
-            # Nunca se inició
-            is_missed = True
-            status_str = "never_started"
-        elif workout_log.status == WorkoutStatus.ABANDONED.value:
-            # Fue abandonado
-            is_missed = True
-            status_str = "abandoned"
-            abandon_reason = workout_log.abandon_reason
-        elif workout_log.status == WorkoutStatus.IN_PROGRESS.value:
-            # En progreso pero ya pasó el día - también se considera perdido
-            is_missed = True
-            status_str = "abandoned"
-        # Si está COMPLETED, no es perdido
-
-        if is_missed:
-            days_overdue = (today - td.date).days
-
-            missed_workouts.append(MissedWorkoutResponse(
-                training_day_id=td.id,
-                training_day_name=td.name,
-                scheduled_date=td.date,
-                days_overdue=days_overdue,
-                status=status_str,
-                abandon_reason=abandon_reason,
-                can_reschedule=macrocycle.status == MesocycleStatus.ACTIVE
-            ))
-
-    # Ordenar por fecha más reciente primero
-    missed_workouts.sort(key=lambda x: x.scheduled_date, reverse=True)
+    # 4. Entrenamientos perdidos del macrociclo ya resuelto (una query)
+    total, missed_rows = fetch_missed_workouts(
+        db, days_back, client_id=current_user.id, macrocycle_id=macrocycle_id, today=today
+    )
 
-    return MissedWorkoutsListResponse(
-        total=len(missed_workouts),
-        missed_workouts=missed_workouts
+    return HomeBootstrapResponse(
+        today=todays_log,
+        next_workout=_next_workout_response(next_in_sequence[1:]),
+        weekly_progress=build_weekly_progress(week_start, rows),
+        missed=_missed_workouts_response(total, missed_rows)
+    )
+
+
+@router.get("/trainer/missed", response_model=TrainerMissedWorkoutsListResponse)
+def get_trainer_missed_workouts(
+    days_back: int = Query(14, ge=1, le=90),
+    client_id: Optional[str] = None,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Entrenamientos perdidos de todos los clientes del entrenador en una sola llamada.
+
+    - **days_back**: Número de días hacia atrás para buscar
+    - **client_id**: Filtrar por un cliente
+    - **skip** / **limit**: Paginación (más recientes primero)
+
+    Los administradores ven los entrenamientos perdidos de todos los clientes.
+    """
+    if current_user.role not in [UserRole.TRAINER, UserRole.ADMIN]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="This action requires trainer privileges"
+        )
+
+    trainer_id = current_user.id if current_user.role == UserRole.TRAINER else None
+
+    total, rows = fetch_missed_workouts(
+        db,
+        days_back,
+        client_id=client_id,
+        trainer_id=trainer_id,
+        skip=skip,
+        limit=limit
+    )
+
+    return TrainerMissedWorkoutsListResponse(
+        total=total,
+        missed_workouts=[
+            TrainerMissedWorkoutResponse(
+                training_day_id=row["training_day_id"],
+                training_day_name=row["training_day_name"],
+                scheduled_date=row["scheduled_date"],
+                days_overdue=row["days_overdue"],
+                status=row["status"],
+                abandon_reason=row["abandon_reason"],
+                can_reschedule=True,
+                client_id=row["client_id"],
+                client_name=row["client_name"],
+                macrocycle_id=row["macrocycle_id"]
+            )
+            for row in rows
+        ]
+    )
+
+
+@router.get("/trainer/workload-flags", response_model=WorkloadFlagsListResponse)
+def get_trainer_workload_flags(
+    client_id: Optional[str] = None,
+    include_low: bool = False,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Músculos con riesgo de lesión (ACWR EWMA >= 1.5) de todos los clientes del entrenador.
+
+    - **client_id**: Filtrar por un cliente
+    - **include_low**: Incluir también músculos con carga por debajo de 0.8 (desentrenamiento)
+
+    Los administradores ven los flags de todos los clientes.
+    """
+    if current_user.role not in [UserRole.TRAINER, UserRole.ADMIN]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="This action requires trainer privileges"
+        )
+
+    trainer_id = current_user.id if current_user.role == UserRole.TRAINER else None
+    rows = fetch_workload_flags(db, trainer_id=trainer_id, client_id=client_id, include_low=include_low)
+
+    return WorkloadFlagsListResponse(
+        total=len(rows),
+        flags=[
+            WorkloadFlagResponse(
+                **_workload_response(workload).model_dump(),
+                client_id=workload.client_id,
+                client_name=client_name
+            )
+            for workload, client_name in rows
+        ]
+    )
+
+
+@router.get("/client/{client_id}/workload", response_model=ClientWorkloadResponse)
+def get_client_muscle_workload(
+    client_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Acute:chronic workload ratio per muscle (7-day acute, 28-day chronic; simple and EWMA).
+
+    Values are as of today: EWMAs are decayed and the rolling windows shifted
+    by the days since each muscle's last training day.
+    """
+    verify_client_data_access(db, client_id, current_user)
+
+    return ClientWorkloadResponse(
+        client_id=client_id,
+        muscles=[_workload_response(workload) for workload in get_client_workload(db, client_id)]
+    )
+
+
+def _workload_response(workload) -> MuscleWorkloadResponse:
+    return MuscleWorkloadResponse(
+        muscle_name=workload.muscle_name,
+        last_load_date=workload.last_load_date,
+        as_of=workload.as_of,
+        acute_load=workload.acute_load,
+        chronic_load=workload.chronic_load,
+        acwr_simple=workload.acwr_simple,
+        acute_ewma=round(workload.acute_ewma, 2),
+        chronic_ewma=round(workload.chronic_ewma, 2),
+        acwr_ewma=workload.acwr_ewma,
+        risk=workload_risk(workload.acwr_ewma)
     )
+
+
+@router.get("/exercise-history/{exercise_id}", response_model=ExerciseHistoryResponse)
+def get_exercise_performance_history(
+    exercise_id: str,
+    client_id: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Per-day performance history of an exercise (best e1RM, top set, reps, volume-load).
+
+    - **client_id**: Required for trainers; clients always get their own history
+    - **start_date** / **end_date**: Optional date range (inclusive)
+    """
+    if current_user.role == UserRole.CLIENT:
+        if client_id and client_id != current_user.id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not authorized to view this client's history"
+            )
+        client_id = current_user.id
+    elif not client_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="client_id is required"
+        )
+
+    return ExerciseHistoryResponse(
+        client_id=client_id,
+        exercise_id=exercise_id,
+        history=get_exercise_history(db, client_id, exercise_id, start_date, end_date)
+    )
+
+
+@router.get("/client/{client_id}/volume-comparison", response_model=VolumeComparisonResponse)
+def get_volume_comparison(
+    client_id: str,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    mesocycle_id: Optional[str] = None,
+    microcycle_id: Optional[str] = None,
+    count_secondary: bool = True,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Planned vs performed volume per muscle, week by week.
+
+    Performed volume comes from the logged sets (one set per ExerciseSetLog,
+    effective by the logged RIR/RPE, volume-load = reps × kg).
+
+    - **start_date** / **end_date**: Training-day date range (inclusive). Defaults
+      to the last 12 weeks unless a mesocycle or microcycle is given
+    - **mesocycle_id** / **microcycle_id**: Restrict to one block or week
+    - **count_secondary**: Count secondary muscles at half volume
+    """
+    verify_client_data_access(db, client_id, current_user)
+
+    if not (mesocycle_id or microcycle_id):
+        end_date = end_date or date.today()
+        start_date = start_date or end_date - timedelta(weeks=DEFAULT_VOLUME_COMPARISON_WEEKS)
+    if start_date and end_date and start_date > end_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start_date must be before end_date"
+        )
+
+    return calculate_volume_comparison(
+        db,
+        client_id,
+        start_date=start_date,
+        end_date=end_date,
+        microcycle_id=microcycle_id,
+        mesocycle_id=mesocycle_id,
+        count_secondary=count_secondary
+    )
+
+
+@router.get("/{workout_log_id}", response_model=WorkoutLogResponse)
+def get_workout_log(
+    workout_log_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get a specific workout log by ID.
+
+    Declared last so the catch-all path does not shadow /today, /missed, etc.
+    """
+    workout_log = db.query(WorkoutLog).filter(WorkoutLog.id == workout_log_id).first()
+
+    if not workout_log:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Workout log with id {workout_log_id} not found"
+        )
+
+    # Verify access
+    if current_user.role == UserRole.CLIENT and workout_log.client_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to access this workout log"
+        )
+
+    return workout_log
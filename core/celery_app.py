@@ -0,0 +1,25 @@
+"""
+Aplicación Celery para tareas en segundo plano (generación con IA).
+
+Worker:
+    celery -A core.celery_app worker --loglevel=info
+"""
+from celery import Celery
+
+from core.config import settings
+
+celery_app = Celery(
+    "fitpilot",
+    broker=settings.REDIS_URL,
+    include=["services.ai_jobs"],
+)
+
+celery_app.conf.update(
+    task_serializer="json",
+    accept_content=["json"],
+    # El estado de los jobs vive en Redis (services.ai_jobs), no en el result backend
+    task_ignore_result=True,
+    # Una generación puede tardar minutos: no reservar tareas de más por worker
+    task_acks_late=True,
+    worker_prefetch_multiplier=1,
+)
@@ -43,6 +43,29 @@ class Settings(BaseSettings):
     AI_FILTER_CATALOG: bool = True
     AI_USE_PHASED_GENERATION: bool = True
 
+    # AI Adaptive Generation (max_tokens y modo por fases según llm_call_logs)
+    AI_ADAPTIVE_GENERATION: bool = True
+    AI_MAX_TOKENS_PERCENTILE: float = 0.95
+    AI_ADAPTIVE_MIN_SAMPLES: int = 20
+    AI_PREDICTOR_WINDOW_DAYS: int = 60
+
+    # AI Concurrency (cliente compartido, ver services/llm_client.py)
+    AI_MAX_CONCURRENT_REQUESTS: int = 4
+    AI_RATE_LIMIT_MAX_RETRIES: int = 4
+    AI_RATE_LIMIT_BASE_DELAY: float = 2.0
+
+    # AI Generation Cache (resultados por request normalizado)
+    # Redis en REDIS_URL si está disponible; si no, LRU en memoria del proceso
+    AI_GENERATION_CACHE_ENABLED: bool = True
+    AI_GENERATION_CACHE_USE_REDIS: bool = True
+    AI_GENERATION_CACHE_TTL_SECONDS: int = 604800
+    AI_GENERATION_CACHE_MAX_ENTRIES: int = 512
+
+    # AI Generation Jobs (POST /api/ai/jobs)
+    # True: worker de Celery con broker/estado en REDIS_URL; False: en el mismo proceso
+    AI_JOBS_USE_CELERY: bool = False
+    AI_JOB_TTL_SECONDS: int = 86400
+
     model_config = SettingsConfigDict(
         env_file=".env",
         extra="ignore"  # allow keys in .env that we don't explicitly model
@@ -0,0 +1,119 @@
+"""
+Keyset (cursor) pagination helpers.
+
+List endpoints accept an opaque `cursor` encoding the sort key of the last
+row returned, so deep pages cost the same as the first one. Offset (`skip`)
+pagination keeps working for backward compatibility, and the total count can
+be exact, estimated from the query planner, or skipped.
+"""
+import base64
+import json
+from enum import Enum
+from typing import Any, List, Optional, Sequence
+from datetime import datetime, date
+from fastapi import HTTPException, status
+from sqlalchemy import tuple_, text
+from sqlalchemy.orm import Query
+
+
+class TotalMode(str, Enum):
+    EXACT = "exact"        # COUNT(*) (default, as before)
+    ESTIMATE = "estimate"  # Planner row estimate, no scan
+    NONE = "none"          # Skip the count (total = null)
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode the sort key of a row as an opaque cursor"""
+    payload = []
+    for value in values:
+        if isinstance(value, datetime):
+            payload.append({"dt": value.isoformat()})
+        elif isinstance(value, date):
+            payload.append({"d": value.isoformat()})
+        elif isinstance(value, Enum):
+            payload.append(value.value)
+        else:
+            payload.append(value)
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """Decode a cursor produced by encode_cursor (400 if malformed)"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(payload, list) or len(payload) != size:
+            raise ValueError("cursor size mismatch")
+        values = []
+        for value in payload:
+            if isinstance(value, dict) and "dt" in value:
+                values.append(datetime.fromisoformat(value["dt"]))
+            elif isinstance(value, dict) and "d" in value:
+                values.append(date.fromisoformat(value["d"]))
+            else:
+                values.append(value)
+        return values
+    except (ValueError, TypeError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        ) from e
+
+
+def count_total(query: Query, mode: TotalMode) -> Optional[int]:
+    """Total rows of a (filtered, unpaginated) query according to the requested mode"""
+    if mode == TotalMode.NONE:
+        return None
+    if mode == TotalMode.ESTIMATE:
+        return estimate_count(query)
+    return query.order_by(None).count()
+
+
+def estimate_count(query: Query) -> int:
+    """Row estimate from PostgreSQL's planner (EXPLAIN), without scanning the table"""
+    statement = query.order_by(None).statement.compile(
+        dialect=query.session.bind.dialect,
+        compile_kwargs={"literal_binds": True}
+    )
+    plan = query.session.execute(text(f"EXPLAIN (FORMAT JSON) {statement}")).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def paginate(
+    query: Query,
+    sort_columns: Sequence[Any],
+    descending: bool,
+    limit: int,
+    cursor: Optional[str] = None,
+    skip: int = 0
+):
+    """
+    Fetch one page ordered by sort_columns (last column must be unique, e.g. id).
+
+    With a cursor the page starts right after the encoded row (keyset);
+    otherwise `skip` is used as a plain offset.
+
+    Returns:
+        (rows, next_cursor) - next_cursor is None on the last page
+    """
+    if cursor:
+        values = decode_cursor(cursor, len(sort_columns))
+        key = tuple_(*sort_columns)
+        query = query.filter(key < tuple_(*values) if descending else key > tuple_(*values))
+
+    order = [col.desc() if descending else col.asc() for col in sort_columns]
+    query = query.order_by(*order)
+    if not cursor and skip:
+        query = query.offset(skip)
+
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor([getattr(last, col.key) for col in sort_columns])
+
+    return rows, next_cursor
@@ -16,6 +16,16 @@ from models.client_interview import ClientInterview, Gender, ExperienceLevel
 from models.client_metric import ClientMetric, MetricType
 from models.workout_log import WorkoutLog, ExerciseSetLog, WorkoutStatus
 from models.patient_context import PatientContextSnapshot
+from models.program_sequence import ProgramSequenceEntry, ClientProgramCursor
+from models.sync_tombstone import SyncTombstone
+from models.exercise_performance import (
+    ExercisePerformanceDay,
+    ExercisePersonalBest,
+    PersonalRecordEvent,
+    PersonalRecordType,
+)
+from models.muscle_workload import MuscleWorkload
+from models.llm_call_log import LLMCallLog
 
 __all__ = [
     "Base",
@@ -46,4 +56,13 @@ __all__ = [
     "ExerciseSetLog",
     "WorkoutStatus",
     "PatientContextSnapshot",
+    "ProgramSequenceEntry",
+    "ClientProgramCursor",
+    "SyncTombstone",
+    "ExercisePerformanceDay",
+    "ExercisePersonalBest",
+    "PersonalRecordEvent",
+    "PersonalRecordType",
+    "MuscleWorkload",
+    "LLMCallLog",
 ]
@@ -3,7 +3,7 @@ Exercise model for FitPilot.
 Represents exercises in the exercise library.
 """
 from sqlalchemy import Column, String, Text, Enum, DateTime, Integer, Float
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import object_session, relationship
 from datetime import datetime
 import enum
 import uuid
@@ -140,14 +140,32 @@ class Exercise(Base):
             for em in self.exercise_muscles if em.muscle_role == "secondary"
         ]
 
+    def _cached_muscles(self):
+        """
+        Músculos del catálogo cacheado (ExerciseMuscles), o None si el ejercicio
+        no está en una sesión o aún no tiene id.
+        """
+        db = object_session(self)
+        if db is None or self.id is None:
+            return None
+        # Import diferido: services.exercise_catalog importa este modelo
+        from services.exercise_catalog import EMPTY_EXERCISE_MUSCLES, get_exercise_muscle_map
+        return get_exercise_muscle_map(db).get(self.id, EMPTY_EXERCISE_MUSCLES)
+
     @property
     def primary_muscle_names(self):
         """Get names of all primary muscles."""
+        cached = self._cached_muscles()
+        if cached is not None:
+            return list(cached.primary_names)
         return [em.muscle.name for em in self.exercise_muscles if em.muscle_role == "primary"]
 
     @property
     def secondary_muscle_names(self):
         """Get names of all secondary muscles."""
+        cached = self._cached_muscles()
+        if cached is not None:
+            return list(cached.secondary_names)
         return [em.muscle.name for em in self.exercise_muscles if em.muscle_role == "secondary"]
 
     def get_name(self, language: str = "es") -> str:
@@ -0,0 +1,91 @@
+"""
+Exercise performance models for FitPilot.
+
+Rolling per-day aggregate of the sets a client logged for each exercise
+(best estimated 1RM, top set, total reps and volume-load). It is updated
+incrementally when sets are logged, so "how has my bench press progressed"
+is a single indexed range scan instead of a scan over every ExerciseSetLog.
+
+Personal bests are kept in one compact row per (client, exercise) so PR
+detection on set ingestion is a primary-key lookup, and every PR is recorded
+as an event.
+"""
+from sqlalchemy import Column, String, Integer, Float, Date, DateTime, ForeignKey, Enum, Index
+from sqlalchemy.dialects.postgresql import JSONB
+from datetime import datetime
+import enum
+import uuid
+from models.base import Base
+
+
+class PersonalRecordType(str, enum.Enum):
+    E1RM = "e1rm"  # Mejor 1RM estimado
+    REP_MAX = "rep_max"  # Más peso para un número de repeticiones
+
+
+class ExercisePerformanceDay(Base):
+    """
+    Performance of a client on one exercise on one date.
+
+    Maintained by services.exercise_performance; can be rebuilt from
+    exercise_set_logs with scripts/backfill_exercise_performance.py.
+    """
+    __tablename__ = "exercise_performance_history"
+
+    client_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    exercise_id = Column(String, ForeignKey("exercises.id", ondelete="CASCADE"), primary_key=True)
+    performed_on = Column(Date, primary_key=True)  # Fecha del workout (started_at)
+
+    best_e1rm = Column(Float, nullable=True)  # Mejor 1RM estimado (Epley); null sin peso
+    top_set_weight_kg = Column(Float, nullable=True)  # Serie más pesada del día
+    top_set_reps = Column(Integer, nullable=True)
+    total_sets = Column(Integer, nullable=False, default=0)
+    total_reps = Column(Integer, nullable=False, default=0)
+    volume_load = Column(Float, nullable=False, default=0.0)  # Σ reps × kg
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<ExercisePerformanceDay {self.exercise_id[:8]} {self.performed_on} e1RM={self.best_e1rm}>"
+
+
+class ExercisePersonalBest(Base):
+    """
+    Best-of record of a client on one exercise.
+
+    rep_maxes maps repetitions (as string) to the heaviest weight lifted for
+    that many reps, e.g. {"1": 120.0, "5": 100.0}.
+    """
+    __tablename__ = "exercise_personal_bests"
+
+    client_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    exercise_id = Column(String, ForeignKey("exercises.id", ondelete="CASCADE"), primary_key=True)
+    best_e1rm = Column(Float, nullable=True)
+    rep_maxes = Column(JSONB, nullable=False, default=dict)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<ExercisePersonalBest {self.exercise_id[:8]} e1RM={self.best_e1rm}>"
+
+
+class PersonalRecordEvent(Base):
+    """A personal record set by a logged set"""
+    __tablename__ = "personal_record_events"
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    client_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    exercise_id = Column(String, ForeignKey("exercises.id", ondelete="CASCADE"), nullable=False)
+    set_log_id = Column(String, ForeignKey("exercise_set_logs.id", ondelete="CASCADE"), nullable=False, index=True)
+    record_type = Column(Enum(PersonalRecordType, values_callable=lambda e: [member.value for member in e]), nullable=False)
+    reps = Column(Integer, nullable=False)
+    weight_kg = Column(Float, nullable=False)
+    value = Column(Float, nullable=False)  # Nuevo récord (kg de e1RM o de la serie)
+    previous_value = Column(Float, nullable=False)
+    achieved_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("ix_personal_record_events_client_achieved", "client_id", "achieved_at"),
+    )
+
+    def __repr__(self):
+        return f"<PersonalRecordEvent {self.record_type} {self.value}>"
@@ -0,0 +1,51 @@
+"""
+LLM call telemetry model for FitPilot.
+
+One row per call to the AI during program generation (a phased generation
+writes one row per phase/mesocycle call, grouped by generation_id). Rows are
+compact and append-only; they feed /api/ai/stats and the token/latency
+predictor used to size max_tokens.
+"""
+from sqlalchemy import Column, String, Integer, SmallInteger, Float, Boolean, DateTime, Index
+from datetime import datetime
+from models.base import Base
+
+
+class LLMCallLog(Base):
+    """Usage, latency and outcome of a single AI call."""
+    __tablename__ = "llm_call_logs"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    generation_id = Column(String(32), nullable=False)  # Agrupa las llamadas de una generación
+    phase = Column(String(20), nullable=False)  # single, legacy, base_week, progression
+    model = Column(String(64), nullable=False)
+
+    # Forma del programa (features del predictor de tokens)
+    mode = Column(String(10), nullable=False)  # single | phased | legacy
+    compressed = Column(Boolean, nullable=False)
+    streamed = Column(Boolean, nullable=False, default=False)
+    total_weeks = Column(SmallInteger, nullable=False)
+    days_per_week = Column(SmallInteger, nullable=False)
+
+    prompt_chars = Column(Integer, nullable=False)
+    max_tokens = Column(Integer, nullable=False)
+    input_tokens = Column(Integer, nullable=False, default=0)
+    output_tokens = Column(Integer, nullable=False, default=0)
+    cache_read_tokens = Column(Integer, nullable=False, default=0)
+    cache_creation_tokens = Column(Integer, nullable=False, default=0)
+    cache_hit_ratio = Column(Float, nullable=True)  # cache_read / tokens de prompt
+
+    latency_ms = Column(Integer, nullable=False)
+    stop_reason = Column(String(20), nullable=True)  # end_turn, max_tokens (JSON truncado)...
+    parse_success = Column(Boolean, nullable=False)
+    remap_count = Column(Integer, nullable=True)  # Ejercicios remapeados por ExerciseMapper (por generación)
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("ix_llm_call_logs_created_at", "created_at"),
+        Index("ix_llm_call_logs_generation_id", "generation_id"),
+    )
+
+    def __repr__(self):
+        return f"<LLMCallLog {self.phase} {self.output_tokens} tokens {self.latency_ms}ms>"
@@ -0,0 +1,50 @@
+"""
+Muscle workload models for FitPilot.
+
+Materialized acute:chronic workload ratio (ACWR) per client and muscle. The
+state is updated incrementally when a workout is completed (EWMA values are
+decayed to the new date and the workout's volume-load is added; the last 28
+daily loads are kept for the simple rolling windows), so reading the ratio or
+scanning every client for injury-risk flags never touches the set history.
+"""
+from sqlalchemy import Column, String, Float, Date, DateTime, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import JSONB
+from datetime import datetime
+from models.base import Base
+
+
+class MuscleWorkload(Base):
+    """
+    Training load state of a client for one muscle.
+
+    daily_loads maps ISO dates to the volume-load of that day and only keeps
+    the chronic window ending at last_load_date, e.g. {"2024-05-06": 3250.0}.
+    """
+    __tablename__ = "muscle_workloads"
+
+    client_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    muscle_name = Column(String, primary_key=True)  # Muscle.name (chest, lats...)
+
+    first_load_date = Column(Date, nullable=False)  # Inicio del historial (ratios poco fiables al principio)
+    last_load_date = Column(Date, nullable=False)  # Fecha de referencia de los valores
+    daily_loads = Column(JSONB, nullable=False, default=dict)
+
+    # Ventanas simples: suma de 7 días y promedio semanal de 28 días
+    acute_load = Column(Float, nullable=False, default=0.0)
+    chronic_load = Column(Float, nullable=False, default=0.0)
+    acwr_simple = Column(Float, nullable=True)  # null sin carga crónica
+
+    # Medias móviles exponenciales (carga diaria)
+    acute_ewma = Column(Float, nullable=False, default=0.0)
+    chronic_ewma = Column(Float, nullable=False, default=0.0)
+    acwr_ewma = Column(Float, nullable=True)
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        # Flags de riesgo del entrenador: clientes con entrenamiento reciente
+        Index("ix_muscle_workloads_last_load_date", "last_load_date"),
+    )
+
+    def __repr__(self):
+        return f"<MuscleWorkload {self.muscle_name} ACWR={self.acwr_ewma}>"
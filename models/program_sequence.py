@@ -0,0 +1,59 @@
+"""
+Program sequence models for FitPilot.
+
+Materialized ordinal index of the training days of a macrocycle
+(block_number → week_number → day_number, rest days excluded) plus a per-client
+cursor pointing at the next pending position. Lets the mobile app resolve
+"next workout" with a single indexed lookup instead of scanning the program.
+"""
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey
+from datetime import datetime
+from models.base import Base
+
+
+class ProgramSequenceEntry(Base):
+    """
+    One row per non-rest training day of a macrocycle, in program order.
+
+    Rebuilt by services.program_sequence whenever the program structure changes.
+    """
+    __tablename__ = "program_sequence"
+
+    macrocycle_id = Column(
+        String,
+        ForeignKey("macrocycles.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    position = Column(Integer, primary_key=True)  # 1-based ("Día 5 de 24")
+    training_day_id = Column(
+        String,
+        ForeignKey("training_days.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True
+    )
+
+    def __repr__(self):
+        return f"<ProgramSequenceEntry macrocycle={self.macrocycle_id} #{self.position}>"
+
+
+class ClientProgramCursor(Base):
+    """
+    Next pending position of a client in a macrocycle.
+
+    position > total means the client completed the whole program.
+    """
+    __tablename__ = "client_program_cursors"
+
+    client_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    macrocycle_id = Column(
+        String,
+        ForeignKey("macrocycles.id", ondelete="CASCADE"),
+        primary_key=True,
+        index=True
+    )
+    position = Column(Integer, nullable=False, default=1)
+    total = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<ClientProgramCursor client={self.client_id} {self.position}/{self.total}>"
@@ -0,0 +1,60 @@
+"""
+Sync tombstone model for FitPilot.
+
+Records deletions of workout data so the mobile delta sync (/api/workout-logs/sync)
+can tell clients which rows to drop locally.
+"""
+from sqlalchemy import Column, String, DateTime, Index, event, insert, select
+from datetime import datetime
+import uuid
+from models.base import Base
+from models.workout_log import WorkoutLog, ExerciseSetLog, sync_txid_column
+
+
+class SyncTombstone(Base):
+    """A deleted WorkoutLog or ExerciseSetLog, kept for delta sync."""
+    __tablename__ = "sync_tombstones"
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    client_id = Column(String, nullable=False)  # Sin FK: debe sobrevivir al borrado de los datos
+    entity_type = Column(String(30), nullable=False)  # 'workout_log' | 'exercise_set_log'
+    entity_id = Column(String, nullable=False)
+    deleted_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    sync_txid = sync_txid_column()
+
+    __table_args__ = (
+        Index("ix_sync_tombstones_client_sync", "client_id", "sync_txid", "id"),
+    )
+
+    def __repr__(self):
+        return f"<SyncTombstone {self.entity_type} {self.entity_id}>"
+
+
+def _record_tombstone(connection, client_id, entity_type, entity_id):
+    if not client_id:
+        return
+    connection.execute(
+        insert(SyncTombstone.__table__).values(
+            id=str(uuid.uuid4()),
+            client_id=client_id,
+            entity_type=entity_type,
+            entity_id=entity_id,
+            deleted_at=datetime.utcnow(),
+        )
+    )
+
+
+@event.listens_for(WorkoutLog, "after_delete")
+def _workout_log_deleted(mapper, connection, target):
+    _record_tombstone(connection, target.client_id, "workout_log", target.id)
+
+
+@event.listens_for(ExerciseSetLog, "after_delete")
+def _exercise_set_log_deleted(mapper, connection, target):
+    client_id = target.client_id
+    if client_id is None:
+        # Series anteriores a la desnormalización de client_id
+        client_id = connection.execute(
+            select(WorkoutLog.client_id).where(WorkoutLog.id == target.workout_log_id)
+        ).scalar()
+    _record_tombstone(connection, client_id, "exercise_set_log", target.id)
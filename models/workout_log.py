@@ -1,4 +1,5 @@
-from sqlalchemy import Column, String, Text, Integer, DateTime, ForeignKey, Enum, Float, Date
+from sqlalchemy import Column, String, Text, Integer, BigInteger, DateTime, ForeignKey, Enum, Float, Date, UniqueConstraint, Index, func, text
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -6,6 +7,13 @@ import uuid
 from models.base import Base
 
 
+# Transacción que escribió la fila por última vez (cursor del delta sync).
+# A diferencia de updated_at sigue el orden de commit: una transacción con un
+# txid menor que el xmin del snapshot actual ya terminó.
+def sync_txid_column():
+    return Column(BigInteger, server_default=text("txid_current()"), onupdate=func.txid_current(), nullable=False)
+
+
 class WorkoutStatus(str, enum.Enum):
     IN_PROGRESS = "in_progress"
     COMPLETED = "completed"
@@ -49,14 +57,25 @@ class WorkoutLog(Base):
     # Campos para reagendamiento
     rescheduled_to_date = Column(Date, nullable=True)  # Nueva fecha si se reagendó
 
+    # Volume-load por músculo sumado a muscle_workloads al completarlo (se resta al reabrir)
+    muscle_loads = Column(JSONB, nullable=True)
+
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    sync_txid = sync_txid_column()
 
     # Relationships
     client = relationship("User", foreign_keys=[client_id])
     training_day = relationship("TrainingDay", foreign_keys=[training_day_id])
     exercise_sets = relationship("ExerciseSetLog", back_populates="workout_log", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Delta sync de la app móvil: cambios de un cliente desde un cursor
+        Index("ix_workout_logs_client_sync", "client_id", "sync_txid", "id"),
+        # Historial paginado por keyset
+        Index("ix_workout_logs_client_started", "client_id", "started_at", "id"),
+    )
+
     def __repr__(self):
         return f"<WorkoutLog {self.id[:8]} - {self.status}>"
 
@@ -67,6 +86,8 @@ class ExerciseSetLog(Base):
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     workout_log_id = Column(String, ForeignKey("workout_logs.id"), nullable=False, index=True)
+    # Desnormalizado desde WorkoutLog para el delta sync por cliente
+    client_id = Column(String, ForeignKey("users.id"), nullable=True)
     day_exercise_id = Column(String, ForeignKey("day_exercises.id"), nullable=False, index=True)
     set_number = Column(Integer, nullable=False)  # 1, 2, 3... (número de serie)
     reps_completed = Column(Integer, nullable=False)  # Repeticiones completadas
@@ -74,11 +95,20 @@ class ExerciseSetLog(Base):
     effort_value = Column(Float, nullable=True)  # RIR/RPE registrado por el usuario
     completed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     notes = Column(Text, nullable=True)
+    # Clave generada por la app para reintentos/sincronización offline sin duplicados
+    idempotency_key = Column(String(64), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    sync_txid = sync_txid_column()
 
     # Relationships
     workout_log = relationship("WorkoutLog", back_populates="exercise_sets")
     day_exercise = relationship("DayExercise", foreign_keys=[day_exercise_id])
 
+    __table_args__ = (
+        UniqueConstraint('workout_log_id', 'idempotency_key', name='uq_set_log_idempotency'),
+        Index("ix_exercise_set_logs_client_sync", "client_id", "sync_txid", "id"),
+    )
+
     def __repr__(self):
         return f"<ExerciseSetLog Set {self.set_number}: {self.reps_completed} reps @ {self.weight_kg}kg>"
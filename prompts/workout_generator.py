@@ -6,7 +6,9 @@ prompts de alta calidad que generan programas de entrenamiento consistentes.
 """
 
 import json
-from typing import List, Dict, Any, Optional
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Mapping, Optional, Sequence, Tuple
 from schemas.ai_generator import (
     AIWorkoutRequest,
     FitnessLevel,
@@ -304,7 +306,7 @@ def build_patient_context_block(patient_context: Optional[PatientContext]) -> st
     return "\n".join(lines)
 
 
-def build_exercise_catalog(exercises: List[Dict[str, Any]]) -> str:
+def build_exercise_catalog(exercises: Sequence[Mapping[str, Any]]) -> str:
     """
     Construye el catálogo de ejercicios disponibles para la IA.
     Los ejercicios se agrupan por categoría para facilitar la selección.
@@ -352,48 +354,71 @@ def build_exercise_catalog(exercises: List[Dict[str, Any]]) -> str:
     return "\n".join(catalog_parts)
 
 
-def build_filtered_catalog(
-    exercises: List[Dict[str, Any]],
-    request: AIWorkoutRequest
-) -> str:
-    """
-    Construye un catálogo FILTRADO de ejercicios para reducir tokens.
-    Filtra por: objetivo, equipamiento disponible, restricciones, nivel.
+# Mapeo de objetivo a tipos de ejercicio preferidos
+GOAL_EXERCISE_TYPES = {
+    PrimaryGoal.HYPERTROPHY: ("monoarticular", "multiarticular"),
+    PrimaryGoal.STRENGTH: ("multiarticular",),
+    PrimaryGoal.POWER: ("multiarticular",),
+    PrimaryGoal.ENDURANCE: ("cardio", "monoarticular", "multiarticular"),
+    PrimaryGoal.FAT_LOSS: ("cardio", "multiarticular"),
+    PrimaryGoal.GENERAL_FITNESS: ("monoarticular", "multiarticular"),
+}
+
+# Equipamiento que se asume con acceso a gimnasio
+GYM_EQUIPMENT = ("barbell", "bench", "cables", "dumbbells", "machines", "squat_rack")
+
+
+def catalog_filter_signature(request: AIWorkoutRequest) -> tuple:
     """
-    if not exercises:
-        return "## CATÁLOGO DE EJERCICIOS\n\nNo hay ejercicios disponibles."
+    Parámetros normalizados de los que depende build_filtered_catalog.
 
-    filtered = []
-    goal = request.goals.primary_goal
+    Dos requests con la misma firma producen exactamente el mismo catálogo
+    filtrado, así que la firma sirve como clave de memoización del prefijo.
+
+    Returns:
+        (tipos preferidos, equipamiento, excluidos, músculos objetivo, es principiante),
+        con cada colección como tupla ordenada
+    """
     equipment = request.equipment
     restrictions = request.restrictions
-    level = request.user_profile.fitness_level
 
-    # Equipamiento disponible como strings
     available_equip = {e.value for e in equipment.available_equipment}
     if equipment.has_gym_access:
-        available_equip.update(["barbell", "dumbbells", "cables", "machines", "bench", "squat_rack"])
+        available_equip.update(GYM_EQUIPMENT)
 
-    # Ejercicios excluidos
     excluded = set()
     if restrictions and restrictions.excluded_exercises:
         excluded = {ex.lower() for ex in restrictions.excluded_exercises}
 
-    # Músculos objetivo para priorizar
     target_muscles = set()
     if request.goals.target_muscle_groups:
         target_muscles = {m.value for m in request.goals.target_muscle_groups}
 
-    # Mapeo de objetivo a tipos de ejercicio preferidos
-    goal_preferences = {
-        PrimaryGoal.HYPERTROPHY: {"multiarticular", "monoarticular"},
-        PrimaryGoal.STRENGTH: {"multiarticular"},
-        PrimaryGoal.POWER: {"multiarticular"},
-        PrimaryGoal.ENDURANCE: {"multiarticular", "monoarticular", "cardio"},
-        PrimaryGoal.FAT_LOSS: {"multiarticular", "cardio"},
-        PrimaryGoal.GENERAL_FITNESS: {"multiarticular", "monoarticular"},
-    }
-    preferred_types = goal_preferences.get(goal, {"multiarticular", "monoarticular"})
+    return (
+        GOAL_EXERCISE_TYPES.get(request.goals.primary_goal, ("monoarticular", "multiarticular")),
+        tuple(sorted(available_equip)),
+        tuple(sorted(excluded)),
+        tuple(sorted(target_muscles)),
+        request.user_profile.fitness_level == FitnessLevel.BEGINNER,
+    )
+
+
+def build_filtered_catalog(
+    exercises: Sequence[Mapping[str, Any]],
+    request: AIWorkoutRequest
+) -> str:
+    """
+    Construye un catálogo FILTRADO de ejercicios para reducir tokens.
+    Filtra por: objetivo, equipamiento disponible, restricciones, nivel.
+
+    El resultado sólo depende de catalog_filter_signature(request) y del orden
+    de `exercises`, que no se modifican (vienen del snapshot compartido).
+    """
+    if not exercises:
+        return "## CATÁLOGO DE EJERCICIOS\n\nNo hay ejercicios disponibles."
+
+    preferred_types, available_equip, excluded, target_muscles, is_beginner = catalog_filter_signature(request)
+    filtered = []
 
     # Filtrar ejercicios
     for ex in exercises:
@@ -411,25 +436,26 @@ def build_filtered_catalog(
             continue
 
         # Filtrar por nivel (principiantes no hacen ejercicios avanzados)
-        if level == FitnessLevel.BEGINNER and ex_difficulty == "advanced":
+        if is_beginner and ex_difficulty == "advanced":
             continue
 
         # Priorizar por tipo de ejercicio según objetivo
         if ex_type not in preferred_types and ex_type != "cardio":
             # Incluir pero con menor prioridad (para variedad)
-            ex["_priority"] = 1
+            priority = 1
         else:
-            ex["_priority"] = 2
+            priority = 2
 
         # Mayor prioridad si trabaja músculos objetivo
         primary = ex.get("primary_muscles", [])
         if target_muscles and any(m in target_muscles for m in primary):
-            ex["_priority"] = 3
+            priority = 3
 
-        filtered.append(ex)
+        filtered.append((priority, ex))
 
-    # Ordenar por prioridad y limitar si hay muchos
-    filtered.sort(key=lambda x: x.get("_priority", 0), reverse=True)
+    # Ordenar por prioridad (estable: empates en el orden del catálogo) y limitar si hay muchos
+    filtered.sort(key=lambda x: x[0], reverse=True)
+    filtered = [ex for _, ex in filtered]
 
     # Limitar a máximo 80 ejercicios para ahorrar tokens
     if len(filtered) > 80:
@@ -567,14 +593,26 @@ La respuesta será usada como TEMPLATE para generar las semanas siguientes con p
 Responde SOLO con JSON usando el formato comprimido."""
 
 
-def build_progression_prompt(base_week_data: Dict[str, Any], total_weeks: int) -> str:
+def build_progression_prompt(
+    base_week_data: Dict[str, Any],
+    total_weeks: int,
+    week_range: Optional[Tuple[int, int]] = None
+) -> str:
     """
     Prompt para generar la matriz de PROGRESIÓN basada en la semana base.
     Solo genera los cambios de parámetros, no la estructura completa.
+
+    Con week_range=(inicio, fin) pide solo ese tramo del programa (un
+    mesociclo), para generar los tramos en paralelo.
     """
+    first_week, last_week = week_range or (2, total_weeks)
+    scope = f"las semanas {first_week}-{last_week}"
+    if week_range:
+        scope += f" de un programa de {total_weeks} semanas (las demás semanas se generan aparte)"
+
     return f"""## TAREA: GENERAR MATRIZ DE PROGRESIÓN
 
-Ya tienes la SEMANA BASE. Ahora genera SOLO los cambios de parámetros para las semanas 2-{total_weeks}.
+Ya tienes la SEMANA BASE. Ahora genera SOLO los cambios de parámetros para {scope}.
 
 Semana base (referencia):
 {json.dumps(base_week_data, indent=2)}
@@ -589,7 +627,7 @@ Formato de respuesta:
 {{
   "progression": [
     {{
-      "week": 2,
+      "week": {first_week},
       "intensity": "medium",
       "changes": [
         {{"day": 1, "ex_idx": 0, "s": 4, "ev": 2}},
@@ -597,7 +635,7 @@ Formato de respuesta:
       ]
     }},
     {{
-      "week": 3,
+      "week": {first_week + 1},
       "intensity": "high",
       "changes": [...]
     }}
@@ -607,6 +645,7 @@ Formato de respuesta:
 ```
 
 REGLAS:
+- Solo incluye {scope} (también en "deload_weeks")
 - Solo incluye ejercicios que CAMBIAN (omite los que mantienen valores base)
 - "s" = sets, "ev" = effort_value, "rm/rx" = reps
 - Semanas de deload: reducir volumen 40-50%
@@ -832,11 +871,74 @@ def assemble_final_prompt(
     return "\n".join(sections)
 
 
-def assemble_optimized_prompt(
+# Prefijos cacheables memoizados (LRU) por (huella del catálogo, formato, firma de filtros)
+PROMPT_PREFIX_CACHE_SIZE = 128
+_prefix_lock = threading.Lock()
+_prefix_cache: "OrderedDict[tuple, str]" = OrderedDict()
+_prefix_stats = {"hits": 0, "misses": 0}
+
+
+def build_cacheable_prefix(
     request: AIWorkoutRequest,
-    exercises: List[Dict[str, Any]],
+    exercises: Sequence[Mapping[str, Any]],
+    catalog_fingerprint: Optional[str] = None,
     use_filtered_catalog: bool = True,
     use_compressed_output: bool = True
+) -> str:
+    """
+    Contenido CACHEABLE del prompt: system prompt + catálogo + formato de salida.
+
+    Con catalog_fingerprint se memoiza por (huella del catálogo, formato, firma
+    de filtros): requests equivalentes reciben exactamente el mismo texto, que
+    es lo que necesita el prompt cache de Anthropic para reutilizar el prefijo.
+    La huella depende sólo del contenido del catálogo, así que un cambio en
+    ejercicios nunca sirve un prefijo viejo.
+    """
+    key = None
+    if catalog_fingerprint is not None:
+        key = (
+            catalog_fingerprint,
+            use_filtered_catalog,
+            use_compressed_output,
+            catalog_filter_signature(request) if use_filtered_catalog else None,
+        )
+        with _prefix_lock:
+            cached = _prefix_cache.get(key)
+            if cached is not None:
+                _prefix_cache.move_to_end(key)
+                _prefix_stats["hits"] += 1
+                return cached
+
+    prefix = "\n".join([
+        build_system_prompt(),
+        "",
+        build_filtered_catalog(exercises, request) if use_filtered_catalog else build_exercise_catalog(exercises),
+        "",
+        build_compressed_output_schema() if use_compressed_output else build_output_schema(),
+    ])
+
+    if key is not None:
+        with _prefix_lock:
+            _prefix_stats["misses"] += 1
+            _prefix_cache[key] = prefix
+            while len(_prefix_cache) > PROMPT_PREFIX_CACHE_SIZE:
+                _prefix_cache.popitem(last=False)
+
+    return prefix
+
+
+def prompt_prefix_cache_stats() -> Dict[str, int]:
+    """Aciertos/fallos de la memoización de prefijos en este proceso."""
+    with _prefix_lock:
+        return dict(_prefix_stats, size=len(_prefix_cache))
+
+
+def assemble_optimized_prompt(
+    request: AIWorkoutRequest,
+    exercises: Sequence[Mapping[str, Any]],
+    use_filtered_catalog: bool = True,
+    use_compressed_output: bool = True,
+    catalog_fingerprint: Optional[str] = None
 ) -> tuple[str, str]:
     """
     Ensambla prompts optimizados separando contenido CACHEABLE del específico.
@@ -847,14 +949,9 @@ def assemble_optimized_prompt(
         - specific_content: Contexto del usuario específico
     """
     # Contenido CACHEABLE (estático o semi-estático)
-    cacheable_parts = [
-        build_system_prompt(),
-        "",
-        build_filtered_catalog(exercises, request) if use_filtered_catalog else build_exercise_catalog(exercises),
-        "",
-        build_compressed_output_schema() if use_compressed_output else build_output_schema(),
-    ]
-    cacheable_content = "\n".join(cacheable_parts)
+    cacheable_content = build_cacheable_prefix(
+        request, exercises, catalog_fingerprint, use_filtered_catalog, use_compressed_output
+    )
 
     # Contenido ESPECÍFICO (cambia por cada request)
     patient_context_block = build_patient_context_block(request.patient_context)
@@ -879,7 +976,8 @@ def assemble_optimized_prompt(
 
 def assemble_base_week_prompt(
     request: AIWorkoutRequest,
-    exercises: List[Dict[str, Any]]
+    exercises: Sequence[Mapping[str, Any]],
+    catalog_fingerprint: Optional[str] = None
 ) -> tuple[str, str]:
     """
     Ensambla prompt para generar solo la SEMANA BASE.
@@ -887,15 +985,8 @@ def assemble_base_week_prompt(
     Returns:
         tuple: (cacheable_content, specific_content)
     """
-    # Cacheable
-    cacheable_parts = [
-        build_system_prompt(),
-        "",
-        build_filtered_catalog(exercises, request),
-        "",
-        build_compressed_output_schema(),
-    ]
-    cacheable_content = "\n".join(cacheable_parts)
+    # Cacheable (mismo prefijo que assemble_optimized_prompt con catálogo filtrado y comprimido)
+    cacheable_content = build_cacheable_prefix(request, exercises, catalog_fingerprint)
 
     # Específico para semana base
     specific_parts = [
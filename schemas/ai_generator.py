@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field
-from datetime import date
+from pydantic import BaseModel, Field, PrivateAttr
+from datetime import date, datetime
 from typing import Optional, List, Literal
 from enum import Enum
 
@@ -459,6 +459,9 @@ class AIWorkoutResponse(BaseModel):
     warnings: List[str] = Field(default=[], description="Advertencias sobre el programa")
     error: Optional[str] = None
 
+    # Telemetría (llm_call_logs) de la generación; no se serializa
+    _generation_id: Optional[str] = PrivateAttr(default=None)
+
 
 # =============== Schemas Auxiliares ===============
 
@@ -484,6 +487,15 @@ class GenerationStatus(BaseModel):
     result: Optional[AIWorkoutResponse] = None
 
 
+class AIJobStatus(GenerationStatus):
+    """Estado de un job de generación (POST /api/ai/jobs)"""
+    job_id: str
+    phase: Optional[str] = None  # base_week, progression, expansion, generation
+    training_days_generated: int = 0
+    created_at: datetime
+    updated_at: datetime
+
+
 class WorkoutData(BaseModel):
     """Datos del programa generado para guardar"""
     macrocycle: GeneratedMacrocycle
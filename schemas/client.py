@@ -29,4 +29,5 @@ class ClientResponse(BaseModel):
 
 class ClientListResponse(BaseModel):
     clients: list[ClientResponse]
-    total: int
+    total: Optional[int]  # null when total=none
+    next_cursor: Optional[str] = None  # Pass as `cursor` to get the next page
@@ -229,5 +229,6 @@ class MacrocycleResponse(MacrocycleBase):
 
 
 class MacrocycleListResponse(BaseModel):
-    total: int
+    total: Optional[int]  # null when total=none
     macrocycles: List[MacrocycleResponse]
+    next_cursor: Optional[str] = None  # Pass as `cursor` to get the next page
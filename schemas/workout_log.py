@@ -2,6 +2,7 @@ from pydantic import BaseModel, Field
 from datetime import datetime, date
 from typing import Optional, List, Literal
 from models.workout_log import WorkoutStatus, AbandonReason
+from models.exercise_performance import PersonalRecordType
 
 
 # =============== ExerciseSetLog Schemas ===============
@@ -13,12 +14,26 @@ class ExerciseSetLogBase(BaseModel):
     weight_kg: Optional[float] = Field(None, ge=0, le=1000, description="Weight used in kg")
     effort_value: Optional[float] = Field(None, ge=0, le=10, description="RIR/RPE value recorded")
     notes: Optional[str] = None
+    idempotency_key: Optional[str] = Field(
+        None, min_length=1, max_length=64, description="Client-generated key to deduplicate retried sets"
+    )
 
 
 class ExerciseSetLogCreate(ExerciseSetLogBase):
     pass
 
 
+class ExerciseSetLogBatchItem(ExerciseSetLogCreate):
+    idempotency_key: str = Field(
+        min_length=1, max_length=64, description="Client-generated key to deduplicate retried sets"
+    )
+
+
+class ExerciseSetLogBatchCreate(BaseModel):
+    """Series registradas offline que la app envía en bloque"""
+    sets: List[ExerciseSetLogBatchItem] = Field(min_length=1, max_length=200)
+
+
 class ExerciseSetLogResponse(ExerciseSetLogBase):
     id: str
     workout_log_id: str
@@ -29,6 +44,35 @@ class ExerciseSetLogResponse(ExerciseSetLogBase):
         from_attributes = True
 
 
+class PersonalRecordResponse(BaseModel):
+    """Récord personal superado por una serie"""
+    record_type: PersonalRecordType
+    exercise_id: str
+    set_log_id: str
+    reps: int
+    weight_kg: float
+    value: float  # e1RM (record_type=e1rm) o peso de la serie (rep_max)
+    previous_value: float
+    achieved_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class ExerciseSetLogCreatedResponse(ExerciseSetLogResponse):
+    """Serie registrada con los récords que superó"""
+    is_personal_record: bool = False
+    personal_records: List[PersonalRecordResponse] = []
+
+
+class ExerciseSetLogBatchResponse(BaseModel):
+    """Resultado del registro en bloque"""
+    created: int  # Series insertadas en esta llamada
+    duplicates: int  # Series ya registradas con la misma idempotency_key
+    sets: List[ExerciseSetLogResponse]  # Todas las series del bloque (nuevas y existentes)
+    personal_records: List[PersonalRecordResponse] = []  # Récords de las series nuevas
+
+
 # =============== WorkoutLog Schemas ===============
 
 class WorkoutLogBase(BaseModel):
@@ -76,8 +120,107 @@ class WorkoutLogResponse(WorkoutLogBase):
 
 
 class WorkoutLogListResponse(BaseModel):
-    total: int
+    total: Optional[int]  # null cuando total=none
     workout_logs: List[WorkoutLogResponse]
+    next_cursor: Optional[str] = None  # Enviar como `cursor` para la siguiente página
+
+
+# =============== Delta Sync Schemas ===============
+
+class WorkoutLogSyncItem(WorkoutLogBase):
+    """WorkoutLog sin series anidadas (las series llegan en su propio flujo)"""
+    id: str
+    client_id: str
+    started_at: datetime
+    completed_at: Optional[datetime]
+    status: WorkoutStatus
+    abandon_reason: Optional[AbandonReason] = None
+    abandon_notes: Optional[str] = None
+    rescheduled_to_date: Optional[date] = None
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class SyncTombstoneItem(BaseModel):
+    """Registro eliminado que la app debe borrar localmente"""
+    entity_type: Literal["workout_log", "exercise_set_log"]
+    entity_id: str
+    deleted_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class WorkoutSyncResponse(BaseModel):
+    """Cambios desde el último cursor"""
+    cursor: str  # Enviar como `since` en el siguiente sync
+    has_more: bool  # True si quedan cambios: volver a llamar con el nuevo cursor
+    workout_logs: List[WorkoutLogSyncItem]
+    exercise_sets: List[ExerciseSetLogResponse]
+    deleted: List[SyncTombstoneItem]
+
+
+# =============== Exercise History Schemas ===============
+
+class ExercisePerformancePoint(BaseModel):
+    """Rendimiento de un ejercicio en una fecha"""
+    performed_on: date
+    best_e1rm: Optional[float] = None  # 1RM estimado (Epley)
+    top_set_weight_kg: Optional[float] = None
+    top_set_reps: Optional[int] = None
+    total_sets: int
+    total_reps: int
+    volume_load: float  # Σ reps × kg
+
+    class Config:
+        from_attributes = True
+
+
+class ExerciseHistoryResponse(BaseModel):
+    """Progresión de un ejercicio (gráfica "cómo ha progresado mi press de banca")"""
+    client_id: str
+    exercise_id: str
+    history: List[ExercisePerformancePoint]
+
+
+# =============== Muscle Workload (ACWR) Schemas ===============
+
+WorkloadRisk = Literal["high_risk", "high", "optimal", "low"]
+
+
+class MuscleWorkloadResponse(BaseModel):
+    """Carga aguda/crónica de un músculo"""
+    muscle_name: str
+    last_load_date: date  # Último día con carga
+    as_of: date  # Fecha a la que están decaídos los valores
+    acute_load: float  # Suma de volume-load de 7 días
+    chronic_load: float  # Promedio semanal de 28 días
+    acwr_simple: Optional[float] = None
+    acute_ewma: float
+    chronic_ewma: float
+    acwr_ewma: Optional[float] = None
+    risk: Optional[WorkloadRisk] = None  # Según acwr_ewma
+
+
+class ClientWorkloadResponse(BaseModel):
+    """ACWR por músculo de un cliente"""
+    client_id: str
+    muscles: List[MuscleWorkloadResponse]
+
+
+class WorkloadFlagResponse(MuscleWorkloadResponse):
+    """Músculo con ACWR fuera de rango de uno de los clientes del entrenador"""
+    client_id: str
+    client_name: str
+
+
+class WorkloadFlagsListResponse(BaseModel):
+    """Flags de riesgo de lesión de todos los clientes del entrenador"""
+    total: int
+    flags: List[WorkloadFlagResponse]
 
 
 # =============== Progress Schemas (para Dashboard) ===============
@@ -94,6 +237,7 @@ class DayProgress(BaseModel):
     completion_percentage: float = 0.0  # 0-100
     has_workout: bool = False  # Si tiene entrenamiento programado
     is_rest_day: bool = False
+    workout_status: Optional[WorkoutStatus] = None  # Estado del WorkoutLog más reciente
 
 
 class WeeklyProgressResponse(BaseModel):
@@ -106,6 +250,16 @@ class WeeklyProgressResponse(BaseModel):
     overall_completion_percentage: float
 
 
+class ProgressRangeResponse(BaseModel):
+    """Progreso de varias semanas para las gráficas de historial"""
+    start_date: date
+    end_date: date
+    weeks: List[WeeklyProgressResponse]
+    total_workouts_planned: int
+    total_workouts_completed: int
+    overall_completion_percentage: float
+
+
 # =============== Current Workout State ===============
 
 class ExerciseProgress(BaseModel):
@@ -170,3 +324,26 @@ class MissedWorkoutsListResponse(BaseModel):
     """Lista de entrenamientos perdidos"""
     total: int
     missed_workouts: List[MissedWorkoutResponse]
+
+
+class TrainerMissedWorkoutResponse(MissedWorkoutResponse):
+    """Entrenamiento perdido de uno de los clientes del entrenador"""
+    client_id: str
+    client_name: str
+    macrocycle_id: str
+
+
+class TrainerMissedWorkoutsListResponse(BaseModel):
+    """Entrenamientos perdidos de todos los clientes del entrenador (paginado)"""
+    total: int
+    missed_workouts: List[TrainerMissedWorkoutResponse]
+
+
+# =============== Home Bootstrap Schema ===============
+
+class HomeBootstrapResponse(BaseModel):
+    """Todo lo que la app móvil muestra al abrir: equivale a /today, /next, /progress/weekly y /missed"""
+    today: Optional[WorkoutLogResponse] = None
+    next_workout: NextWorkoutResponse
+    weekly_progress: WeeklyProgressResponse
+    missed: MissedWorkoutsListResponse
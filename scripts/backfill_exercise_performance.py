@@ -0,0 +1,34 @@
+"""
+Reconstruye exercise_performance_history y exercise_personal_bests a partir
+de exercise_set_logs.
+
+Uso:
+    python scripts/backfill_exercise_performance.py            # todos los clientes
+    python scripts/backfill_exercise_performance.py <client_id>
+"""
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.base import SessionLocal
+from models import *  # noqa: F403, F401
+from services.exercise_performance import rebuild_exercise_performance
+from services.personal_records import rebuild_personal_bests
+
+
+def backfill(client_id=None):
+    print("Rebuilding exercise performance history and personal bests...")
+    db = SessionLocal()
+    try:
+        rows = rebuild_exercise_performance(db, client_id)
+        bests = rebuild_personal_bests(db, client_id)
+        db.commit()
+        print(f"✓ {rows} (client, exercise, date) rows written")
+        print(f"✓ {bests} personal best rows written")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    backfill(sys.argv[1] if len(sys.argv) > 1 else None)
@@ -0,0 +1,31 @@
+"""
+Reconstruye muscle_workloads (ACWR por músculo) a partir de los workouts
+completados y guarda en cada uno la carga por músculo aplicada.
+
+Uso:
+    python scripts/backfill_muscle_workload.py            # todos los clientes
+    python scripts/backfill_muscle_workload.py <client_id>
+"""
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.base import SessionLocal
+from models import *  # noqa: F403, F401
+from services.muscle_workload import rebuild_muscle_workload
+
+
+def backfill(client_id=None):
+    print("Rebuilding muscle workload (ACWR)...")
+    db = SessionLocal()
+    try:
+        rows = rebuild_muscle_workload(db, client_id)
+        db.commit()
+        print(f"✓ {rows} (client, muscle) rows written")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    backfill(sys.argv[1] if len(sys.argv) > 1 else None)
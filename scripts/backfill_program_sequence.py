@@ -0,0 +1,49 @@
+"""
+Construye program_sequence y los cursores de cliente de los macrociclos
+guardados antes del índice secuencial (las lecturas no lo construyen).
+
+Uso:
+    python scripts/backfill_program_sequence.py                  # macrociclos sin índice
+    python scripts/backfill_program_sequence.py --all            # reconstruir todos
+    python scripts/backfill_program_sequence.py <macrocycle_id>
+"""
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import exists
+
+from models.base import SessionLocal
+from models import *  # noqa: F403, F401
+from models.mesocycle import Macrocycle
+from models.program_sequence import ProgramSequenceEntry
+from services.program_sequence import rebuild_program_sequence
+
+
+def backfill(macrocycle_id=None, rebuild_all=False):
+    print("Building program sequence index...")
+    db = SessionLocal()
+    try:
+        query = db.query(Macrocycle.id)
+        if macrocycle_id:
+            query = query.filter(Macrocycle.id == macrocycle_id)
+        elif not rebuild_all:
+            query = query.filter(~exists().where(ProgramSequenceEntry.macrocycle_id == Macrocycle.id))
+
+        macrocycle_ids = [row.id for row in query.all()]
+        positions = 0
+        for current_id in macrocycle_ids:
+            positions += rebuild_program_sequence(db, current_id)
+        db.commit()
+        print(f"✓ {len(macrocycle_ids)} macrocycles indexed ({positions} positions)")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    arg = sys.argv[1] if len(sys.argv) > 1 else None
+    if arg == "--all":
+        backfill(rebuild_all=True)
+    else:
+        backfill(arg)
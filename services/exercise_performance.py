@@ -0,0 +1,231 @@
+"""
+Servicio de historial de rendimiento por ejercicio.
+
+Mantiene exercise_performance_history (cliente, ejercicio, fecha) de forma
+incremental: al registrar series se agregan en memoria por ejercicio y se
+aplica un solo UPSERT que combina el agregado nuevo con el existente (máximos
+para e1RM y serie más pesada, sumas para series, reps y volume-load).
+"""
+from typing import Dict, Iterable, List, Optional
+from datetime import date, datetime
+from sqlalchemy import func, case
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from models.mesocycle import DayExercise
+from models.workout_log import WorkoutLog, ExerciseSetLog
+from models.exercise_performance import ExercisePerformanceDay
+
+# Filas por sentencia INSERT (límite de parámetros de PostgreSQL)
+UPSERT_CHUNK_SIZE = 1000
+
+
+def estimate_1rm(weight_kg: Optional[float], reps: Optional[int]) -> Optional[float]:
+    """1RM estimado con la fórmula de Epley (None si no hay peso o reps)."""
+    if not weight_kg or not reps or reps <= 0:
+        return None
+    if reps == 1:
+        return round(weight_kg, 2)
+    return round(weight_kg * (1 + reps / 30), 2)
+
+
+def _is_heavier(weight_kg: Optional[float], reps: int, top: dict) -> bool:
+    """True si (weight_kg, reps) supera a la serie más pesada actual (peso, luego reps)."""
+    if top["top_set_weight_kg"] is None:
+        return weight_kg is not None or reps > (top["top_set_reps"] or 0)
+    if weight_kg is None:
+        return False
+    if weight_kg != top["top_set_weight_kg"]:
+        return weight_kg > top["top_set_weight_kg"]
+    return reps > (top["top_set_reps"] or 0)
+
+
+def aggregate_sets(rows: Iterable[tuple]) -> Dict[tuple, dict]:
+    """
+    Agrega series por (client_id, exercise_id, performed_on).
+
+    Args:
+        rows: Tuplas (client_id, exercise_id, performed_on, reps, weight_kg)
+
+    Returns:
+        Dict clave -> fila lista para exercise_performance_history
+    """
+    aggregates: Dict[tuple, dict] = {}
+    for client_id, exercise_id, performed_on, reps, weight_kg in rows:
+        key = (client_id, exercise_id, performed_on)
+        agg = aggregates.get(key)
+        if agg is None:
+            agg = aggregates[key] = {
+                "client_id": client_id,
+                "exercise_id": exercise_id,
+                "performed_on": performed_on,
+                "best_e1rm": None,
+                "top_set_weight_kg": None,
+                "top_set_reps": None,
+                "total_sets": 0,
+                "total_reps": 0,
+                "volume_load": 0.0,
+            }
+
+        reps = reps or 0
+        agg["total_sets"] += 1
+        agg["total_reps"] += reps
+        if weight_kg:
+            agg["volume_load"] += reps * weight_kg
+
+        e1rm = estimate_1rm(weight_kg, reps)
+        if e1rm is not None and (agg["best_e1rm"] is None or e1rm > agg["best_e1rm"]):
+            agg["best_e1rm"] = e1rm
+
+        if _is_heavier(weight_kg, reps, agg):
+            agg["top_set_weight_kg"] = weight_kg
+            agg["top_set_reps"] = reps
+
+    return aggregates
+
+
+def upsert_performance(db: Session, aggregates: Dict[tuple, dict]) -> None:
+    """
+    Combina los agregados con las filas existentes con UPSERT (sin commit).
+
+    Una sentencia por cada UPSERT_CHUNK_SIZE filas; al registrar series es una sola.
+    """
+    if not aggregates:
+        return
+
+    now = datetime.utcnow()
+    values = [dict(agg, updated_at=now) for agg in aggregates.values()]
+    for start in range(0, len(values), UPSERT_CHUNK_SIZE):
+        db.execute(_build_upsert(values[start:start + UPSERT_CHUNK_SIZE]))
+
+
+def _build_upsert(values: List[dict]):
+    table = ExercisePerformanceDay.__table__
+    stmt = pg_insert(table).values(values)
+    excluded = stmt.excluded
+
+    # La serie nueva gana si pesa más, o si pesa lo mismo con más reps
+    new_top_wins = case(
+        (table.c.top_set_weight_kg.is_(None), excluded.top_set_weight_kg.isnot(None)
+            | (excluded.top_set_reps > func.coalesce(table.c.top_set_reps, 0))),
+        (excluded.top_set_weight_kg > table.c.top_set_weight_kg, True),
+        (excluded.top_set_weight_kg == table.c.top_set_weight_kg,
+            excluded.top_set_reps > table.c.top_set_reps),
+        else_=False
+    )
+
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.client_id, table.c.exercise_id, table.c.performed_on],
+        set_={
+            # GREATEST ignora NULL en PostgreSQL
+            "best_e1rm": func.greatest(table.c.best_e1rm, excluded.best_e1rm),
+            "top_set_weight_kg": case(
+                (new_top_wins, excluded.top_set_weight_kg), else_=table.c.top_set_weight_kg
+            ),
+            "top_set_reps": case(
+                (new_top_wins, excluded.top_set_reps), else_=table.c.top_set_reps
+            ),
+            "total_sets": table.c.total_sets + excluded.total_sets,
+            "total_reps": table.c.total_reps + excluded.total_reps,
+            "volume_load": table.c.volume_load + excluded.volume_load,
+            "updated_at": excluded.updated_at,
+        }
+    )
+
+
+def get_exercise_ids(db: Session, set_logs: List[ExerciseSetLog]) -> Dict[str, str]:
+    """day_exercise_id -> exercise_id de las series (una query)."""
+    if not set_logs:
+        return {}
+    return dict(
+        db.query(DayExercise.id, DayExercise.exercise_id).filter(
+            DayExercise.id.in_({s.day_exercise_id for s in set_logs})
+        ).all()
+    )
+
+
+def record_set_performance(
+    db: Session,
+    workout_log: WorkoutLog,
+    set_logs: List[ExerciseSetLog],
+    exercise_ids: Optional[Dict[str, str]] = None
+) -> None:
+    """
+    Suma al historial las series recién registradas de un workout (sin commit).
+
+    Sólo deben pasarse series nuevas: las duplicadas por idempotency_key ya
+    fueron contadas cuando se insertaron.
+
+    Args:
+        db: Sesión de base de datos
+        workout_log: Workout al que pertenecen las series
+        set_logs: Series nuevas
+        exercise_ids: day_exercise_id -> exercise_id (si se omite se consulta en una query)
+    """
+    if not set_logs:
+        return
+
+    if exercise_ids is None:
+        exercise_ids = get_exercise_ids(db, set_logs)
+
+    performed_on = workout_log.started_at.date()
+    upsert_performance(db, aggregate_sets(
+        (workout_log.client_id, exercise_ids[s.day_exercise_id], performed_on, s.reps_completed, s.weight_kg)
+        for s in set_logs
+        if exercise_ids.get(s.day_exercise_id)
+    ))
+
+
+def get_exercise_history(
+    db: Session,
+    client_id: str,
+    exercise_id: str,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None
+) -> List[ExercisePerformanceDay]:
+    """Historial de un ejercicio ordenado por fecha (range scan sobre la PK)."""
+    query = db.query(ExercisePerformanceDay).filter(
+        ExercisePerformanceDay.client_id == client_id,
+        ExercisePerformanceDay.exercise_id == exercise_id
+    )
+    if start_date:
+        query = query.filter(ExercisePerformanceDay.performed_on >= start_date)
+    if end_date:
+        query = query.filter(ExercisePerformanceDay.performed_on <= end_date)
+    return query.order_by(ExercisePerformanceDay.performed_on).all()
+
+
+def rebuild_exercise_performance(db: Session, client_id: Optional[str] = None) -> int:
+    """
+    Reconstruye el historial desde exercise_set_logs (sin commit).
+
+    Para la carga inicial o tras borrar workouts/series, ya que el
+    mantenimiento incremental sólo suma.
+
+    Returns:
+        Número de filas (cliente, ejercicio, fecha) escritas
+    """
+    delete_query = db.query(ExercisePerformanceDay)
+    if client_id:
+        delete_query = delete_query.filter(ExercisePerformanceDay.client_id == client_id)
+    delete_query.delete(synchronize_session=False)
+
+    query = db.query(
+        WorkoutLog.client_id,
+        DayExercise.exercise_id,
+        func.date(WorkoutLog.started_at),
+        ExerciseSetLog.reps_completed,
+        ExerciseSetLog.weight_kg,
+    ).join(
+        WorkoutLog, ExerciseSetLog.workout_log_id == WorkoutLog.id
+    ).join(
+        DayExercise, ExerciseSetLog.day_exercise_id == DayExercise.id
+    ).filter(
+        DayExercise.exercise_id.isnot(None)
+    )
+    if client_id:
+        query = query.filter(WorkoutLog.client_id == client_id)
+
+    aggregates = aggregate_sets(query.yield_per(1000))
+    upsert_performance(db, aggregates)
+    return len(aggregates)
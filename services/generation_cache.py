@@ -0,0 +1,227 @@
+"""
+Caché de resultados de generación con IA direccionada por contenido.
+
+La clave es un hash del AIWorkoutRequest normalizado (sin client_id,
+start_date ni datos que no llegan al prompt), del tipo de generación
+(full/preview), del modelo y flags de generación y de la huella del
+catálogo. Dos cuestionarios equivalentes (un campo que se cambió y se
+restauró, clientes con el mismo perfil) producen la misma clave y el
+programa se sirve sin llamar a la IA; las fechas se recalculan al servirlo.
+
+Almacenamiento: Redis (compartido entre workers, TTL por clave y LRU con un
+sorted set de accesos) con fallback a un LRU en memoria si Redis no está
+disponible.
+"""
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from core.config import settings
+from schemas.ai_generator import AIWorkoutRequest
+
+logger = logging.getLogger(__name__)
+
+# Cambiar al modificar el formato de los resultados guardados
+CACHE_FORMAT_VERSION = 1
+
+# Campos que no afectan al programa generado
+EXCLUDED_REQUEST_FIELDS = {
+    "client_id": True,
+    "template_name": True,
+    "creation_mode": True,
+    "context_version": True,
+    "program_duration": {"start_date"},
+    "patient_context": {"identity", "contact", "context_version"},
+}
+
+# Tras un error de Redis se usa sólo memoria durante este tiempo
+REDIS_RETRY_SECONDS = 60
+
+
+def generation_cache_key(
+    request: AIWorkoutRequest,
+    catalog_fingerprint: str,
+    kind: str,
+    model: str
+) -> str:
+    """Hash estable del request normalizado y de todo lo que cambia la salida."""
+    payload = {
+        "format": CACHE_FORMAT_VERSION,
+        "kind": kind,
+        "model": model,
+        "catalog": catalog_fingerprint,
+        "flags": [
+            settings.AI_USE_PROMPT_CACHING,
+            settings.AI_USE_COMPRESSED_OUTPUT,
+            settings.AI_FILTER_CATALOG,
+            settings.AI_USE_PHASED_GENERATION,
+        ],
+        "request": request.model_dump(
+            mode="json", exclude=EXCLUDED_REQUEST_FIELDS, exclude_none=True
+        ),
+    }
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class MemoryLRUCache:
+    """LRU con TTL en memoria del proceso."""
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RedisLRUCache:
+    """
+    LRU con TTL en Redis.
+
+    Cada resultado es una clave con SETEX; el sorted set `index_key` guarda el
+    último acceso de cada una para desalojar las menos usadas al superar
+    max_entries.
+    """
+
+    KEY_PREFIX = "ai_generation:"
+    INDEX_KEY = "ai_generation:lru"
+
+    def __init__(self, url: str, max_entries: int, ttl_seconds: int):
+        import redis
+        self._redis = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+    def get(self, key: str) -> Optional[str]:
+        raw = self._redis.get(self.KEY_PREFIX + key)
+        if raw is None:
+            return None
+        self._redis.zadd(self.INDEX_KEY, {key: time.time()})
+        return raw.decode("utf-8")
+
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        pipe = self._redis.pipeline()
+        pipe.setex(self.KEY_PREFIX + key, self.ttl_seconds, value)
+        pipe.zadd(self.INDEX_KEY, {key: now})
+        # Entradas sin acceso en todo el TTL ya expiraron
+        pipe.zremrangebyscore(self.INDEX_KEY, "-inf", now - self.ttl_seconds)
+        pipe.zcard(self.INDEX_KEY)
+        size = pipe.execute()[-1]
+
+        excess = size - self.max_entries
+        if excess > 0:
+            evicted = self._redis.zrange(self.INDEX_KEY, 0, excess - 1)
+            if evicted:
+                pipe = self._redis.pipeline()
+                pipe.delete(*(self.KEY_PREFIX + member.decode("utf-8") for member in evicted))
+                pipe.zrem(self.INDEX_KEY, *evicted)
+                pipe.execute()
+
+    def __len__(self) -> int:
+        return self._redis.zcard(self.INDEX_KEY)
+
+
+class GenerationCache:
+    """Resultados de generación (AIWorkoutResponse serializado) por clave."""
+
+    def __init__(self):
+        self._memory = MemoryLRUCache(
+            settings.AI_GENERATION_CACHE_MAX_ENTRIES, settings.AI_GENERATION_CACHE_TTL_SECONDS
+        )
+        self._redis: Optional[RedisLRUCache] = None
+        self._redis_retry_at = 0.0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._stores = 0
+
+        if settings.AI_GENERATION_CACHE_USE_REDIS:
+            try:
+                self._redis = RedisLRUCache(
+                    settings.REDIS_URL,
+                    settings.AI_GENERATION_CACHE_MAX_ENTRIES,
+                    settings.AI_GENERATION_CACHE_TTL_SECONDS
+                )
+            except ImportError:
+                logger.warning("redis no está instalado, caché de generación sólo en memoria")
+
+    def _backend(self):
+        if self._redis is not None and time.monotonic() >= self._redis_retry_at:
+            return self._redis
+        return self._memory
+
+    def _call(self, method: str, *args):
+        backend = self._backend()
+        try:
+            return getattr(backend, method)(*args)
+        except Exception as e:
+            if backend is self._memory:
+                raise
+            logger.warning(f"Redis no disponible para la caché de generación, usando memoria: {e}")
+            self._redis_retry_at = time.monotonic() + REDIS_RETRY_SECONDS
+            return getattr(self._memory, method)(*args)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        if not settings.AI_GENERATION_CACHE_ENABLED:
+            return None
+        raw = self._call("get", key)
+        with self._lock:
+            if raw is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key: str, result: Dict[str, Any]) -> None:
+        if not settings.AI_GENERATION_CACHE_ENABLED:
+            return
+        self._call("set", key, json.dumps(result, ensure_ascii=False, default=str))
+        with self._lock:
+            self._stores += 1
+
+    def stats(self) -> Dict[str, Any]:
+        backend = self._backend()
+        try:
+            entries = len(backend)
+        except Exception:
+            entries = None
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "enabled": settings.AI_GENERATION_CACHE_ENABLED,
+                "backend": "redis" if backend is self._redis else "memory",
+                "entries": entries,
+                "hits": self._hits,
+                "misses": self._misses,
+                "stores": self._stores,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else None,
+            }
+
+
+generation_cache = GenerationCache()
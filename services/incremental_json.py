@@ -0,0 +1,87 @@
+"""
+Parser JSON incremental para respuestas en streaming de la IA.
+
+La IA devuelve un único documento JSON (comprimido o completo) que llega en
+fragmentos. StreamingObjectExtractor recorre cada fragmento una sola vez,
+siguiendo strings, escapes y la pila de objetos/arreglos, y devuelve cada
+objeto en cuanto se cierra si su arreglo contenedor tiene una de las claves
+buscadas (p. ej. "td" / "training_days" → un día de entrenamiento).
+
+No valida el documento completo: el resultado final se sigue parseando con
+AIWorkoutGenerator._parse_response sobre el texto acumulado.
+"""
+import json
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+class StreamingObjectExtractor:
+    """
+    Extrae objetos completos de los arreglos con clave en `array_keys`.
+
+    Texto previo al primer "{" (p. ej. un bloque ```json) se ignora.
+    """
+
+    def __init__(self, array_keys: Iterable[str]):
+        self.array_keys = frozenset(array_keys)
+        self.text = ""  # Texto acumulado (también sirve para el parseo final)
+        self._pos = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string: Optional[str] = None
+        self._key: Optional[str] = None  # Clave del próximo valor
+        # (tipo de contenedor, clave, posición de inicio)
+        self._stack: List[Tuple[str, Optional[str], int]] = []
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """Agrega un fragmento y devuelve los objetos que se completaron."""
+        self.text += chunk
+        completed = []
+        text = self.text
+
+        for pos in range(self._pos, len(text)):
+            char = text[pos]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    self._last_string = text[self._string_start:pos + 1]
+                continue
+
+            if not self._stack and char != "{":
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = pos
+            elif char == ":":
+                self._key = self._decode_key(self._last_string)
+            elif char == ",":
+                self._key = None
+            elif char in "{[":
+                self._stack.append((char, self._key, pos))
+                self._key = None
+            elif char in "}]" and self._stack:
+                kind, _, start = self._stack.pop()
+                parent = self._stack[-1] if self._stack else None
+                if kind == "{" and parent and parent[0] == "[" and parent[1] in self.array_keys:
+                    try:
+                        completed.append(json.loads(text[start:pos + 1]))
+                    except json.JSONDecodeError:
+                        pass  # Objeto malformado: lo resolverá el parseo final
+
+        self._pos = len(text)
+        return completed
+
+    @staticmethod
+    def _decode_key(raw: Optional[str]) -> Optional[str]:
+        if raw is None:
+            return None
+        try:
+            return json.loads(raw)
+        except json.JSONDecodeError:
+            return None
@@ -0,0 +1,234 @@
+"""
+Cliente compartido de Anthropic y control de concurrencia hacia la IA.
+
+- Un único AsyncAnthropic por proceso (creado/cerrado en el lifespan de la
+  app) con pool de conexiones keep-alive, en lugar de un cliente y un pool
+  nuevos por request.
+- Un límite global de llamadas simultáneas (AI_MAX_CONCURRENT_REQUESTS) con
+  cola de prioridad: las previews pasan antes que las generaciones completas
+  y, a igual prioridad, se respeta el orden de llegada.
+- Reintentos con backoff exponencial ante 429 / 529 (respetando retry-after),
+  liberando el cupo mientras se espera.
+
+Cliente y limitador pertenecen al event loop en que se crearon; si cambia
+(p. ej. un worker de Celery que usa asyncio.run por tarea) se recrean.
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+import sys
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import httpx
+from anthropic import AsyncAnthropic, APIStatusError, RateLimitError
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Pool HTTP del cliente compartido
+HTTP_MAX_CONNECTIONS = 20
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 10
+HTTP_KEEPALIVE_EXPIRY = 60.0
+
+# Límite de espera por reintento (segundos)
+MAX_BACKOFF_SECONDS = 60.0
+
+# 529: overloaded_error de Anthropic, se trata igual que un 429
+RETRYABLE_STATUS_CODES = {429, 529}
+
+
+class LLMPriority(IntEnum):
+    """Prioridad en la cola de llamadas (menor valor = antes)."""
+    PREVIEW = 0
+    GENERATION = 1
+
+
+class PriorityLimiter:
+    """
+    Semáforo con cola de prioridad.
+
+    Cuando hay un cupo libre se entrega directamente al primer waiter de la
+    cola (prioridad, orden de llegada), así una generación que llega después
+    no puede adelantarse a una preview que ya esperaba.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._active = 0
+        self._queue: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+
+    async def acquire(self, priority: int) -> None:
+        if self._active < self.limit and not self._queue:
+            self._active += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, next(self._sequence), waiter))
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Ya se le había transferido el cupo: devolverlo
+                self.release()
+            raise
+
+    def release(self) -> None:
+        while self._queue:
+            _, _, waiter = heapq.heappop(self._queue)
+            if not waiter.done():
+                # El cupo pasa al siguiente sin decrementar _active
+                waiter.set_result(None)
+                return
+        self._active -= 1
+
+    @asynccontextmanager
+    async def slot(self, priority: int) -> AsyncIterator[None]:
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> Dict[str, Any]:
+        waiting = [priority for priority, _, waiter in self._queue if not waiter.done()]
+        return {
+            "limit": self.limit,
+            "active": self._active,
+            "queued": len(waiting),
+            "queued_previews": sum(1 for priority in waiting if priority == LLMPriority.PREVIEW),
+        }
+
+
+_client: Optional[AsyncAnthropic] = None
+_limiter: Optional[PriorityLimiter] = None
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _ensure_loop_state() -> None:
+    """
+    Crea cliente y limitador para el event loop actual si hace falta.
+
+    Quien crea un event loop (lifespan de la API, tarea de Celery) debe llamar
+    a close_anthropic_client() antes de cerrarlo: el pool httpx de un loop
+    ya cerrado no se puede cerrar desde otro.
+    """
+    global _client, _limiter, _loop
+    loop = asyncio.get_running_loop()
+    if _loop is loop and _client is not None:
+        return
+    if _client is not None:
+        logger.warning("Cliente de la IA de otro event loop sin cerrar; se descarta")
+
+    if not settings.ANTHROPIC_API_KEY:
+        raise ValueError("ANTHROPIC_API_KEY no está configurada")
+
+    # El SDK no reintenta: los 429 los maneja call_with_backoff con la cola
+    _client = AsyncAnthropic(
+        api_key=settings.ANTHROPIC_API_KEY,
+        max_retries=0,
+        http_client=httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(300.0, connect=10.0),
+        ),
+    )
+    _limiter = PriorityLimiter(settings.AI_MAX_CONCURRENT_REQUESTS)
+    _loop = loop
+
+
+def get_anthropic_client() -> AsyncAnthropic:
+    """Cliente compartido (debe llamarse dentro del event loop)."""
+    _ensure_loop_state()
+    return _client
+
+
+def get_llm_limiter() -> PriorityLimiter:
+    _ensure_loop_state()
+    return _limiter
+
+
+async def close_anthropic_client() -> None:
+    """Cierra el pool de conexiones (shutdown del lifespan, fin de una tarea de Celery)."""
+    global _client, _limiter, _loop
+    if _client is not None:
+        await _client.close()
+    _client = _limiter = _loop = None
+
+
+def llm_concurrency_stats() -> Optional[Dict[str, Any]]:
+    return _limiter.stats() if _limiter is not None else None
+
+
+def _retry_delay(error: APIStatusError, attempt: int) -> Optional[float]:
+    """Segundos a esperar antes de reintentar, o None si no es reintentable."""
+    if not isinstance(error, RateLimitError) and error.status_code not in RETRYABLE_STATUS_CODES:
+        return None
+    if attempt >= settings.AI_RATE_LIMIT_MAX_RETRIES:
+        return None
+
+    retry_after = error.response.headers.get("retry-after") if error.response is not None else None
+    try:
+        delay = float(retry_after)
+    except (TypeError, ValueError):
+        delay = settings.AI_RATE_LIMIT_BASE_DELAY * 2 ** attempt
+    # Jitter para que los requests en cola no reintenten todos a la vez
+    return min(delay, MAX_BACKOFF_SECONDS) * random.uniform(1.0, 1.25)
+
+
+async def create_message(priority: int = LLMPriority.GENERATION, **params):
+    """messages.create con cupo de concurrencia y backoff ante 429."""
+    client = get_anthropic_client()
+    limiter = get_llm_limiter()
+
+    for attempt in itertools.count():
+        async with limiter.slot(priority):
+            try:
+                return await client.messages.create(**params)
+            except APIStatusError as e:
+                delay = _retry_delay(e, attempt)
+                if delay is None:
+                    raise
+        logger.warning(f"Rate limit de la IA (intento {attempt + 1}), reintentando en {delay:.1f}s")
+        await asyncio.sleep(delay)
+
+
+@asynccontextmanager
+async def stream_message(priority: int = LLMPriority.GENERATION, **params):
+    """
+    messages.stream con cupo de concurrencia y backoff ante 429.
+
+    Sólo se reintenta la apertura del stream (antes de recibir texto); el
+    cupo se mantiene hasta cerrar el stream.
+    """
+    client = get_anthropic_client()
+    limiter = get_llm_limiter()
+
+    for attempt in itertools.count():
+        async with limiter.slot(priority):
+            manager = client.messages.stream(**params)
+            try:
+                stream = await manager.__aenter__()
+            except APIStatusError as e:
+                delay = _retry_delay(e, attempt)
+                if delay is None:
+                    raise
+            else:
+                try:
+                    yield stream
+                except BaseException:
+                    if not await manager.__aexit__(*sys.exc_info()):
+                        raise
+                else:
+                    await manager.__aexit__(None, None, None)
+                return
+        logger.warning(f"Rate limit de la IA (intento {attempt + 1}), reintentando en {delay:.1f}s")
+        await asyncio.sleep(delay)
@@ -0,0 +1,220 @@
+"""
+Telemetría de llamadas a la IA (tabla llm_call_logs).
+
+AIWorkoutGenerator registra cada llamada de una generación en un
+GenerationTelemetry (fase, tokens, latencia, stop_reason, si se pudo
+parsear) y las persiste juntas al terminar; finalize_generated_program
+completa después el número de ejercicios remapeados.
+
+Persistir nunca debe romper una generación: los errores sólo se registran
+en el log.
+"""
+import logging
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from models.base import SessionLocal
+from models.llm_call_log import LLMCallLog
+from schemas.ai_generator import AIWorkoutRequest
+
+logger = logging.getLogger(__name__)
+
+STATS_PERCENTILES = (0.5, 0.9, 0.99)
+
+
+def prompt_chars(params: Dict[str, Any]) -> int:
+    """Caracteres de prompt (system + mensajes) de una llamada."""
+    total = len(params.get("system") or "")
+    for message in params.get("messages", []):
+        content = message.get("content")
+        if isinstance(content, str):
+            total += len(content)
+        else:
+            total += sum(len(block.get("text", "")) for block in content or [])
+    return total
+
+
+class GenerationTelemetry:
+    """Llamadas a la IA de una generación, pendientes de persistir."""
+
+    def __init__(
+        self,
+        request: AIWorkoutRequest,
+        model: str,
+        mode: str,
+        compressed: bool,
+        streamed: bool = False
+    ):
+        self.generation_id = uuid.uuid4().hex
+        self.calls: List[Dict[str, Any]] = []
+        self._shared = {
+            "generation_id": self.generation_id,
+            "model": model,
+            "mode": mode,
+            "compressed": compressed,
+            "streamed": streamed,
+            "total_weeks": request.program_duration.total_weeks,
+            "days_per_week": request.availability.days_per_week,
+        }
+
+    def record(
+        self,
+        phase: str,
+        params: Dict[str, Any],
+        tokens: Dict[str, int],
+        started_at: float,
+        stop_reason: Optional[str],
+        parse_success: bool
+    ) -> None:
+        """
+        Registra una llamada.
+
+        Args:
+            tokens: Tokens de la llamada (PromptCacheUsage.record)
+            started_at: time.monotonic() al iniciar la llamada
+        """
+        read = tokens["cache_read_input_tokens"]
+        prompt_tokens = tokens["input_tokens"] + read + tokens["cache_creation_input_tokens"]
+        self.calls.append(dict(
+            self._shared,
+            phase=phase,
+            prompt_chars=prompt_chars(params),
+            max_tokens=params.get("max_tokens", 0),
+            input_tokens=tokens["input_tokens"],
+            output_tokens=tokens["output_tokens"],
+            cache_read_tokens=read,
+            cache_creation_tokens=tokens["cache_creation_input_tokens"],
+            cache_hit_ratio=round(read / prompt_tokens, 4) if prompt_tokens else None,
+            latency_ms=int((time.monotonic() - started_at) * 1000),
+            stop_reason=stop_reason,
+            parse_success=parse_success,
+            created_at=datetime.utcnow(),
+        ))
+
+    def persist(self) -> None:
+        """Inserta las llamadas registradas (una sola sentencia)."""
+        if not self.calls:
+            return
+        db = SessionLocal()
+        try:
+            db.execute(LLMCallLog.__table__.insert(), self.calls)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"No se pudo guardar la telemetría de la IA: {e}")
+        finally:
+            db.close()
+
+
+def record_remap_count(generation_id: str, remap_count: int) -> None:
+    """Guarda cuántos ejercicios remapeó ExerciseMapper en una generación."""
+    db = SessionLocal()
+    try:
+        db.query(LLMCallLog).filter(
+            LLMCallLog.generation_id == generation_id
+        ).update({LLMCallLog.remap_count: remap_count}, synchronize_session=False)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.warning(f"No se pudo guardar remap_count de la generación {generation_id}: {e}")
+    finally:
+        db.close()
+
+
+def _percentiles(column) -> list:
+    return [func.percentile_cont(p).within_group(column) for p in STATS_PERCENTILES]
+
+
+def _percentile_dict(values) -> Dict[str, Optional[float]]:
+    return {
+        f"p{int(p * 100)}": round(value, 1) if value is not None else None
+        for p, value in zip(STATS_PERCENTILES, values)
+    }
+
+
+def fetch_llm_stats(db: Session, days: int, phase: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Estadísticas por (fase, modelo, modo) de las llamadas de los últimos `days` días.
+
+    Percentiles de latencia y tokens, ratio de cache, tasa de parseo, tasa de
+    truncado por max_tokens y remapeos por generación. generation_llm_time_ms
+    es el tiempo de espera de la IA por generación (camino crítico: las
+    progresiones en paralelo cuentan una vez).
+    """
+    since = datetime.utcnow() - timedelta(days=days)
+    n = len(STATS_PERCENTILES)
+
+    query = db.query(
+        LLMCallLog.phase,
+        LLMCallLog.model,
+        LLMCallLog.mode,
+        func.count(LLMCallLog.id),
+        *_percentiles(LLMCallLog.latency_ms),
+        *_percentiles(LLMCallLog.output_tokens),
+        *_percentiles(LLMCallLog.prompt_chars),
+        func.avg(LLMCallLog.input_tokens),
+        func.avg(LLMCallLog.cache_hit_ratio),
+        func.avg(case((LLMCallLog.parse_success, 1), else_=0)),
+        func.avg(case((LLMCallLog.stop_reason == "max_tokens", 1), else_=0)),
+        func.avg(LLMCallLog.output_tokens * 1.0 / func.nullif(LLMCallLog.max_tokens, 0)),
+    ).filter(LLMCallLog.created_at >= since)
+    if phase:
+        query = query.filter(LLMCallLog.phase == phase)
+
+    phases = []
+    for row in query.group_by(LLMCallLog.phase, LLMCallLog.model, LLMCallLog.mode).order_by(LLMCallLog.phase):
+        phase_name, model, mode, calls = row[:4]
+        values = row[4:]
+        latency, output_tokens, chars = values[:n], values[n:2 * n], values[2 * n:3 * n]
+        avg_input, cache_ratio, parse_rate, truncated_rate, max_tokens_usage = values[3 * n:]
+        phases.append({
+            "phase": phase_name,
+            "model": model,
+            "mode": mode,
+            "calls": calls,
+            "latency_ms": _percentile_dict(latency),
+            "output_tokens": _percentile_dict(output_tokens),
+            "prompt_chars": _percentile_dict(chars),
+            "avg_input_tokens": round(float(avg_input), 1) if avg_input is not None else None,
+            "avg_cache_hit_ratio": round(float(cache_ratio), 4) if cache_ratio is not None else None,
+            "parse_success_rate": round(float(parse_rate), 4),
+            "truncated_rate": round(float(truncated_rate), 4),
+            "avg_max_tokens_usage": round(float(max_tokens_usage), 4) if max_tokens_usage is not None else None,
+        })
+
+    # Por generación: tiempo en la IA y remapeos. Las progresiones corren en
+    # paralelo, así que cuenta la más lenta, no la suma: semana base (u otras
+    # fases secuenciales) + max(progresión)
+    is_progression = LLMCallLog.phase == "progression"
+    generations = db.query(
+        LLMCallLog.generation_id,
+        (
+            func.coalesce(func.sum(case((is_progression, 0), else_=LLMCallLog.latency_ms)), 0)
+            + func.coalesce(func.max(case((is_progression, LLMCallLog.latency_ms))), 0)
+        ).label("latency_ms"),
+        func.max(LLMCallLog.remap_count).label("remap_count"),
+    ).filter(LLMCallLog.created_at >= since)
+    if phase:
+        generations = generations.filter(LLMCallLog.phase == phase)
+    generations = generations.group_by(LLMCallLog.generation_id).subquery()
+
+    totals = db.query(
+        func.count(generations.c.generation_id),
+        *_percentiles(generations.c.latency_ms),
+        *_percentiles(generations.c.remap_count),
+        func.avg(generations.c.remap_count),
+    ).one()
+
+    return {
+        "days": days,
+        "generations": totals[0],
+        "generation_llm_time_ms": _percentile_dict(totals[1:1 + n]),
+        "remap_count": _percentile_dict(totals[1 + n:1 + 2 * n]),
+        "avg_remap_count": round(float(totals[-1]), 2) if totals[-1] is not None else None,
+        "phases": phases,
+    }
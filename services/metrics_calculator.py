@@ -2,7 +2,8 @@
 Metrics calculator service for training volume calculations.
 Centralizes the logic for calculating muscle volume, effective sets, etc.
 """
-from typing import List, Dict, Any
+from typing import List, Dict, Iterable, Literal, Optional
+from datetime import date
 from pydantic import BaseModel
 
 
@@ -28,6 +29,12 @@ MUSCLE_GROUP_LABELS: Dict[str, str] = {
 }
 
 
+# Umbrales de intensidad efectiva (compartidos con el motor vectorizado)
+EFFECTIVE_RIR_MAX = 3
+EFFECTIVE_RPE_MIN = 7
+EFFECTIVE_PERCENTAGE_MIN = 65
+
+
 class MuscleVolumeItem(BaseModel):
     """Schema for individual muscle volume data."""
     muscle_name: str
@@ -44,6 +51,69 @@ class MuscleVolumeResponse(BaseModel):
     muscles: List[MuscleVolumeItem]
 
 
+class VolumeTargets(BaseModel):
+    """Weekly sets-per-muscle target range (get_volume_recommendations)."""
+    goal: str
+    level: str
+    min_sets_per_muscle: int
+    max_sets_per_muscle: int
+
+
+class MuscleVolumeTargetItem(MuscleVolumeItem):
+    """Muscle volume compared against the weekly target range."""
+    target_status: Literal["below", "within", "above"]
+
+
+class WeeklyMuscleVolume(BaseModel):
+    """Muscle volume of one microcycle (week)."""
+    microcycle_id: str
+    block_number: int
+    week_number: int
+    total_effective_sets: float
+    total_sets: float
+    muscles: List[MuscleVolumeTargetItem]
+
+
+class PeriodMuscleVolumeResponse(BaseModel):
+    """Schema for microcycle / mesocycle / macrocycle muscle volume endpoints."""
+    scope: Literal["microcycle", "mesocycle", "macrocycle"]
+    scope_id: str
+    targets: VolumeTargets
+    weeks: List[WeeklyMuscleVolume]
+    weekly_average: List[MuscleVolumeTargetItem]  # Promedio semanal del periodo
+
+
+class MuscleVolumeComparisonItem(BaseModel):
+    """Planned vs performed volume of one muscle."""
+    muscle_name: str
+    display_name: str
+    planned_sets: float
+    performed_sets: float
+    planned_effective_sets: float
+    performed_effective_sets: float
+    sets_diff: float  # performed - planned
+    completion_percentage: Optional[float] = None  # null si no había series planeadas
+    volume_load: float  # Σ reps × kg realizados
+
+
+class WeeklyVolumeComparison(BaseModel):
+    """Planned vs performed volume of one microcycle (week)."""
+    microcycle_id: str
+    week_start: date
+    block_number: int
+    week_number: int
+    muscles: List[MuscleVolumeComparisonItem]
+
+
+class VolumeComparisonResponse(BaseModel):
+    """Schema for the planned-vs-performed volume endpoint."""
+    client_id: str
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    weeks: List[WeeklyVolumeComparison]
+    totals: List[MuscleVolumeComparisonItem]  # Suma del periodo
+
+
 def is_effective_intensity(effort_type: str, effort_value: float) -> bool:
     """
     Determina si un ejercicio tiene la intensidad suficiente para ser "efectivo".
@@ -58,79 +128,94 @@ def is_effective_intensity(effort_type: str, effort_value: float) -> bool:
         True si la intensidad es efectiva para hipertrofia
     """
     if effort_type == "RIR":
-        return effort_value <= 3
+        return effort_value <= EFFECTIVE_RIR_MAX
     elif effort_type == "RPE":
-        return effort_value >= 7
+        return effort_value >= EFFECTIVE_RPE_MIN
     elif effort_type == "percentage":
-        return effort_value >= 65
+        return effort_value >= EFFECTIVE_PERCENTAGE_MIN
     return True  # Por defecto asumimos que es efectivo
 
 
-def calculate_muscle_volume(training_day, count_secondary: bool = True) -> MuscleVolumeResponse:
+def muscle_volume_items(
+    muscle_names: List[str],
+    total_sets: Iterable[float],
+    effective_sets: Iterable[float]
+) -> List[MuscleVolumeItem]:
     """
-    Calcula el volumen por grupo muscular para un día de entrenamiento.
-
-    Args:
-        training_day: SQLAlchemy TrainingDay object with exercises relationship loaded
-        count_secondary: If True, secondary muscles contribute 0.5x. If False, 0x.
-
-    Returns:
-        MuscleVolumeResponse with muscle volume breakdown
+    Convierte vectores de volumen (uno por músculo) en MuscleVolumeItem,
+    omitiendo músculos sin volumen y ordenando por series efectivas.
     """
-    volume_map: Dict[str, Dict[str, float]] = {}
-    secondary_multiplier = 0.5 if count_secondary else 0
-
-    for day_ex in training_day.exercises:
-        # Skip warmup exercises for volume calculation
-        if day_ex.phase and day_ex.phase.value == "warmup":
-            continue
-
-        exercise = day_ex.exercise
-        if not exercise:
-            continue
-
-        # Calculate effective sets based on intensity
-        effort_type = day_ex.effort_type.value if day_ex.effort_type else "RIR"
-        effective_sets = day_ex.sets if is_effective_intensity(
-            effort_type, day_ex.effort_value
-        ) else 0
-
-        # Process primary muscles (1x contribution)
-        for em in exercise.exercise_muscles:
-            if em.muscle_role == "primary":
-                muscle_name = em.muscle.name
-                if muscle_name not in volume_map:
-                    volume_map[muscle_name] = {"effective": 0, "total": 0}
-                volume_map[muscle_name]["effective"] += effective_sets
-                volume_map[muscle_name]["total"] += day_ex.sets
-
-        # Process secondary muscles (configurable contribution)
-        if secondary_multiplier > 0:
-            for em in exercise.exercise_muscles:
-                if em.muscle_role == "secondary":
-                    muscle_name = em.muscle.name
-                    if muscle_name not in volume_map:
-                        volume_map[muscle_name] = {"effective": 0, "total": 0}
-                    volume_map[muscle_name]["effective"] += effective_sets * secondary_multiplier
-                    volume_map[muscle_name]["total"] += day_ex.sets * secondary_multiplier
-
-    # Convert to list of MuscleVolumeItem
     muscles = [
         MuscleVolumeItem(
             muscle_name=name,
             display_name=MUSCLE_GROUP_LABELS.get(name, name.replace("_", " ").title()),
-            effective_sets=round(data["effective"], 1),
-            total_sets=round(data["total"], 1)
+            effective_sets=round(float(effective), 1),
+            total_sets=round(float(total), 1)
         )
-        for name, data in volume_map.items()
+        for name, total, effective in zip(muscle_names, total_sets, effective_sets)
+        if total > 0
     ]
 
     # Sort by effective sets descending
     muscles.sort(key=lambda x: x.effective_sets, reverse=True)
+    return muscles
+
+
+def target_status(total_sets: float, targets: VolumeTargets) -> str:
+    """Compara las series semanales de un músculo con el rango recomendado."""
+    if total_sets < targets.min_sets_per_muscle:
+        return "below"
+    if total_sets > targets.max_sets_per_muscle:
+        return "above"
+    return "within"
+
+
+def muscle_volume_target_items(
+    muscle_names: List[str],
+    total_sets: Iterable[float],
+    effective_sets: Iterable[float],
+    targets: VolumeTargets
+) -> List[MuscleVolumeTargetItem]:
+    """muscle_volume_items con el estado frente al rango recomendado."""
+    return [
+        MuscleVolumeTargetItem(
+            **item.model_dump(),
+            target_status=target_status(item.total_sets, targets)
+        )
+        for item in muscle_volume_items(muscle_names, total_sets, effective_sets)
+    ]
 
-    return MuscleVolumeResponse(
-        training_day_id=training_day.id,
-        training_day_name=training_day.name or f"Día {training_day.day_number}",
-        total_effective_sets=round(sum(m.effective_sets for m in muscles), 1),
-        muscles=muscles
-    )
+
+def muscle_volume_comparison_items(
+    muscle_names: List[str],
+    planned_sets: Iterable[float],
+    performed_sets: Iterable[float],
+    planned_effective_sets: Iterable[float],
+    performed_effective_sets: Iterable[float],
+    volume_load: Iterable[float]
+) -> List[MuscleVolumeComparisonItem]:
+    """
+    Une vectores planeado/realizado (uno por músculo) en items lado a lado,
+    omitiendo músculos sin volumen y ordenando por series planeadas.
+    """
+    items = []
+    for name, planned, performed, planned_eff, performed_eff, load in zip(
+        muscle_names, planned_sets, performed_sets, planned_effective_sets,
+        performed_effective_sets, volume_load
+    ):
+        if planned <= 0 and performed <= 0:
+            continue
+        items.append(MuscleVolumeComparisonItem(
+            muscle_name=name,
+            display_name=MUSCLE_GROUP_LABELS.get(name, name.replace("_", " ").title()),
+            planned_sets=round(float(planned), 1),
+            performed_sets=round(float(performed), 1),
+            planned_effective_sets=round(float(planned_eff), 1),
+            performed_effective_sets=round(float(performed_eff), 1),
+            sets_diff=round(float(performed - planned), 1),
+            completion_percentage=round(float(performed / planned) * 100, 1) if planned > 0 else None,
+            volume_load=round(float(load), 1)
+        ))
+
+    items.sort(key=lambda x: x.planned_sets, reverse=True)
+    return items
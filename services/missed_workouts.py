@@ -0,0 +1,151 @@
+"""
+Servicio de entrenamientos perdidos.
+
+Clasifica los training days pasados (never_started / abandoned / en progreso
+vencido) con una sola query: DISTINCT ON obtiene el WorkoutLog más reciente de
+cada (cliente, training day) y un anti-join descarta los completados. Sirve
+tanto para un cliente como para todos los clientes de un entrenador.
+"""
+from typing import List, Optional, Tuple
+from datetime import date, timedelta
+from sqlalchemy import select, func, case, and_, or_
+from sqlalchemy.orm import Session
+
+from models.mesocycle import Macrocycle, Mesocycle, Microcycle, TrainingDay, MesocycleStatus
+from models.user import User
+from models.workout_log import WorkoutLog, WorkoutStatus
+
+
+def fetch_missed_workouts(
+    db: Session,
+    days_back: int,
+    client_id: Optional[str] = None,
+    trainer_id: Optional[str] = None,
+    macrocycle_id: Optional[str] = None,
+    skip: int = 0,
+    limit: Optional[int] = None,
+    today: Optional[date] = None
+) -> Tuple[int, List[dict]]:
+    """
+    Obtiene los entrenamientos perdidos de los macrociclos activos.
+
+    Un entrenamiento se considera perdido si la fecha del TrainingDay ya pasó,
+    no es día de descanso y su WorkoutLog más reciente no existe (never_started),
+    fue abandonado o quedó en progreso (ambos se reportan como abandoned).
+
+    Args:
+        db: Sesión de base de datos
+        days_back: Días hacia atrás a revisar
+        client_id: Limitar a un cliente
+        trainer_id: Limitar a los clientes de un entrenador
+        macrocycle_id: Limitar a un macrociclo ya resuelto (evita buscarlo por cliente)
+        skip / limit: Paginación (el total se calcula en la misma query)
+        today: Fecha de referencia (default: hoy)
+
+    Returns:
+        (total, filas) con training_day_id, training_day_name, scheduled_date,
+        client_id, client_name, macrocycle_id, status y abandon_reason,
+        ordenadas por fecha más reciente primero
+    """
+    today = today or date.today()
+    cutoff_date = today - timedelta(days=days_back)
+
+    past_days = select(
+        TrainingDay.id.label("training_day_id"),
+        TrainingDay.name.label("training_day_name"),
+        TrainingDay.date.label("scheduled_date"),
+        Macrocycle.id.label("macrocycle_id"),
+        Macrocycle.client_id.label("client_id"),
+    ).join(
+        Microcycle, TrainingDay.microcycle_id == Microcycle.id
+    ).join(
+        Mesocycle, Microcycle.mesocycle_id == Mesocycle.id
+    ).join(
+        Macrocycle, Mesocycle.macrocycle_id == Macrocycle.id
+    ).where(
+        Macrocycle.status == MesocycleStatus.ACTIVE,
+        Macrocycle.client_id.isnot(None),
+        TrainingDay.rest_day == False,
+        TrainingDay.date < today,
+        TrainingDay.date >= cutoff_date
+    )
+    if client_id:
+        past_days = past_days.where(Macrocycle.client_id == client_id)
+    if trainer_id:
+        past_days = past_days.where(Macrocycle.trainer_id == trainer_id)
+    if macrocycle_id:
+        past_days = past_days.where(Macrocycle.id == macrocycle_id)
+    past_days = past_days.cte("past_days")
+
+    # WorkoutLog más reciente por (cliente, training day), sólo de los días candidatos
+    latest_log = select(
+        WorkoutLog.client_id,
+        WorkoutLog.training_day_id,
+        WorkoutLog.status,
+        WorkoutLog.abandon_reason,
+    ).distinct(
+        WorkoutLog.client_id, WorkoutLog.training_day_id
+    ).where(
+        WorkoutLog.training_day_id.in_(select(past_days.c.training_day_id))
+    ).order_by(
+        WorkoutLog.client_id,
+        WorkoutLog.training_day_id,
+        WorkoutLog.started_at.desc()
+    ).subquery("latest_log")
+
+    status_label = case(
+        (latest_log.c.status.is_(None), "never_started"),
+        else_="abandoned"
+    )
+    abandon_reason = case(
+        (latest_log.c.status == WorkoutStatus.ABANDONED.value, latest_log.c.abandon_reason),
+        else_=None
+    )
+
+    query = select(
+        past_days.c.training_day_id,
+        past_days.c.training_day_name,
+        past_days.c.scheduled_date,
+        past_days.c.macrocycle_id,
+        past_days.c.client_id,
+        User.full_name.label("client_name"),
+        status_label.label("status"),
+        abandon_reason.label("abandon_reason"),
+        func.count().over().label("total"),
+    ).select_from(
+        past_days
+    ).join(
+        User, User.id == past_days.c.client_id
+    ).outerjoin(
+        latest_log,
+        and_(
+            latest_log.c.training_day_id == past_days.c.training_day_id,
+            latest_log.c.client_id == past_days.c.client_id
+        )
+    ).where(
+        or_(
+            latest_log.c.status.is_(None),
+            latest_log.c.status != WorkoutStatus.COMPLETED.value
+        )
+    ).order_by(
+        past_days.c.scheduled_date.desc(),
+        past_days.c.client_id,
+        past_days.c.training_day_id
+    ).offset(skip)
+
+    if limit is not None:
+        query = query.limit(limit)
+
+    rows = [row._asdict() for row in db.execute(query)]
+    total = rows[0]["total"] if rows else 0
+
+    if not rows and skip > 0:
+        # La página quedó fuera de rango: el total sale de la misma query sin offset
+        total = db.execute(
+            select(func.count()).select_from(query.limit(None).offset(None).subquery())
+        ).scalar()
+
+    for row in rows:
+        row["days_overdue"] = (today - row["scheduled_date"]).days
+
+    return total, rows
@@ -0,0 +1,558 @@
+"""
+Motor vectorizado de volumen muscular.
+
+En lugar de recorrer training_day.exercises → exercise.exercise_muscles →
+muscle como objetos, el catálogo se convierte una vez en una matriz de
+contribución ejercicio × músculo (1.0 primario, peso configurable para
+secundarios) y cada alcance (día, semana, bloque) en vectores de series y
+series efectivas. El volumen de cualquier agrupación es un producto matricial:
+
+    volumen[grupo, músculo] = series[grupo, ejercicio] @ contribución[ejercicio, músculo]
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+from datetime import date
+import numpy as np
+from sqlalchemy.orm import Session
+
+from models.mesocycle import Macrocycle, Mesocycle, Microcycle, TrainingDay, DayExercise, ExercisePhase
+from models.workout_log import WorkoutLog, ExerciseSetLog
+from models.client_interview import ClientInterview
+from schemas.ai_generator import PrimaryGoal, FitnessLevel
+from prompts.workout_generator import get_volume_recommendations
+from services.exercise_catalog import ExerciseMuscles, catalog_cached, get_exercise_muscle_map
+from services.metrics_calculator import (
+    EFFECTIVE_RIR_MAX,
+    EFFECTIVE_RPE_MIN,
+    EFFECTIVE_PERCENTAGE_MIN,
+    MuscleVolumeResponse,
+    PeriodMuscleVolumeResponse,
+    VolumeComparisonResponse,
+    VolumeTargets,
+    WeeklyMuscleVolume,
+    WeeklyVolumeComparison,
+    muscle_volume_comparison_items,
+    muscle_volume_items,
+    muscle_volume_target_items,
+)
+
+# Contribución por defecto de los músculos secundarios (0.5x)
+DEFAULT_SECONDARY_WEIGHT = 0.5
+
+
+class ContributionMatrix:
+    """
+    Matriz ejercicio × músculo del catálogo.
+
+    primary y secondary son matrices 0/1 separadas para poder aplicar el peso de
+    los secundarios sin reconstruir la matriz. Se comparte entre requests vía
+    la caché del catálogo: no debe mutarse.
+    """
+
+    def __init__(self, exercise_ids: List[str], muscle_names: List[str], primary: np.ndarray, secondary: np.ndarray):
+        self.exercise_ids = exercise_ids
+        self.exercise_index: Dict[str, int] = {eid: i for i, eid in enumerate(exercise_ids)}
+        self.muscle_names = muscle_names
+        self.primary = primary
+        self.secondary = secondary
+
+    def weights(self, secondary_weight: float = DEFAULT_SECONDARY_WEIGHT) -> np.ndarray:
+        """Matriz de contribución con el peso indicado para los secundarios."""
+        if secondary_weight == 0:
+            return self.primary
+        return self.primary + secondary_weight * self.secondary
+
+    def indices(self, exercise_ids: Sequence[str]) -> np.ndarray:
+        """Posición de cada ejercicio en la matriz (-1 si no tiene músculos asignados)."""
+        return np.fromiter(
+            (self.exercise_index.get(eid, -1) for eid in exercise_ids),
+            dtype=np.int64,
+            count=len(exercise_ids)
+        )
+
+
+def build_contribution_matrix(muscle_map: Dict[str, ExerciseMuscles]) -> ContributionMatrix:
+    """Construye la matriz de contribución a partir del mapa ejercicio → músculos."""
+    exercise_ids = sorted(muscle_map)
+    muscle_names = sorted({
+        name
+        for muscles in muscle_map.values()
+        for name in muscles.primary_names + muscles.secondary_names
+    })
+    muscle_index = {name: j for j, name in enumerate(muscle_names)}
+
+    primary = np.zeros((len(exercise_ids), len(muscle_names)))
+    secondary = np.zeros((len(exercise_ids), len(muscle_names)))
+    for i, exercise_id in enumerate(exercise_ids):
+        muscles = muscle_map[exercise_id]
+        primary[i, [muscle_index[name] for name in muscles.primary_names]] = 1.0
+        secondary[i, [muscle_index[name] for name in muscles.secondary_names]] = 1.0
+
+    return ContributionMatrix(exercise_ids, muscle_names, primary, secondary)
+
+
+def get_contribution_matrix(db: Session) -> ContributionMatrix:
+    """Matriz de contribución del catálogo, cacheada por versión del catálogo."""
+    return catalog_cached(
+        "contribution_matrix",
+        lambda: build_contribution_matrix(get_exercise_muscle_map(db))
+    )
+
+
+def effective_intensity_mask(effort_types: Sequence[str], effort_values: Sequence[float]) -> np.ndarray:
+    """Versión vectorizada de metrics_calculator.is_effective_intensity."""
+    types = np.asarray(effort_types, dtype=object)
+    values = np.asarray(effort_values, dtype=float)
+    return np.select(
+        [types == "RIR", types == "RPE", types == "percentage"],
+        [values <= EFFECTIVE_RIR_MAX, values >= EFFECTIVE_RPE_MIN, values >= EFFECTIVE_PERCENTAGE_MIN],
+        default=True
+    )
+
+
+class Prescriptions:
+    """
+    Series planeadas de un alcance como vectores (una posición por DayExercise).
+
+    Los ejercicios de calentamiento y los días de descanso ya vienen excluidos.
+    """
+
+    def __init__(self, rows: list):
+        self.training_day_ids = [row.training_day_id for row in rows]
+        self.microcycle_ids = [row.microcycle_id for row in rows]
+        self.week_starts = [row.week_start for row in rows]
+        self.week_numbers = [row.week_number for row in rows]
+        self.block_numbers = [row.block_number for row in rows]
+        self.exercise_ids = [row.exercise_id for row in rows]
+        self.sets = np.array([row.sets or 0 for row in rows], dtype=float)
+        self.effective = effective_intensity_mask(
+            [row.effort_type.value if row.effort_type else "RIR" for row in rows],
+            [row.effort_value if row.effort_value is not None else np.nan for row in rows]
+        )
+
+    def __len__(self):
+        return len(self.exercise_ids)
+
+
+def load_prescriptions(
+    db: Session,
+    training_day_id: Optional[str] = None,
+    microcycle_id: Optional[str] = None,
+    mesocycle_id: Optional[str] = None,
+    macrocycle_id: Optional[str] = None,
+    client_id: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None
+) -> Prescriptions:
+    """
+    Carga las series planeadas de un día, semana, bloque o programa (una query).
+
+    client_id / start_date / end_date filtran por los programas del cliente y
+    la fecha del training day. Ordenadas por bloque, semana y día para que los
+    grupos salgan en orden.
+    """
+    query = db.query(
+        DayExercise.training_day_id,
+        TrainingDay.microcycle_id,
+        Microcycle.start_date.label("week_start"),
+        Microcycle.week_number,
+        Mesocycle.block_number,
+        DayExercise.exercise_id,
+        DayExercise.sets,
+        DayExercise.effort_type,
+        DayExercise.effort_value,
+    ).join(
+        TrainingDay, DayExercise.training_day_id == TrainingDay.id
+    ).join(
+        Microcycle, TrainingDay.microcycle_id == Microcycle.id
+    ).join(
+        Mesocycle, Microcycle.mesocycle_id == Mesocycle.id
+    ).filter(
+        TrainingDay.rest_day == False,
+        DayExercise.phase != ExercisePhase.WARMUP
+    )
+
+    if training_day_id:
+        query = query.filter(DayExercise.training_day_id == training_day_id)
+    if microcycle_id:
+        query = query.filter(TrainingDay.microcycle_id == microcycle_id)
+    if mesocycle_id:
+        query = query.filter(Microcycle.mesocycle_id == mesocycle_id)
+    if macrocycle_id:
+        query = query.filter(Mesocycle.macrocycle_id == macrocycle_id)
+    if client_id:
+        query = query.join(
+            Macrocycle, Mesocycle.macrocycle_id == Macrocycle.id
+        ).filter(Macrocycle.client_id == client_id)
+    if start_date:
+        query = query.filter(TrainingDay.date >= start_date)
+    if end_date:
+        query = query.filter(TrainingDay.date <= end_date)
+
+    rows = query.order_by(
+        Mesocycle.block_number, Microcycle.week_number, TrainingDay.day_number
+    ).all()
+    return Prescriptions(rows)
+
+
+class PerformedSets:
+    """
+    Series realizadas (ExerciseSetLog) como vectores, una posición por serie.
+
+    La serie es efectiva según el esfuerzo registrado por el cliente, interpretado
+    con el effort_type prescrito; si no registró esfuerzo se usa el prescrito.
+    """
+
+    def __init__(self, rows: list):
+        self.microcycle_ids = [row.microcycle_id for row in rows]
+        self.week_starts = [row.week_start for row in rows]
+        self.week_numbers = [row.week_number for row in rows]
+        self.block_numbers = [row.block_number for row in rows]
+        self.exercise_ids = [row.exercise_id for row in rows]
+        self.sets = np.ones(len(rows))
+        reps = np.array([row.reps_completed or 0 for row in rows], dtype=float)
+        weights = np.array([row.weight_kg or 0 for row in rows], dtype=float)
+        self.volume_load = reps * weights
+        self.effective = effective_intensity_mask(
+            [row.effort_type.value if row.effort_type else "RIR" for row in rows],
+            [
+                row.logged_effort if row.logged_effort is not None else row.prescribed_effort
+                for row in rows
+            ]
+        )
+
+    def __len__(self):
+        return len(self.exercise_ids)
+
+
+def load_performed_sets(
+    db: Session,
+    client_id: str,
+    microcycle_id: Optional[str] = None,
+    mesocycle_id: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None
+) -> PerformedSets:
+    """
+    Carga las series registradas por un cliente (una query), con la semana y el
+    bloque del training day al que pertenecen. Excluye calentamiento.
+    """
+    query = db.query(
+        TrainingDay.microcycle_id,
+        Microcycle.start_date.label("week_start"),
+        Microcycle.week_number,
+        Mesocycle.block_number,
+        DayExercise.exercise_id,
+        DayExercise.effort_type,
+        DayExercise.effort_value.label("prescribed_effort"),
+        ExerciseSetLog.effort_value.label("logged_effort"),
+        ExerciseSetLog.reps_completed,
+        ExerciseSetLog.weight_kg,
+    ).join(
+        WorkoutLog, ExerciseSetLog.workout_log_id == WorkoutLog.id
+    ).join(
+        DayExercise, ExerciseSetLog.day_exercise_id == DayExercise.id
+    ).join(
+        TrainingDay, DayExercise.training_day_id == TrainingDay.id
+    ).join(
+        Microcycle, TrainingDay.microcycle_id == Microcycle.id
+    ).join(
+        Mesocycle, Microcycle.mesocycle_id == Mesocycle.id
+    ).filter(
+        WorkoutLog.client_id == client_id,
+        DayExercise.phase != ExercisePhase.WARMUP
+    )
+
+    if microcycle_id:
+        query = query.filter(TrainingDay.microcycle_id == microcycle_id)
+    if mesocycle_id:
+        query = query.filter(Microcycle.mesocycle_id == mesocycle_id)
+    if start_date:
+        query = query.filter(TrainingDay.date >= start_date)
+    if end_date:
+        query = query.filter(TrainingDay.date <= end_date)
+
+    return PerformedSets(query.all())
+
+
+def group_index(keys: Sequence) -> Tuple[list, np.ndarray]:
+    """Agrupa claves en orden de aparición: (claves únicas, índice de grupo por fila)."""
+    positions: Dict = {}
+    index = np.fromiter(
+        (positions.setdefault(key, len(positions)) for key in keys),
+        dtype=np.int64,
+        count=len(keys)
+    )
+    return list(positions), index
+
+
+def compute_volume(
+    matrix: ContributionMatrix,
+    exercise_ids: Sequence[str],
+    values: Sequence[np.ndarray],
+    groups: np.ndarray,
+    n_groups: int,
+    secondary_weight: float = DEFAULT_SECONDARY_WEIGHT
+) -> List[np.ndarray]:
+    """
+    Volumen por grupo y músculo.
+
+    Acumula cada vector de valores (series, series efectivas, volume-load...)
+    por (grupo, ejercicio) y multiplica por la matriz de contribución; todos
+    los vectores van apilados en un solo producto.
+
+    Returns:
+        Una matriz (n_groups, músculos) por cada vector de values
+    """
+    n_exercises = len(matrix.exercise_ids)
+    exercise_idx = matrix.indices(exercise_ids)
+    known = exercise_idx >= 0
+
+    per_exercise = np.zeros((len(values) * n_groups, n_exercises))
+    for k, value in enumerate(values):
+        np.add.at(per_exercise, (groups[known] + k * n_groups, exercise_idx[known]), value[known])
+
+    volume = per_exercise @ matrix.weights(secondary_weight)
+    return [volume[k * n_groups:(k + 1) * n_groups] for k in range(len(values))]
+
+
+def prescription_volume(
+    matrix: ContributionMatrix,
+    prescriptions: Prescriptions,
+    group_keys: Sequence,
+    secondary_weight: float = DEFAULT_SECONDARY_WEIGHT
+) -> Tuple[list, np.ndarray, np.ndarray]:
+    """
+    Volumen planeado agrupado por las claves dadas (una por prescripción).
+
+    Returns:
+        (claves de grupo, series totales, series efectivas)
+    """
+    keys, groups = group_index(group_keys)
+    total, effective = compute_volume(
+        matrix,
+        prescriptions.exercise_ids,
+        [prescriptions.sets, prescriptions.sets * prescriptions.effective],
+        groups,
+        len(keys),
+        secondary_weight
+    )
+    return keys, total, effective
+
+
+def calculate_training_day_volume(
+    db: Session,
+    training_day: TrainingDay,
+    count_secondary: bool = True,
+    matrix: Optional[ContributionMatrix] = None
+) -> MuscleVolumeResponse:
+    """
+    Calcula el volumen por grupo muscular para un día de entrenamiento.
+
+    Args:
+        db: Sesión de base de datos
+        training_day: TrainingDay (no requiere relaciones cargadas)
+        count_secondary: If True, secondary muscles contribute 0.5x. If False, 0x.
+        matrix: Matriz de contribución (por defecto la del catálogo cacheado)
+    """
+    name = training_day.name or f"Día {training_day.day_number}"
+    prescriptions = None if training_day.rest_day else load_prescriptions(db, training_day_id=training_day.id)
+    if not prescriptions:
+        return MuscleVolumeResponse(
+            training_day_id=training_day.id,
+            training_day_name=name,
+            total_effective_sets=0,
+            muscles=[]
+        )
+
+    matrix = matrix or get_contribution_matrix(db)
+    _, total, effective = prescription_volume(
+        matrix,
+        prescriptions,
+        [training_day.id] * len(prescriptions),
+        DEFAULT_SECONDARY_WEIGHT if count_secondary else 0
+    )
+    muscles = muscle_volume_items(matrix.muscle_names, total[0], effective[0])
+
+    return MuscleVolumeResponse(
+        training_day_id=training_day.id,
+        training_day_name=name,
+        total_effective_sets=round(sum(m.effective_sets for m in muscles), 1),
+        muscles=muscles
+    )
+
+
+def resolve_volume_targets(db: Session, macrocycle: Macrocycle) -> VolumeTargets:
+    """
+    Rango de series semanales por músculo según el objetivo del macrociclo y el
+    nivel del cliente (entrevista). Por defecto: general_fitness / intermediate.
+    """
+    try:
+        goal = PrimaryGoal((macrocycle.objective or "").strip().lower())
+    except ValueError:
+        goal = PrimaryGoal.GENERAL_FITNESS
+
+    level = FitnessLevel.INTERMEDIATE
+    if macrocycle.client_id:
+        experience_level = db.query(ClientInterview.experience_level).filter(
+            ClientInterview.client_id == macrocycle.client_id
+        ).scalar()
+        if experience_level:
+            level = FitnessLevel(experience_level.value)
+
+    recommendations = get_volume_recommendations(goal, level)
+    return VolumeTargets(goal=goal.value, level=level.value, **recommendations)
+
+
+def calculate_period_volume(
+    db: Session,
+    macrocycle: Macrocycle,
+    scope: str,
+    scope_id: str,
+    count_secondary: bool = True,
+    matrix: Optional[ContributionMatrix] = None
+) -> PeriodMuscleVolumeResponse:
+    """
+    Volumen semanal por músculo de una semana, bloque o programa completo.
+
+    Usa un número constante de queries sin importar cuántos días o semanas
+    abarque: prescripciones, matriz de contribución y nivel del cliente.
+
+    Args:
+        db: Sesión de base de datos
+        macrocycle: Macrociclo dueño del periodo (ya validado el acceso)
+        scope: "microcycle", "mesocycle" o "macrocycle"
+        scope_id: ID del microciclo, mesociclo o macrociclo
+        count_secondary: If True, secondary muscles contribute 0.5x. If False, 0x.
+        matrix: Matriz de contribución (por defecto la del catálogo cacheado)
+    """
+    prescriptions = load_prescriptions(db, **{f"{scope}_id": scope_id})
+    targets = resolve_volume_targets(db, macrocycle)
+
+    if not prescriptions:
+        return PeriodMuscleVolumeResponse(
+            scope=scope, scope_id=scope_id, targets=targets, weeks=[], weekly_average=[]
+        )
+
+    matrix = matrix or get_contribution_matrix(db)
+    weeks, total, effective = prescription_volume(
+        matrix,
+        prescriptions,
+        list(zip(prescriptions.microcycle_ids, prescriptions.block_numbers, prescriptions.week_numbers)),
+        DEFAULT_SECONDARY_WEIGHT if count_secondary else 0
+    )
+
+    weekly = []
+    for i, (microcycle_id, block_number, week_number) in enumerate(weeks):
+        muscles = muscle_volume_target_items(matrix.muscle_names, total[i], effective[i], targets)
+        weekly.append(WeeklyMuscleVolume(
+            microcycle_id=microcycle_id,
+            block_number=block_number,
+            week_number=week_number,
+            total_effective_sets=round(float(effective[i].sum()), 1),
+            total_sets=round(float(total[i].sum()), 1),
+            muscles=muscles
+        ))
+
+    return PeriodMuscleVolumeResponse(
+        scope=scope,
+        scope_id=scope_id,
+        targets=targets,
+        weeks=weekly,
+        weekly_average=muscle_volume_target_items(
+            matrix.muscle_names, total.mean(axis=0), effective.mean(axis=0), targets
+        )
+    )
+
+
+def calculate_volume_comparison(
+    db: Session,
+    client_id: str,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    microcycle_id: Optional[str] = None,
+    mesocycle_id: Optional[str] = None,
+    count_secondary: bool = True,
+    matrix: Optional[ContributionMatrix] = None
+) -> VolumeComparisonResponse:
+    """
+    Volumen planeado vs realizado por músculo y semana para un cliente.
+
+    Dos queries (prescripciones y series registradas) más la matriz cacheada;
+    ambos lados comparten el índice de semanas y se agregan con productos
+    matriciales, así que el costo crece con el número de series, no de días.
+    """
+    planned = load_prescriptions(
+        db,
+        microcycle_id=microcycle_id,
+        mesocycle_id=mesocycle_id,
+        client_id=client_id,
+        start_date=start_date,
+        end_date=end_date
+    )
+    performed = load_performed_sets(
+        db,
+        client_id,
+        microcycle_id=microcycle_id,
+        mesocycle_id=mesocycle_id,
+        start_date=start_date,
+        end_date=end_date
+    )
+    secondary_weight = DEFAULT_SECONDARY_WEIGHT if count_secondary else 0
+
+    def _week_keys(source):
+        return list(zip(source.microcycle_ids, source.week_starts, source.block_numbers, source.week_numbers))
+
+    weeks, groups = group_index(_week_keys(planned) + _week_keys(performed))
+    if not weeks:
+        return VolumeComparisonResponse(
+            client_id=client_id, start_date=start_date, end_date=end_date, weeks=[], totals=[]
+        )
+
+    matrix = matrix or get_contribution_matrix(db)
+    n_weeks = len(weeks)
+    planned_total, planned_effective = compute_volume(
+        matrix,
+        planned.exercise_ids,
+        [planned.sets, planned.sets * planned.effective],
+        groups[:len(planned)],
+        n_weeks,
+        secondary_weight
+    )
+    performed_total, performed_effective, volume_load = compute_volume(
+        matrix,
+        performed.exercise_ids,
+        [performed.sets, performed.sets * performed.effective, performed.volume_load],
+        groups[len(planned):],
+        n_weeks,
+        secondary_weight
+    )
+
+    weekly = []
+    # Orden cronológico (puede abarcar más de un programa)
+    for i in sorted(range(n_weeks), key=lambda i: weeks[i][1:]):
+        microcycle_id_, week_start, block_number, week_number = weeks[i]
+        weekly.append(WeeklyVolumeComparison(
+            microcycle_id=microcycle_id_,
+            week_start=week_start,
+            block_number=block_number,
+            week_number=week_number,
+            muscles=muscle_volume_comparison_items(
+                matrix.muscle_names,
+                planned_total[i], performed_total[i],
+                planned_effective[i], performed_effective[i],
+                volume_load[i]
+            )
+        ))
+
+    return VolumeComparisonResponse(
+        client_id=client_id,
+        start_date=start_date,
+        end_date=end_date,
+        weeks=weekly,
+        totals=muscle_volume_comparison_items(
+            matrix.muscle_names,
+            planned_total.sum(axis=0), performed_total.sum(axis=0),
+            planned_effective.sum(axis=0), performed_effective.sum(axis=0),
+            volume_load.sum(axis=0)
+        )
+    )
@@ -0,0 +1,409 @@
+"""
+Servicio de carga de entrenamiento por músculo (ACWR).
+
+La carga de un workout es su volume-load (reps × kg) repartido entre músculos
+con la matriz de contribución del catálogo. Cuenta mientras el workout está
+completado: se suma de forma incremental sobre muscle_workloads al completarlo
+(guardando en WorkoutLog.muscle_loads lo que se sumó) y se resta exactamente
+eso si se reabre o se abandona:
+
+- EWMA (Williams et al.): λ = 2 / (N + 1) con N = 7 (aguda) y N = 28 (crónica).
+  Los días sin entrenar decaen los valores por (1 - λ)^días.
+- Ventanas simples: suma de los últimos 7 días y promedio semanal de los
+  últimos 28, a partir de las cargas diarias que guarda cada fila.
+
+Los valores quedan materializados a fecha de last_load_date; al leerlos se
+decaen hasta hoy (decay_workload), así que los flags de riesgo de todos los
+clientes de un entrenador siguen siendo una sola query.
+"""
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from datetime import date, datetime, timedelta
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from models.user import User
+from models.mesocycle import Macrocycle, DayExercise, ExercisePhase
+from models.workout_log import WorkoutLog, ExerciseSetLog, WorkoutStatus
+from models.muscle_workload import MuscleWorkload
+from services.muscle_volume import compute_volume, get_contribution_matrix, group_index
+
+ACUTE_WINDOW_DAYS = 7
+CHRONIC_WINDOW_DAYS = 28
+ACUTE_LAMBDA = 2 / (ACUTE_WINDOW_DAYS + 1)
+CHRONIC_LAMBDA = 2 / (CHRONIC_WINDOW_DAYS + 1)
+
+# Zona "sweet spot" 0.8-1.3; por encima de 1.5 el riesgo de lesión se dispara
+ACWR_LOW = 0.8
+ACWR_HIGH = 1.3
+ACWR_HIGH_RISK = 1.5
+
+# Historial mínimo para que la carga crónica sea representativa
+MIN_HISTORY_DAYS = CHRONIC_WINDOW_DAYS - ACUTE_WINDOW_DAYS
+
+
+def workload_risk(acwr: Optional[float]) -> Optional[str]:
+    """Clasifica un ACWR: high_risk, high, optimal o low (None sin carga crónica)."""
+    if acwr is None:
+        return None
+    if acwr >= ACWR_HIGH_RISK:
+        return "high_risk"
+    if acwr > ACWR_HIGH:
+        return "high"
+    if acwr < ACWR_LOW:
+        return "low"
+    return "optimal"
+
+
+class WorkloadSnapshot(NamedTuple):
+    """Estado de un músculo decaído hasta as_of (sin tocar la fila)."""
+    client_id: str
+    muscle_name: str
+    last_load_date: date
+    as_of: date
+    acute_load: float
+    chronic_load: float
+    acwr_simple: Optional[float]
+    acute_ewma: float
+    chronic_ewma: float
+    acwr_ewma: Optional[float]
+
+
+def _window_loads(daily_loads: Dict[str, float], end: date) -> Tuple[float, float]:
+    """Suma aguda y promedio semanal crónico de las ventanas que terminan en `end`."""
+    acute_start = (end - timedelta(days=ACUTE_WINDOW_DAYS - 1)).isoformat()
+    chronic_start = (end - timedelta(days=CHRONIC_WINDOW_DAYS - 1)).isoformat()
+    acute = sum(load for day, load in daily_loads.items() if day >= acute_start)
+    # Promedio semanal de la ventana crónica, comparable con la suma aguda
+    chronic = sum(
+        load for day, load in daily_loads.items() if day >= chronic_start
+    ) * ACUTE_WINDOW_DAYS / CHRONIC_WINDOW_DAYS
+    return acute, chronic
+
+
+def _ratio(acute: float, chronic: float) -> Optional[float]:
+    return round(acute / chronic, 3) if chronic > 0 else None
+
+
+def _refresh_ratios(state: MuscleWorkload) -> None:
+    """Recalcula las ventanas simples y los ratios a partir del estado."""
+    acute, chronic = _window_loads(state.daily_loads, state.last_load_date)
+
+    state.acute_load = round(acute, 2)
+    state.chronic_load = round(chronic, 2)
+    state.acwr_simple = _ratio(acute, chronic)
+    state.acwr_ewma = _ratio(state.acute_ewma, state.chronic_ewma)
+
+
+def decay_workload(state: MuscleWorkload, as_of: date) -> WorkloadSnapshot:
+    """
+    Valores de un músculo a fecha `as_of`.
+
+    Los días sin entrenar desde last_load_date decaen las EWMA y desplazan
+    las ventanas simples; la fila guardada no se modifica.
+    """
+    gap = max((as_of - state.last_load_date).days, 0)
+    acute_ewma = state.acute_ewma * (1 - ACUTE_LAMBDA) ** gap
+    chronic_ewma = state.chronic_ewma * (1 - CHRONIC_LAMBDA) ** gap
+    acute, chronic = _window_loads(state.daily_loads, max(as_of, state.last_load_date))
+
+    return WorkloadSnapshot(
+        client_id=state.client_id,
+        muscle_name=state.muscle_name,
+        last_load_date=state.last_load_date,
+        as_of=as_of,
+        acute_load=round(acute, 2),
+        chronic_load=round(chronic, 2),
+        acwr_simple=_ratio(acute, chronic),
+        acute_ewma=acute_ewma,
+        chronic_ewma=chronic_ewma,
+        acwr_ewma=_ratio(acute_ewma, chronic_ewma),
+    )
+
+
+def apply_load(state: MuscleWorkload, load_date: date, load: float) -> None:
+    """
+    Suma la carga de un día al estado de un músculo.
+
+    Las EWMA son lineales, así que una carga de una fecha anterior a
+    last_load_date (workout completado tarde) se suma ya decaída, y una carga
+    negativa (workout reabierto) resta exactamente lo que se sumó.
+    """
+    if load_date > state.last_load_date:
+        gap = (load_date - state.last_load_date).days
+        state.acute_ewma *= (1 - ACUTE_LAMBDA) ** gap
+        state.chronic_ewma *= (1 - CHRONIC_LAMBDA) ** gap
+        state.last_load_date = load_date
+
+    age = (state.last_load_date - load_date).days
+    # max(0) sólo absorbe el error de redondeo al restar
+    state.acute_ewma = max(state.acute_ewma + ACUTE_LAMBDA * load * (1 - ACUTE_LAMBDA) ** age, 0.0)
+    state.chronic_ewma = max(state.chronic_ewma + CHRONIC_LAMBDA * load * (1 - CHRONIC_LAMBDA) ** age, 0.0)
+    state.first_load_date = min(state.first_load_date, load_date)
+
+    # Asignar un dict nuevo para que SQLAlchemy detecte el cambio en JSONB
+    window_start = (state.last_load_date - timedelta(days=CHRONIC_WINDOW_DAYS - 1)).isoformat()
+    daily_loads = {day: value for day, value in state.daily_loads.items() if day >= window_start}
+    key = load_date.isoformat()
+    if key >= window_start:
+        day_load = round(daily_loads.get(key, 0.0) + load, 2)
+        if day_load > 0:
+            daily_loads[key] = day_load
+        else:
+            daily_loads.pop(key, None)
+    state.daily_loads = daily_loads
+
+    _refresh_ratios(state)
+
+
+def _new_state(client_id: str, muscle_name: str, load_date: date) -> dict:
+    return {
+        "client_id": client_id,
+        "muscle_name": muscle_name,
+        "first_load_date": load_date,
+        "last_load_date": load_date,
+        "daily_loads": {},
+        "acute_load": 0.0,
+        "chronic_load": 0.0,
+        "acute_ewma": 0.0,
+        "chronic_ewma": 0.0,
+    }
+
+
+def lock_workloads(
+    db: Session,
+    client_id: str,
+    muscle_names: Iterable[str],
+    load_date: date
+) -> Dict[str, MuscleWorkload]:
+    """
+    Obtiene (creando si faltan) y bloquea el estado de los músculos del cliente.
+
+    Mismo esquema que lock_personal_bests: SELECT ... FOR UPDATE y las filas
+    faltantes con ON CONFLICT DO NOTHING.
+    """
+    muscle_names = set(muscle_names)
+    if not muscle_names:
+        return {}
+
+    def _select():
+        return {
+            state.muscle_name: state
+            for state in db.query(MuscleWorkload).filter(
+                MuscleWorkload.client_id == client_id,
+                MuscleWorkload.muscle_name.in_(muscle_names)
+            ).with_for_update().all()
+        }
+
+    states = _select()
+    missing = muscle_names - states.keys()
+    if missing:
+        now = datetime.utcnow()
+        db.execute(pg_insert(MuscleWorkload.__table__).values([
+            dict(_new_state(client_id, name, load_date), updated_at=now)
+            for name in missing
+        ]).on_conflict_do_nothing())
+        states = _select()
+
+    return states
+
+
+def _set_rows_query(db: Session):
+    """Series con volume-load, excluyendo calentamiento."""
+    return db.query(
+        DayExercise.exercise_id,
+        ExerciseSetLog.reps_completed,
+        ExerciseSetLog.weight_kg,
+    ).join(
+        DayExercise, ExerciseSetLog.day_exercise_id == DayExercise.id
+    ).filter(
+        DayExercise.phase != ExercisePhase.WARMUP,
+        ExerciseSetLog.weight_kg > 0
+    )
+
+
+def _workout_muscle_loads(db: Session, workout_log: WorkoutLog) -> Dict[str, float]:
+    """Volume-load por músculo de las series del workout con la matriz actual."""
+    rows = _set_rows_query(db).filter(
+        ExerciseSetLog.workout_log_id == workout_log.id
+    ).all()
+    if not rows:
+        return {}
+
+    matrix = get_contribution_matrix(db)
+    (loads,) = compute_volume(
+        matrix,
+        [row.exercise_id for row in rows],
+        [np.array([(row.reps_completed or 0) * row.weight_kg for row in rows], dtype=float)],
+        np.zeros(len(rows), dtype=np.int64),
+        1
+    )
+    return {
+        matrix.muscle_names[j]: float(loads[0, j]) for j in np.flatnonzero(loads[0] > 0)
+    }
+
+
+def _apply_muscle_loads(
+    db: Session,
+    workout_log: WorkoutLog,
+    muscle_loads: Dict[str, float],
+    sign: int
+) -> None:
+    if not muscle_loads:
+        return
+    load_date = workout_log.started_at.date()
+    states = lock_workloads(db, workout_log.client_id, muscle_loads, load_date)
+    for muscle_name, load in muscle_loads.items():
+        apply_load(states[muscle_name], load_date, sign * load)
+
+
+def record_workout_load(db: Session, workout_log: WorkoutLog) -> None:
+    """
+    Suma la carga de un workout al pasar a COMPLETED (sin commit).
+
+    Guarda la carga por músculo aplicada en workout_log.muscle_loads para que
+    remove_workout_load reste exactamente lo mismo aunque cambie el catálogo.
+    """
+    muscle_loads = _workout_muscle_loads(db, workout_log)
+    _apply_muscle_loads(db, workout_log, muscle_loads, 1)
+    workout_log.muscle_loads = muscle_loads or None
+
+
+def remove_workout_load(db: Session, workout_log: WorkoutLog) -> None:
+    """
+    Resta la carga de un workout que deja de estar COMPLETED (sin commit).
+
+    Usa la carga guardada al completarlo; sólo los workouts completados antes
+    de guardarla (sin backfill) se recalculan con la matriz actual.
+    """
+    muscle_loads = workout_log.muscle_loads
+    if muscle_loads is None:
+        muscle_loads = _workout_muscle_loads(db, workout_log)
+    _apply_muscle_loads(db, workout_log, muscle_loads, -1)
+    workout_log.muscle_loads = None
+
+
+def get_client_workload(
+    db: Session,
+    client_id: str,
+    as_of: Optional[date] = None
+) -> List[WorkloadSnapshot]:
+    """Estado de todos los músculos de un cliente, decaído hasta as_of (hoy)."""
+    as_of = as_of or date.today()
+    return [
+        decay_workload(state, as_of)
+        for state in db.query(MuscleWorkload).filter(
+            MuscleWorkload.client_id == client_id
+        ).order_by(MuscleWorkload.muscle_name)
+    ]
+
+
+def fetch_workload_flags(
+    db: Session,
+    trainer_id: Optional[str] = None,
+    client_id: Optional[str] = None,
+    include_low: bool = False,
+    as_of: Optional[date] = None
+) -> List[Tuple[WorkloadSnapshot, str]]:
+    """
+    Músculos con ACWR (EWMA) fuera de rango de todos los clientes (una query).
+
+    Sólo considera músculos entrenados en la última semana y con historial
+    suficiente para que la carga crónica sea representativa. Los ratios se
+    evalúan decaídos hasta as_of, no a fecha del último entrenamiento.
+
+    Returns:
+        Tuplas (WorkloadSnapshot, nombre del cliente), ratio más alto primero
+    """
+    as_of = as_of or date.today()
+
+    query = db.query(MuscleWorkload, User.full_name).join(
+        User, MuscleWorkload.client_id == User.id
+    ).filter(
+        MuscleWorkload.last_load_date >= as_of - timedelta(days=ACUTE_WINDOW_DAYS - 1),
+        MuscleWorkload.last_load_date - MuscleWorkload.first_load_date >= MIN_HISTORY_DAYS
+    )
+    if not include_low:
+        # Decaer sólo baja el ratio (la aguda decae más rápido), así que el
+        # valor guardado sirve de prefiltro para el riesgo alto
+        query = query.filter(MuscleWorkload.acwr_ewma >= ACWR_HIGH_RISK)
+
+    if trainer_id:
+        query = query.filter(MuscleWorkload.client_id.in_(
+            select(Macrocycle.client_id).where(Macrocycle.trainer_id == trainer_id)
+        ))
+    if client_id:
+        query = query.filter(MuscleWorkload.client_id == client_id)
+
+    flags = []
+    for state, client_name in query.all():
+        snapshot = decay_workload(state, as_of)
+        if snapshot.acwr_ewma is None:
+            continue
+        if snapshot.acwr_ewma >= ACWR_HIGH_RISK or (include_low and snapshot.acwr_ewma < ACWR_LOW):
+            flags.append((snapshot, client_name))
+
+    flags.sort(key=lambda flag: flag[0].acwr_ewma, reverse=True)
+    return flags
+
+
+def rebuild_muscle_workload(db: Session, client_id: Optional[str] = None) -> int:
+    """
+    Reconstruye muscle_workloads desde los workouts completados (sin commit).
+
+    También rellena WorkoutLog.muscle_loads de cada workout completado con la
+    carga que se le aplicó.
+
+    Returns:
+        Número de filas (cliente, músculo) escritas
+    """
+    delete_query = db.query(MuscleWorkload)
+    if client_id:
+        delete_query = delete_query.filter(MuscleWorkload.client_id == client_id)
+    delete_query.delete(synchronize_session=False)
+
+    query = _set_rows_query(db).add_columns(
+        ExerciseSetLog.workout_log_id,
+        WorkoutLog.client_id,
+        func.date(WorkoutLog.started_at).label("performed_on"),
+    ).join(
+        WorkoutLog, ExerciseSetLog.workout_log_id == WorkoutLog.id
+    ).filter(
+        WorkoutLog.status == WorkoutStatus.COMPLETED
+    )
+    if client_id:
+        query = query.filter(WorkoutLog.client_id == client_id)
+
+    rows = query.all()
+    if not rows:
+        return 0
+
+    matrix = get_contribution_matrix(db)
+    workouts, groups = group_index(
+        [(row.client_id, row.performed_on, row.workout_log_id) for row in rows]
+    )
+    (loads,) = compute_volume(
+        matrix,
+        [row.exercise_id for row in rows],
+        [np.array([(row.reps_completed or 0) * row.weight_kg for row in rows], dtype=float)],
+        groups,
+        len(workouts)
+    )
+
+    states: Dict[tuple, MuscleWorkload] = {}
+    applied = []
+    for i in sorted(range(len(workouts)), key=lambda i: workouts[i][1]):
+        row_client_id, performed_on, workout_log_id = workouts[i]
+        muscle_loads = {}
+        for j in np.flatnonzero(loads[i] > 0):
+            key = (row_client_id, matrix.muscle_names[j])
+            if key not in states:
+                states[key] = MuscleWorkload(**_new_state(row_client_id, key[1], performed_on))
+            muscle_loads[key[1]] = float(loads[i, j])
+            apply_load(states[key], performed_on, muscle_loads[key[1]])
+        applied.append({"id": workout_log_id, "muscle_loads": muscle_loads or None})
+
+    db.add_all(states.values())
+    db.bulk_update_mappings(WorkoutLog, applied)
+    return len(states)
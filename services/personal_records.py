@@ -0,0 +1,196 @@
+"""
+Servicio de detección de récords personales (PR).
+
+Cada serie nueva se compara contra la fila compacta exercise_personal_bests
+del (cliente, ejercicio): mejor 1RM estimado y peso máximo por número de
+repeticiones. Es una lectura por clave primaria y una escritura por serie,
+sin consultar el historial de series. Los récords se guardan como
+PersonalRecordEvent.
+
+La primera marca de un ejercicio (o de un número de reps) es la línea base y
+no cuenta como récord.
+"""
+from typing import Dict, Iterable, List, Optional
+from datetime import datetime
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from models.mesocycle import DayExercise
+from models.workout_log import WorkoutLog, ExerciseSetLog
+from models.exercise_performance import ExercisePersonalBest, PersonalRecordEvent, PersonalRecordType
+from services.exercise_performance import estimate_1rm
+
+# Repeticiones máximas para las que se registra rep-max (más allá es resistencia)
+MAX_REP_MAX_REPS = 20
+
+
+def lock_personal_bests(db: Session, client_id: str, exercise_ids: Iterable[str]) -> Dict[str, ExercisePersonalBest]:
+    """
+    Obtiene (creando si faltan) y bloquea las filas de récords de los ejercicios.
+
+    SELECT ... FOR UPDATE serializa registros concurrentes del mismo ejercicio;
+    las filas faltantes se crean con ON CONFLICT DO NOTHING.
+    """
+    exercise_ids = set(exercise_ids)
+    if not exercise_ids:
+        return {}
+
+    def _select():
+        return {
+            best.exercise_id: best
+            for best in db.query(ExercisePersonalBest).filter(
+                ExercisePersonalBest.client_id == client_id,
+                ExercisePersonalBest.exercise_id.in_(exercise_ids)
+            ).with_for_update().all()
+        }
+
+    bests = _select()
+    missing = exercise_ids - bests.keys()
+    if missing:
+        now = datetime.utcnow()
+        db.execute(pg_insert(ExercisePersonalBest.__table__).values([
+            {
+                "client_id": client_id,
+                "exercise_id": exercise_id,
+                "best_e1rm": None,
+                "rep_maxes": {},
+                "updated_at": now,
+            }
+            for exercise_id in missing
+        ]).on_conflict_do_nothing())
+        bests = _select()
+
+    return bests
+
+
+def apply_set(
+    best: ExercisePersonalBest,
+    reps: Optional[int],
+    weight_kg: Optional[float]
+) -> List[dict]:
+    """
+    Actualiza la fila de récords con una serie y devuelve los récords superados.
+
+    Returns:
+        Lista de dicts con record_type, value y previous_value
+    """
+    if not weight_kg or not reps or reps <= 0:
+        return []
+
+    records = []
+
+    e1rm = estimate_1rm(weight_kg, reps)
+    if best.best_e1rm is None or e1rm > best.best_e1rm:
+        if best.best_e1rm is not None:
+            records.append({
+                "record_type": PersonalRecordType.E1RM,
+                "value": e1rm,
+                "previous_value": best.best_e1rm,
+            })
+        best.best_e1rm = e1rm
+
+    if reps <= MAX_REP_MAX_REPS:
+        key = str(reps)
+        previous = best.rep_maxes.get(key)
+        if previous is None or weight_kg > previous:
+            if previous is not None:
+                records.append({
+                    "record_type": PersonalRecordType.REP_MAX,
+                    "value": weight_kg,
+                    "previous_value": previous,
+                })
+            # Asignar un dict nuevo para que SQLAlchemy detecte el cambio en JSONB
+            best.rep_maxes = {**best.rep_maxes, key: weight_kg}
+
+    return records
+
+
+def detect_personal_records(
+    db: Session,
+    workout_log: WorkoutLog,
+    set_logs: List[ExerciseSetLog],
+    exercise_ids: Dict[str, str]
+) -> List[PersonalRecordEvent]:
+    """
+    Detecta y registra los récords de series recién insertadas (sin commit).
+
+    Args:
+        db: Sesión de base de datos
+        workout_log: Workout al que pertenecen las series
+        set_logs: Series nuevas (con id asignado), en orden de registro
+        exercise_ids: day_exercise_id -> exercise_id
+
+    Returns:
+        Eventos de récord creados
+    """
+    set_logs = [s for s in set_logs if exercise_ids.get(s.day_exercise_id)]
+    if not set_logs:
+        return []
+
+    bests = lock_personal_bests(
+        db, workout_log.client_id, (exercise_ids[s.day_exercise_id] for s in set_logs)
+    )
+
+    events = []
+    for set_log in set_logs:
+        exercise_id = exercise_ids[set_log.day_exercise_id]
+        for record in apply_set(bests[exercise_id], set_log.reps_completed, set_log.weight_kg):
+            events.append(PersonalRecordEvent(
+                client_id=workout_log.client_id,
+                exercise_id=exercise_id,
+                set_log_id=set_log.id,
+                reps=set_log.reps_completed,
+                weight_kg=set_log.weight_kg,
+                achieved_at=set_log.completed_at or datetime.utcnow(),
+                **record
+            ))
+
+    db.add_all(events)
+    return events
+
+
+def get_set_personal_records(db: Session, set_log_id: str) -> List[PersonalRecordEvent]:
+    """Récords registrados por una serie (para respuestas idempotentes)."""
+    return db.query(PersonalRecordEvent).filter(
+        PersonalRecordEvent.set_log_id == set_log_id
+    ).all()
+
+
+def rebuild_personal_bests(db: Session, client_id: Optional[str] = None) -> int:
+    """
+    Reconstruye exercise_personal_bests desde exercise_set_logs (sin commit).
+
+    No genera eventos: sólo fija la línea base para la detección incremental.
+
+    Returns:
+        Número de filas (cliente, ejercicio) escritas
+    """
+    delete_query = db.query(ExercisePersonalBest)
+    if client_id:
+        delete_query = delete_query.filter(ExercisePersonalBest.client_id == client_id)
+    delete_query.delete(synchronize_session=False)
+
+    query = db.query(
+        WorkoutLog.client_id,
+        DayExercise.exercise_id,
+        ExerciseSetLog.reps_completed,
+        ExerciseSetLog.weight_kg,
+    ).join(
+        WorkoutLog, ExerciseSetLog.workout_log_id == WorkoutLog.id
+    ).join(
+        DayExercise, ExerciseSetLog.day_exercise_id == DayExercise.id
+    )
+    if client_id:
+        query = query.filter(WorkoutLog.client_id == client_id)
+
+    bests: Dict[tuple, ExercisePersonalBest] = {}
+    for row_client_id, exercise_id, reps, weight_kg in query.yield_per(1000):
+        key = (row_client_id, exercise_id)
+        if key not in bests:
+            bests[key] = ExercisePersonalBest(
+                client_id=row_client_id, exercise_id=exercise_id, best_e1rm=None, rep_maxes={}
+            )
+        apply_set(bests[key], reps, weight_kg)
+
+    db.add_all(bests.values())
+    return len(bests)
@@ -0,0 +1,251 @@
+"""
+Servicio del índice secuencial de programas.
+
+Mantiene `program_sequence` (orden de los training days de un macrociclo) y
+el cursor de cada cliente (`client_program_cursors`). Las escrituras del
+programa reconstruyen el índice; completar un workout avanza el cursor. La
+lectura del próximo entrenamiento es un solo lookup indexado y nunca escribe:
+si falta el índice (programas anteriores a él, ver
+scripts/backfill_program_sequence.py) se calcula al vuelo sin guardarlo.
+"""
+from typing import Optional, Tuple
+from sqlalchemy import select, delete, insert, func, literal, and_, exists
+from sqlalchemy.orm import Session
+
+from models.mesocycle import Macrocycle, Mesocycle, Microcycle, TrainingDay, MesocycleStatus
+from models.program_sequence import ProgramSequenceEntry, ClientProgramCursor
+from models.workout_log import WorkoutLog, WorkoutStatus
+
+# Campos de TrainingDay que afectan el orden/contenido del índice secuencial
+SEQUENCE_DAY_FIELDS = {"day_number", "rest_day", "microcycle_id"}
+
+# Campos de Macrocycle que cambian qué cliente sigue el programa o si está activo
+SEQUENCE_MACROCYCLE_FIELDS = {"client_id", "status", "start_date", "end_date"}
+
+
+def _ordered_training_days(macrocycle_id: str):
+    """(posición, training_day_id) de los días de entrenamiento del macrociclo, en orden."""
+    return select(
+        func.row_number().over(
+            order_by=(Mesocycle.block_number, Microcycle.week_number, TrainingDay.day_number, TrainingDay.id)
+        ).label("position"),
+        TrainingDay.id.label("training_day_id"),
+    ).join(
+        Microcycle, TrainingDay.microcycle_id == Microcycle.id
+    ).join(
+        Mesocycle, Microcycle.mesocycle_id == Mesocycle.id
+    ).where(
+        Mesocycle.macrocycle_id == macrocycle_id,
+        TrainingDay.rest_day == False
+    ).subquery()
+
+
+def rebuild_program_sequence(db: Session, macrocycle_id: str) -> int:
+    """
+    Reconstruye el índice secuencial de un macrociclo con un INSERT ... SELECT.
+
+    Orden: mesocycle.block_number → microcycle.week_number → training_day.day_number
+    (excluyendo días de descanso). También refresca el cursor del cliente
+    asignado, si lo hay. No hace commit: se llama dentro de la transacción de
+    la escritura que modificó el programa.
+
+    Returns:
+        Número de posiciones del programa
+    """
+    db.flush()
+
+    db.execute(
+        delete(ProgramSequenceEntry).where(ProgramSequenceEntry.macrocycle_id == macrocycle_id)
+    )
+
+    ordered = _ordered_training_days(macrocycle_id)
+    ordered_days = select(literal(macrocycle_id), ordered.c.position, ordered.c.training_day_id)
+
+    result = db.execute(
+        insert(ProgramSequenceEntry).from_select(
+            ["macrocycle_id", "position", "training_day_id"], ordered_days
+        )
+    )
+
+    client_id = db.query(Macrocycle.client_id).filter(Macrocycle.id == macrocycle_id).scalar()
+    if client_id:
+        refresh_client_cursor(db, client_id, macrocycle_id)
+
+    return result.rowcount
+
+
+def refresh_program_assignment(
+    db: Session,
+    macrocycle_id: str,
+    previous_client_id: Optional[str]
+) -> None:
+    """
+    Actualiza índice y cursores tras reasignar o (des)activar un macrociclo (sin commit).
+
+    El cliente anterior pierde su cursor de este macrociclo y el actual lo
+    recibe recalculado por rebuild_program_sequence.
+    """
+    db.flush()
+    client_id = db.query(Macrocycle.client_id).filter(Macrocycle.id == macrocycle_id).scalar()
+    if previous_client_id and previous_client_id != client_id:
+        db.execute(
+            delete(ClientProgramCursor).where(
+                ClientProgramCursor.client_id == previous_client_id,
+                ClientProgramCursor.macrocycle_id == macrocycle_id
+            )
+        )
+    rebuild_program_sequence(db, macrocycle_id)
+
+
+def refresh_client_cursor(
+    db: Session,
+    client_id: str,
+    macrocycle_id: str,
+    from_position: int = 1
+) -> ClientProgramCursor:
+    """
+    Recalcula el cursor del cliente: primera posición >= from_position cuyo
+    training day no tiene WorkoutLog completado (anti-join indexado).
+    """
+    completed = exists().where(
+        WorkoutLog.client_id == client_id,
+        WorkoutLog.training_day_id == ProgramSequenceEntry.training_day_id,
+        WorkoutLog.status == WorkoutStatus.COMPLETED.value
+    )
+
+    total, next_position = db.query(
+        select(func.count()).where(
+            ProgramSequenceEntry.macrocycle_id == macrocycle_id
+        ).scalar_subquery(),
+        select(func.min(ProgramSequenceEntry.position)).where(
+            ProgramSequenceEntry.macrocycle_id == macrocycle_id,
+            ProgramSequenceEntry.position >= from_position,
+            ~completed
+        ).scalar_subquery(),
+    ).one()
+
+    cursor = db.get(ClientProgramCursor, (client_id, macrocycle_id))
+    if cursor is None:
+        cursor = ClientProgramCursor(client_id=client_id, macrocycle_id=macrocycle_id)
+        db.add(cursor)
+
+    cursor.total = total or 0
+    cursor.position = next_position if next_position is not None else cursor.total + 1
+    return cursor
+
+
+def advance_client_cursor(db: Session, client_id: str, training_day_id: str) -> None:
+    """
+    Avanza el cursor del cliente tras completar (o reabrir) un workout.
+
+    Si el día completado es la posición actual, el cursor salta a la siguiente
+    posición pendiente; si es un día posterior, el cursor no se mueve.
+    """
+    entry = db.query(ProgramSequenceEntry).join(
+        Macrocycle, Macrocycle.id == ProgramSequenceEntry.macrocycle_id
+    ).filter(
+        ProgramSequenceEntry.training_day_id == training_day_id,
+        Macrocycle.client_id == client_id
+    ).first()
+
+    if not entry:
+        return
+
+    cursor = db.get(ClientProgramCursor, (client_id, entry.macrocycle_id))
+    if cursor is None or entry.position < cursor.position:
+        # Sin cursor o el día quedó antes del cursor (p. ej. se reabrió): recalcular completo
+        refresh_client_cursor(db, client_id, entry.macrocycle_id)
+    elif entry.position == cursor.position:
+        refresh_client_cursor(db, client_id, entry.macrocycle_id, from_position=cursor.position)
+
+
+def lookup_next_in_sequence(
+    db: Session,
+    client_id: str
+) -> Optional[Tuple[str, Optional[TrainingDay], int, int]]:
+    """
+    Como get_next_in_sequence, pero incluye el id del macrociclo activo para
+    reutilizarlo sin volver a resolverlo.
+
+    Returns:
+        None si no hay macrociclo activo; si no, (macrocycle_id, training_day, position, total).
+    """
+    def _lookup():
+        return db.query(
+            Macrocycle.id,
+            ClientProgramCursor.position,
+            ClientProgramCursor.total,
+            TrainingDay,
+        ).outerjoin(
+            ClientProgramCursor,
+            and_(
+                ClientProgramCursor.macrocycle_id == Macrocycle.id,
+                ClientProgramCursor.client_id == client_id
+            )
+        ).outerjoin(
+            ProgramSequenceEntry,
+            and_(
+                ProgramSequenceEntry.macrocycle_id == Macrocycle.id,
+                ProgramSequenceEntry.position == ClientProgramCursor.position
+            )
+        ).outerjoin(
+            TrainingDay, TrainingDay.id == ProgramSequenceEntry.training_day_id
+        ).filter(
+            Macrocycle.client_id == client_id,
+            Macrocycle.status == MesocycleStatus.ACTIVE
+        ).first()
+
+    row = _lookup()
+    if row is None:
+        return None
+
+    if row.position is None:
+        # Sin índice/cursor (programa anterior al índice): calcular sin escribir
+        training_day, position, total = _compute_next_in_sequence(db, client_id, row.id)
+        return row.id, training_day, position, total
+
+    return row.id, row.TrainingDay, row.position, row.total
+
+
+def _compute_next_in_sequence(
+    db: Session,
+    client_id: str,
+    macrocycle_id: str
+) -> Tuple[Optional[TrainingDay], int, int]:
+    """
+    Próximo entrenamiento recorriendo el programa (sólo lectura).
+
+    Mismo orden y criterio que rebuild_program_sequence + refresh_client_cursor.
+    """
+    ordered = _ordered_training_days(macrocycle_id)
+    completed = exists().where(
+        WorkoutLog.client_id == client_id,
+        WorkoutLog.training_day_id == ordered.c.training_day_id,
+        WorkoutLog.status == WorkoutStatus.COMPLETED.value
+    )
+    days = db.execute(
+        select(ordered.c.training_day_id, completed.label("completed")).order_by(ordered.c.position)
+    ).all()
+
+    total = len(days)
+    for position, (training_day_id, is_completed) in enumerate(days, start=1):
+        if not is_completed:
+            return db.get(TrainingDay, training_day_id), position, total
+    return None, total + 1, total
+
+
+def get_next_in_sequence(
+    db: Session,
+    client_id: str
+) -> Optional[Tuple[Optional[TrainingDay], int, int]]:
+    """
+    Obtiene el próximo entrenamiento del cliente desde el cursor.
+
+    Returns:
+        None si no hay macrociclo activo; si no, (training_day, position, total).
+        training_day es None cuando el programa está completo (position > total).
+    """
+    result = lookup_next_in_sequence(db, client_id)
+    if result is None:
+        return None
+    return result[1:]
@@ -0,0 +1,94 @@
+"""
+Servicio de registro de series.
+
+Inserta en bloque las series que la app acumula sin conexión: valida todos los
+day_exercise_id con una query y hace un solo INSERT ... ON CONFLICT DO NOTHING
+sobre (workout_log_id, idempotency_key), de modo que reenviar el mismo bloque
+no genera duplicados.
+"""
+import uuid
+from typing import Iterable, List, NamedTuple, Set
+from datetime import datetime
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from models.mesocycle import DayExercise
+from models.workout_log import WorkoutLog, ExerciseSetLog
+from schemas.workout_log import ExerciseSetLogCreate
+
+
+def find_foreign_day_exercises(db: Session, workout_log: WorkoutLog, day_exercise_ids: Iterable[str]) -> Set[str]:
+    """Devuelve los day_exercise_id que NO pertenecen al training day del workout (una query)."""
+    requested = set(day_exercise_ids)
+    valid = {
+        row[0] for row in db.query(DayExercise.id).filter(
+            DayExercise.id.in_(requested),
+            DayExercise.training_day_id == workout_log.training_day_id
+        ).all()
+    }
+    return requested - valid
+
+
+class SetLogInsertResult(NamedTuple):
+    created_ids: List[str]  # Series insertadas en esta llamada
+    duplicates: int  # Claves únicas del bloque que ya estaban registradas
+    set_logs: List[ExerciseSetLog]  # Todas las series del bloque
+
+
+def insert_set_logs(
+    db: Session,
+    workout_log: WorkoutLog,
+    items: List[ExerciseSetLogCreate]
+) -> SetLogInsertResult:
+    """
+    Inserta un bloque de series en una sola sentencia (sin commit).
+
+    Todas las series deben traer idempotency_key (también se usa para una sola
+    serie con clave, por si llegan reintentos concurrentes).
+
+    Las claves repetidas dentro del bloque se descartan (gana la primera) y las
+    que ya existen en la base se ignoran con ON CONFLICT DO NOTHING.
+
+    Returns:
+        SetLogInsertResult; duplicates cuenta sólo las claves que ya existían
+        en la base (no las repetidas dentro del bloque) y set_logs viene
+        ordenado por ejercicio y número de serie
+    """
+    now = datetime.utcnow()
+    rows = []
+    seen_keys: Set[str] = set()
+
+    for item in items:
+        if item.idempotency_key in seen_keys:
+            continue
+        seen_keys.add(item.idempotency_key)
+        rows.append({
+            "id": str(uuid.uuid4()),
+            "workout_log_id": workout_log.id,
+            "client_id": workout_log.client_id,
+            "day_exercise_id": item.day_exercise_id,
+            "set_number": item.set_number,
+            "reps_completed": item.reps_completed,
+            "weight_kg": item.weight_kg,
+            "effort_value": item.effort_value,
+            "notes": item.notes,
+            "idempotency_key": item.idempotency_key,
+            "completed_at": now,
+            "created_at": now,
+            "updated_at": now,
+        })
+
+    stmt = pg_insert(ExerciseSetLog).values(rows).on_conflict_do_nothing(
+        constraint="uq_set_log_idempotency"
+    ).returning(ExerciseSetLog.id)
+    created_ids = list(db.execute(stmt).scalars())
+
+    set_logs = db.query(ExerciseSetLog).filter(
+        ExerciseSetLog.workout_log_id == workout_log.id,
+        ExerciseSetLog.idempotency_key.in_(seen_keys)
+    ).order_by(
+        ExerciseSetLog.day_exercise_id,
+        ExerciseSetLog.set_number
+    ).all()
+
+    return SetLogInsertResult(created_ids, len(seen_keys) - len(created_ids), set_logs)
@@ -0,0 +1,65 @@
+"""
+Coalescencia de llamadas idénticas concurrentes (single-flight).
+
+Si llega una generación con la misma clave que otra todavía en curso (doble
+clic en "generar", dos pestañas con el mismo cuestionario), espera a la
+misma tarea en lugar de lanzar otra llamada a la IA. El resultado, o la
+excepción, llega a todos los que esperan.
+
+La llamada corre en una tarea propia: si el request que la inició se cancela
+(el cliente cerró la conexión), los demás siguen esperando el resultado.
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Registro de tareas en curso por clave (por proceso)."""
+
+    def __init__(self):
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._coalesced = 0
+
+    def in_flight(self, key: str) -> Optional[asyncio.Task]:
+        task = self._tasks.get(key)
+        if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+            return None
+        return task
+
+    async def run(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Ejecuta factory() o se une a la ejecución en curso con la misma clave.
+
+        Returns:
+            (resultado, True si esta llamada lanzó la tarea)
+        """
+        task = self.in_flight(key)
+        leader = task is None
+        if leader:
+            task = asyncio.get_running_loop().create_task(factory())
+            self._tasks[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self._coalesced += 1
+            logger.info(f"Generación idéntica en curso ({key[:12]}), esperando su resultado")
+
+        return await asyncio.shield(task), leader
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        if not task.cancelled() and task.exception() is not None:
+            # Marcar la excepción como recuperada aunque nadie siga esperando
+            logger.debug(f"Generación {key[:12]} terminó con error: {task.exception()}")
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": sum(1 for task in self._tasks.values() if not task.done()),
+            "coalesced": self._coalesced,
+        }
+
+
+generation_flights = SingleFlight()
@@ -0,0 +1,249 @@
+"""
+Predicción de tokens de salida y latencia a partir de llm_call_logs.
+
+Para cada (modelo, fase, formato comprimido) ajusta con los datos recientes:
+
+- tokens de salida ≈ a + b · unidades (unidades = semanas × días/semana en
+  generación de una sola llamada, días/semana en la semana base), más el
+  percentil del residuo: max_tokens cubre AI_MAX_TOKENS_PERCENTILE de las
+  respuestas observadas sin reservar de más (reservar de más retrasa el
+  primer token, quedarse corto trunca el JSON).
+- latencia ≈ c + d · tokens de salida.
+
+Con eso se estima la latencia de generar en una sola llamada frente a en
+fases (semana base + progresiones en paralelo) y se elige la menor.
+
+Las respuestas truncadas (stop_reason = max_tokens) son un mínimo, no el
+valor real: se cuentan infladas para que el predictor suba el límite.
+
+Sin datos suficientes se devuelve None / el valor por defecto y el
+generador usa sus fórmulas fijas.
+"""
+import asyncio
+import logging
+import math
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from core.config import settings
+from models.base import SessionLocal
+from models.llm_call_log import LLMCallLog
+
+logger = logging.getLogger(__name__)
+
+# Recarga de las muestras desde la DB
+PREDICTOR_REFRESH_SECONDS = 600
+PREDICTOR_MAX_ROWS = 5000
+
+# Factor aplicado a respuestas truncadas (su longitud real era mayor)
+TRUNCATED_INFLATION = 1.5
+# Margen sobre el percentil elegido
+SAFETY_MARGIN = 1.1
+
+MIN_MAX_TOKENS = 1024
+MAX_MAX_TOKENS = 64000
+
+
+class UsageSample(NamedTuple):
+    units: int
+    output_tokens: float
+    latency_ms: int
+
+
+class LinearFit(NamedTuple):
+    intercept: float
+    slope: float
+    residuals: Tuple[float, ...]  # Ordenados
+
+    def predict(self, x: float) -> float:
+        return self.intercept + self.slope * x
+
+
+def _quantile(sorted_values: Sequence[float], q: float) -> float:
+    """Percentil con interpolación lineal (valores ya ordenados)."""
+    position = (len(sorted_values) - 1) * q
+    low = math.floor(position)
+    high = math.ceil(position)
+    if low == high:
+        return sorted_values[low]
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (position - low)
+
+
+def _linear_fit(xs: Sequence[float], ys: Sequence[float]) -> LinearFit:
+    """Mínimos cuadrados y = a + b·x (b = 0 si x no varía)."""
+    n = len(xs)
+    mean_x = sum(xs) / n
+    mean_y = sum(ys) / n
+    var_x = sum((x - mean_x) ** 2 for x in xs)
+    slope = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / var_x if var_x else 0.0
+    slope = max(slope, 0.0)  # Más unidades nunca deberían reducir tokens ni latencia
+    intercept = mean_y - slope * mean_x
+    residuals = tuple(sorted(y - (intercept + slope * x) for x, y in zip(xs, ys)))
+    return LinearFit(intercept, slope, residuals)
+
+
+def units_for(phase: str, total_weeks: int, days_per_week: int) -> int:
+    """
+    Unidades de trabajo de una llamada según la fase.
+
+    Para progression se usa la duración del programa: cada llamada cubre un
+    tramo, pero el tramo depende de cómo se dividió ese programa.
+    """
+    if phase == "base_week":
+        return days_per_week
+    if phase == "progression":
+        return total_weeks
+    return total_weeks * days_per_week
+
+
+class _ModelSnapshot(NamedTuple):
+    loaded_at: float
+    samples: Dict[Tuple[str, bool], List[UsageSample]]
+    tokens: Dict[Tuple[str, bool], LinearFit]
+    latency: Dict[Tuple[str, bool], LinearFit]
+
+
+class TokenPredictor:
+    """Modelos por (modelo de IA, fase, comprimido), recargados periódicamente."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshots: Dict[str, _ModelSnapshot] = {}
+
+    async def refresh(self, model: str) -> None:
+        """Recarga las muestras del modelo si están viejas (la query corre en un thread)."""
+        if not settings.AI_ADAPTIVE_GENERATION:
+            return
+        snapshot = self._snapshots.get(model)
+        if snapshot and time.monotonic() - snapshot.loaded_at < PREDICTOR_REFRESH_SECONDS:
+            return
+        try:
+            snapshot = await asyncio.to_thread(self._load, model)
+        except Exception as e:
+            logger.warning(f"No se pudo cargar el historial de uso de la IA: {e}")
+            # Reintentar tras el intervalo normal, conservando lo anterior
+            previous = self._snapshots.get(model)
+            snapshot = _ModelSnapshot(
+                time.monotonic(),
+                previous.samples if previous else {},
+                previous.tokens if previous else {},
+                previous.latency if previous else {},
+            )
+        with self._lock:
+            self._snapshots[model] = snapshot
+
+    def _load(self, model: str) -> _ModelSnapshot:
+        since = datetime.utcnow() - timedelta(days=settings.AI_PREDICTOR_WINDOW_DAYS)
+        db = SessionLocal()
+        try:
+            rows = db.query(
+                LLMCallLog.phase,
+                LLMCallLog.compressed,
+                LLMCallLog.total_weeks,
+                LLMCallLog.days_per_week,
+                LLMCallLog.output_tokens,
+                LLMCallLog.latency_ms,
+                LLMCallLog.stop_reason,
+            ).filter(
+                LLMCallLog.model == model,
+                LLMCallLog.created_at >= since
+            ).order_by(LLMCallLog.created_at.desc()).limit(PREDICTOR_MAX_ROWS).all()
+        finally:
+            db.close()
+
+        samples: Dict[Tuple[str, bool], List[UsageSample]] = {}
+        for row in rows:
+            output_tokens = float(row.output_tokens)
+            if row.stop_reason == "max_tokens":
+                output_tokens *= TRUNCATED_INFLATION
+            samples.setdefault((row.phase, row.compressed), []).append(UsageSample(
+                units_for(row.phase, row.total_weeks, row.days_per_week),
+                output_tokens,
+                row.latency_ms,
+            ))
+
+        tokens = {}
+        latency = {}
+        for key, group in samples.items():
+            if len(group) < settings.AI_ADAPTIVE_MIN_SAMPLES:
+                continue
+            tokens[key] = _linear_fit([s.units for s in group], [s.output_tokens for s in group])
+            latency[key] = _linear_fit([s.output_tokens for s in group], [s.latency_ms for s in group])
+
+        return _ModelSnapshot(time.monotonic(), samples, tokens, latency)
+
+    def _fits(self, model: str, phase: str, compressed: bool) -> Tuple[Optional[LinearFit], Optional[LinearFit]]:
+        if not settings.AI_ADAPTIVE_GENERATION:
+            return None, None
+        snapshot = self._snapshots.get(model)
+        if snapshot is None:
+            return None, None
+        key = (phase, compressed)
+        return snapshot.tokens.get(key), snapshot.latency.get(key)
+
+    def predict_max_tokens(self, model: str, phase: str, compressed: bool, units: int, default: int) -> int:
+        """max_tokens al percentil objetivo, o `default` sin datos suficientes."""
+        tokens_fit, _ = self._fits(model, phase, compressed)
+        if tokens_fit is None:
+            return default
+
+        predicted = tokens_fit.predict(units) + _quantile(tokens_fit.residuals, settings.AI_MAX_TOKENS_PERCENTILE)
+        # Redondear a múltiplos de 256
+        max_tokens = int(math.ceil(predicted * SAFETY_MARGIN / 256) * 256)
+        return min(max(max_tokens, MIN_MAX_TOKENS), MAX_MAX_TOKENS)
+
+    def predict_latency_ms(self, model: str, phase: str, compressed: bool, units: int) -> Optional[float]:
+        """Latencia mediana esperada de una llamada, o None sin datos suficientes."""
+        tokens_fit, latency_fit = self._fits(model, phase, compressed)
+        if tokens_fit is None or latency_fit is None:
+            return None
+        output_tokens = tokens_fit.predict(units) + _quantile(tokens_fit.residuals, 0.5)
+        return latency_fit.predict(output_tokens) + _quantile(latency_fit.residuals, 0.5)
+
+    def prefers_phased(
+        self,
+        model: str,
+        compressed: bool,
+        total_weeks: int,
+        days_per_week: int
+    ) -> Optional[bool]:
+        """
+        True si generar en fases se estima más rápido que en una sola llamada.
+
+        Las progresiones corren en paralelo, así que la fase 2 cuenta como
+        una llamada. None si falta historial de alguna fase.
+        """
+        single = self.predict_latency_ms(
+            model, "single", compressed, units_for("single", total_weeks, days_per_week)
+        )
+        base_week = self.predict_latency_ms(
+            model, "base_week", compressed, units_for("base_week", total_weeks, days_per_week)
+        )
+        progression = self.predict_latency_ms(
+            model, "progression", compressed, units_for("progression", total_weeks, days_per_week)
+        )
+        if single is None or base_week is None or progression is None:
+            return None
+        return base_week + progression < single
+
+    def stats(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """Coeficientes ajustados por modelo y fase (para /api/ai/stats)."""
+        with self._lock:
+            snapshots = dict(self._snapshots)
+        return {
+            model: {
+                f"{phase}{'/compressed' if compressed else ''}": {
+                    "samples": len(snapshot.samples[(phase, compressed)]),
+                    "tokens_intercept": round(fit.intercept, 1),
+                    "tokens_per_unit": round(fit.slope, 1),
+                    "latency_ms_per_token": round(snapshot.latency[(phase, compressed)].slope, 3),
+                }
+                for (phase, compressed), fit in snapshot.tokens.items()
+            }
+            for model, snapshot in snapshots.items()
+        }
+
+
+token_predictor = TokenPredictor()
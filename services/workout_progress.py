@@ -0,0 +1,212 @@
+"""
+Servicio de progreso de entrenamientos por rango de fechas.
+
+Calcula series planeadas, series completadas y estado de cada día del
+programa activo con una sola query agregada (funciones de ventana), en vez de
+consultar training day, workout log y series día por día.
+"""
+from typing import Dict, List, Optional
+from datetime import date, timedelta
+from sqlalchemy import select, func, and_
+from sqlalchemy.orm import Session
+
+from models.mesocycle import Macrocycle, Mesocycle, Microcycle, TrainingDay, DayExercise, MesocycleStatus
+from models.workout_log import WorkoutLog, ExerciseSetLog, WorkoutStatus
+from schemas.workout_log import DayProgress, WeeklyProgressResponse
+
+# Estados de WorkoutLog que cuentan para el progreso
+PROGRESS_STATUSES = [WorkoutStatus.IN_PROGRESS.value, WorkoutStatus.COMPLETED.value]
+
+
+def get_day_name_es(day_number: int) -> str:
+    """Get Spanish day name from day number (1=Monday)"""
+    days = ["Lun", "Mar", "Mier", "Jue", "Vie", "Sab", "Dom"]
+    return days[(day_number - 1) % 7]
+
+
+def week_bounds(target_date: date) -> tuple:
+    """Devuelve (lunes, domingo) de la semana que contiene target_date."""
+    week_start = target_date - timedelta(days=target_date.weekday())
+    return week_start, week_start + timedelta(days=6)
+
+
+def get_active_macrocycle(db: Session, client_id: str) -> Optional[Macrocycle]:
+    """Obtiene el macrociclo activo de un cliente"""
+    return db.query(Macrocycle).filter(
+        Macrocycle.client_id == client_id,
+        Macrocycle.status == MesocycleStatus.ACTIVE
+    ).first()
+
+
+def fetch_day_progress_rows(
+    db: Session,
+    client_id: str,
+    macrocycle_id: str,
+    start_date: date,
+    end_date: date
+) -> Dict[date, dict]:
+    """
+    Obtiene el progreso de cada día con training day en el rango, en una query.
+
+    - days: training days del macrociclo en el rango, con sus series planeadas
+      y un ranking por fecha (si hay varios días en la misma fecha se usa uno)
+    - logs: WorkoutLogs en progreso/completados del cliente, rankeados por
+      started_at para quedarnos con el más reciente de cada training day
+    - completed_sets: conteo de series del workout log más reciente
+
+    Returns:
+        Dict fecha -> fila con training_day_id, name, rest_day, planned_sets,
+        completed_sets y log_status
+    """
+    planned_sets = select(
+        func.coalesce(func.sum(DayExercise.sets), 0)
+    ).where(
+        DayExercise.training_day_id == TrainingDay.id
+    ).scalar_subquery()
+
+    days = select(
+        TrainingDay.id.label("training_day_id"),
+        TrainingDay.date.label("date"),
+        TrainingDay.name.label("name"),
+        TrainingDay.rest_day.label("rest_day"),
+        planned_sets.label("planned_sets"),
+        func.row_number().over(
+            partition_by=TrainingDay.date,
+            order_by=(TrainingDay.day_number, TrainingDay.id)
+        ).label("day_rank"),
+    ).join(
+        Microcycle, TrainingDay.microcycle_id == Microcycle.id
+    ).join(
+        Mesocycle, Microcycle.mesocycle_id == Mesocycle.id
+    ).where(
+        Mesocycle.macrocycle_id == macrocycle_id,
+        TrainingDay.date >= start_date,
+        TrainingDay.date <= end_date
+    ).cte("days")
+
+    logs = select(
+        WorkoutLog.id.label("workout_log_id"),
+        WorkoutLog.training_day_id.label("training_day_id"),
+        WorkoutLog.status.label("status"),
+        func.row_number().over(
+            partition_by=WorkoutLog.training_day_id,
+            order_by=WorkoutLog.started_at.desc()
+        ).label("log_rank"),
+    ).where(
+        WorkoutLog.client_id == client_id,
+        WorkoutLog.status.in_(PROGRESS_STATUSES),
+        WorkoutLog.training_day_id.in_(select(days.c.training_day_id))
+    ).subquery("logs")
+
+    completed_sets = select(
+        func.count(ExerciseSetLog.id)
+    ).where(
+        ExerciseSetLog.workout_log_id == logs.c.workout_log_id
+    ).scalar_subquery()
+
+    query = select(
+        days.c.training_day_id,
+        days.c.date,
+        days.c.name,
+        days.c.rest_day,
+        days.c.planned_sets,
+        logs.c.status.label("log_status"),
+        completed_sets.label("completed_sets"),
+    ).select_from(
+        days.outerjoin(
+            logs,
+            and_(logs.c.training_day_id == days.c.training_day_id, logs.c.log_rank == 1)
+        )
+    ).where(
+        days.c.day_rank == 1
+    ).order_by(days.c.date)
+
+    return {row.date: row._asdict() for row in db.execute(query)}
+
+
+def _build_day_progress(current_date: date, row: Optional[dict]) -> DayProgress:
+    day_number = current_date.weekday() + 1  # 1=Monday
+    day_progress = DayProgress(
+        date=current_date,
+        day_number=day_number,
+        day_name=get_day_name_es(day_number),
+    )
+    if not row:
+        return day_progress
+
+    day_progress.training_day_id = row["training_day_id"]
+    day_progress.training_day_name = row["name"]
+    day_progress.is_rest_day = row["rest_day"]
+
+    if row["rest_day"]:
+        return day_progress
+
+    day_progress.has_workout = True
+    day_progress.total_sets = int(row["planned_sets"] or 0)
+
+    if row["log_status"] is not None:
+        day_progress.workout_status = row["log_status"]
+        day_progress.completed_sets = int(row["completed_sets"] or 0)
+        if day_progress.total_sets > 0:
+            day_progress.completion_percentage = round(
+                (day_progress.completed_sets / day_progress.total_sets) * 100, 1
+            )
+
+    return day_progress
+
+
+def build_weekly_progress(week_start: date, rows: Dict[date, dict]) -> WeeklyProgressResponse:
+    """Arma el WeeklyProgressResponse de la semana que empieza en week_start."""
+    days_progress: List[DayProgress] = []
+    total_workouts_planned = 0
+    total_workouts_completed = 0
+
+    for i in range(7):
+        current_date = week_start + timedelta(days=i)
+        day_progress = _build_day_progress(current_date, rows.get(current_date))
+        if day_progress.has_workout:
+            total_workouts_planned += 1
+            if day_progress.workout_status == WorkoutStatus.COMPLETED:
+                total_workouts_completed += 1
+        days_progress.append(day_progress)
+
+    overall_percentage = 0.0
+    if total_workouts_planned > 0:
+        overall_percentage = round((total_workouts_completed / total_workouts_planned) * 100, 1)
+
+    return WeeklyProgressResponse(
+        week_start=week_start,
+        week_end=week_start + timedelta(days=6),
+        days=days_progress,
+        total_workouts_planned=total_workouts_planned,
+        total_workouts_completed=total_workouts_completed,
+        overall_completion_percentage=overall_percentage
+    )
+
+
+def get_progress_weeks(
+    db: Session,
+    client_id: str,
+    macrocycle_id: Optional[str],
+    first_week_start: date,
+    weeks: int
+) -> List[WeeklyProgressResponse]:
+    """
+    Calcula el progreso de `weeks` semanas consecutivas con una sola query.
+
+    Args:
+        db: Sesión de base de datos
+        client_id: ID del cliente
+        macrocycle_id: Macrociclo activo (None = sin programa, semanas vacías)
+        first_week_start: Lunes de la primera semana
+        weeks: Número de semanas a calcular
+    """
+    end_date = first_week_start + timedelta(days=weeks * 7 - 1)
+    rows: Dict[date, dict] = {}
+    if macrocycle_id:
+        rows = fetch_day_progress_rows(db, client_id, macrocycle_id, first_week_start, end_date)
+
+    return [
+        build_weekly_progress(first_week_start + timedelta(weeks=i), rows)
+        for i in range(weeks)
+    ]
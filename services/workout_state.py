@@ -0,0 +1,147 @@
+"""
+Servicio para construir el estado de un workout en progreso.
+
+Carga el training day, sus ejercicios y todas las series registradas del
+workout en un número constante de queries y los agrupa en memoria, en lugar
+de consultar las series de cada DayExercise por separado.
+"""
+import hashlib
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+
+from models.mesocycle import TrainingDay, DayExercise
+from models.workout_log import WorkoutLog, ExerciseSetLog
+from schemas.workout_log import (
+    CurrentWorkoutState,
+    ExerciseProgress,
+    ExerciseSetLogResponse,
+    WorkoutLogResponse,
+)
+
+# Orden de fases para mostrar ejercicios (warmup -> main -> cooldown)
+PHASE_ORDER: Dict[str, int] = {"warmup": 0, "main": 1, "cooldown": 2}
+
+
+def _phase_sort_key(day_exercise: DayExercise) -> Tuple[int, int]:
+    phase = day_exercise.phase.value if day_exercise.phase else "main"
+    return PHASE_ORDER.get(phase, 1), day_exercise.order_index
+
+
+def _exercise_display_name(day_exercise: DayExercise) -> str:
+    exercise = day_exercise.exercise
+    if not exercise:
+        return "Unknown"
+    return exercise.name_es or exercise.name_en
+
+
+def compute_workout_state_etag(db: Session, workout_log: WorkoutLog) -> str:
+    """
+    Calcula un ETag débil para el estado del workout con una sola query agregada.
+
+    Se basa en la serie más reciente (created_at) y el número de series, además
+    del updated_at del WorkoutLog para que un cambio de status invalide el ETag.
+    La prescripción también cuenta: updated_at del training day y el updated_at
+    más reciente y número de sus day exercises (ediciones, altas y bajas).
+    """
+    newest_set, set_count, day_updated, newest_exercise, exercise_count = db.query(
+        func.max(ExerciseSetLog.created_at),
+        func.count(ExerciseSetLog.id),
+        select(TrainingDay.updated_at).where(
+            TrainingDay.id == workout_log.training_day_id
+        ).scalar_subquery(),
+        select(func.max(DayExercise.updated_at)).where(
+            DayExercise.training_day_id == workout_log.training_day_id
+        ).scalar_subquery(),
+        select(func.count(DayExercise.id)).where(
+            DayExercise.training_day_id == workout_log.training_day_id
+        ).scalar_subquery(),
+    ).filter(
+        ExerciseSetLog.workout_log_id == workout_log.id
+    ).one()
+
+    parts = [
+        workout_log.id,
+        workout_log.updated_at.isoformat() if workout_log.updated_at else "",
+        newest_set.isoformat() if newest_set else "",
+        str(set_count or 0),
+        day_updated.isoformat() if day_updated else "",
+        newest_exercise.isoformat() if newest_exercise else "",
+        str(exercise_count or 0),
+    ]
+    digest = hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Compara el header If-None-Match contra un ETag (soporta listas y '*')."""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def build_workout_state(db: Session, workout_log: WorkoutLog) -> CurrentWorkoutState:
+    """
+    Construye el CurrentWorkoutState de un workout.
+
+    Queries: training day + day exercises (selectin) + exercises (joined),
+    y todas las series del workout en una sola query. No depende del
+    número de ejercicios del día.
+
+    Args:
+        db: Sesión de base de datos
+        workout_log: WorkoutLog ya cargado y con acceso verificado
+
+    Returns:
+        CurrentWorkoutState con el progreso agrupado por ejercicio
+    """
+    training_day = db.query(TrainingDay).options(
+        selectinload(TrainingDay.exercises).joinedload(DayExercise.exercise)
+    ).filter(
+        TrainingDay.id == workout_log.training_day_id
+    ).first()
+
+    set_logs: List[ExerciseSetLog] = db.query(ExerciseSetLog).filter(
+        ExerciseSetLog.workout_log_id == workout_log.id
+    ).order_by(
+        ExerciseSetLog.day_exercise_id,
+        ExerciseSetLog.set_number
+    ).all()
+
+    # Reutilizar las series ya cargadas para WorkoutLogResponse.exercise_sets
+    # (evita el lazy-load de la relación al serializar)
+    set_committed_value(workout_log, "exercise_sets", set_logs)
+
+    sets_by_exercise: Dict[str, List[ExerciseSetLog]] = {}
+    for set_log in set_logs:
+        sets_by_exercise.setdefault(set_log.day_exercise_id, []).append(set_log)
+
+    exercises_progress = []
+    completed_exercises = 0
+
+    for day_exercise in sorted(training_day.exercises, key=_phase_sort_key):
+        completed_sets = sets_by_exercise.get(day_exercise.id, [])
+
+        is_completed = len(completed_sets) >= day_exercise.sets
+        if is_completed:
+            completed_exercises += 1
+
+        exercises_progress.append(ExerciseProgress(
+            day_exercise_id=day_exercise.id,
+            exercise_name=_exercise_display_name(day_exercise),
+            total_sets=day_exercise.sets,
+            completed_sets=len(completed_sets),
+            is_completed=is_completed,
+            sets_data=[ExerciseSetLogResponse.model_validate(s) for s in completed_sets]
+        ))
+
+    return CurrentWorkoutState(
+        workout_log=WorkoutLogResponse.model_validate(workout_log),
+        training_day_name=training_day.name,
+        training_day_focus=training_day.focus,
+        total_exercises=len(training_day.exercises),
+        completed_exercises=completed_exercises,
+        exercises_progress=exercises_progress
+    )
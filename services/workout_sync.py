@@ -0,0 +1,120 @@
+"""
+Servicio de sincronización incremental (delta sync) para la app móvil.
+
+Devuelve sólo los WorkoutLog, ExerciseSetLog y tombstones de un cliente que
+cambiaron después de un cursor opaco. Cada flujo se pagina por keyset
+(sync_txid, id) sobre los índices (client_id, sync_txid, id), así una
+sincronización en caliente cuesta unas pocas filas en vez de todo el historial.
+
+sync_txid es el txid de la transacción que escribió la fila. Sólo se devuelven
+filas con sync_txid menor que el xmin del snapshot actual: esas transacciones
+ya terminaron, así que ninguna fila con un txid menor puede aparecer después
+de emitir el cursor, por mucho que tarde su commit. Una transacción larga en
+curso sólo retrasa el sync, nunca hace saltar filas.
+"""
+import base64
+import json
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.orm import Session
+
+from models.workout_log import WorkoutLog, ExerciseSetLog
+from models.sync_tombstone import SyncTombstone
+
+# Flujos del cursor: clave corta -> modelo (todos con sync_txid)
+_STREAMS = {
+    "w": WorkoutLog,
+    "s": ExerciseSetLog,
+    "t": SyncTombstone,
+}
+
+
+class InvalidSyncCursor(ValueError):
+    """El cursor recibido no es válido"""
+
+
+def encode_sync_cursor(positions: Dict[str, Tuple[int, str]]) -> str:
+    payload = {key: [txid, row_id] for key, (txid, row_id) in positions.items()}
+    raw = json.dumps(payload, separators=(",", ":"), sort_keys=True).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_sync_cursor(cursor: Optional[str]) -> Dict[str, Tuple[int, str]]:
+    """
+    Posiciones por flujo del cursor.
+
+    Las posiciones de cursores anteriores (por updated_at) se descartan: ese
+    flujo se vuelve a sincronizar completo.
+    """
+    if not cursor:
+        return {}
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return {
+            key: (value[0], value[1])
+            for key, value in payload.items()
+            if key in _STREAMS and isinstance(value[0], int)
+        }
+    except (ValueError, TypeError, KeyError, IndexError) as e:
+        raise InvalidSyncCursor("Invalid sync cursor") from e
+
+
+def _fetch_stream(
+    db: Session,
+    key: str,
+    client_id: str,
+    since: Optional[Tuple[int, str]],
+    until: int,
+    limit: int
+) -> list:
+    model = _STREAMS[key]
+    query = db.query(model).filter(
+        model.client_id == client_id,
+        model.sync_txid < until
+    )
+    if since:
+        since_txid, since_id = since
+        query = query.filter(
+            or_(model.sync_txid > since_txid, and_(model.sync_txid == since_txid, model.id > since_id))
+        )
+    return query.order_by(model.sync_txid, model.id).limit(limit + 1).all()
+
+
+def fetch_changes(
+    db: Session,
+    client_id: str,
+    cursor: Optional[str],
+    limit: int
+) -> Tuple[Dict[str, list], str, bool]:
+    """
+    Obtiene los cambios de un cliente posteriores al cursor.
+
+    Args:
+        db: Sesión de base de datos
+        client_id: ID del cliente
+        cursor: Cursor opaco devuelto por el sync anterior (None = sync completo)
+        limit: Máximo de filas por flujo
+
+    Returns:
+        (cambios por flujo {"w", "s", "t"}, nuevo cursor, has_more)
+    """
+    positions = decode_sync_cursor(cursor)
+    # Transacciones con txid menor ya terminaron (commit o rollback)
+    until = db.execute(select(func.txid_snapshot_xmin(func.txid_current_snapshot()))).scalar()
+
+    changes: Dict[str, list] = {}
+    has_more = False
+
+    for key in _STREAMS:
+        rows = _fetch_stream(db, key, client_id, positions.get(key), until, limit)
+        if len(rows) > limit:
+            has_more = True
+            rows = rows[:limit]
+        changes[key] = rows
+
+        if rows:
+            last = rows[-1]
+            positions[key] = (last.sync_txid, last.id)
+
+    return changes, encode_sync_cursor(positions), has_more
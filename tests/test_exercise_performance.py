@@ -0,0 +1,80 @@
+"""Tests de la agregación por (cliente, ejercicio, fecha) del historial de rendimiento."""
+from datetime import date
+
+import pytest
+
+from services.exercise_performance import aggregate_sets, estimate_1rm
+
+DAY = date(2024, 5, 6)
+
+
+def test_estimate_1rm():
+    assert estimate_1rm(100, 1) == 100
+    assert estimate_1rm(100, 10) == pytest.approx(133.33)
+    assert estimate_1rm(None, 5) is None
+    assert estimate_1rm(100, 0) is None
+
+
+def test_aggregates_sums_and_maxima_per_day():
+    aggregates = aggregate_sets([
+        ("c1", "squat", DAY, 5, 100.0),
+        ("c1", "squat", DAY, 8, 90.0),
+        ("c1", "squat", DAY, 3, 105.0),
+    ])
+
+    agg = aggregates[("c1", "squat", DAY)]
+    assert agg["total_sets"] == 3
+    assert agg["total_reps"] == 16
+    assert agg["volume_load"] == pytest.approx(5 * 100 + 8 * 90 + 3 * 105)
+    assert agg["best_e1rm"] == max(estimate_1rm(100, 5), estimate_1rm(90, 8), estimate_1rm(105, 3))
+    assert (agg["top_set_weight_kg"], agg["top_set_reps"]) == (105.0, 3)
+
+
+def test_top_set_ties_on_weight_are_broken_by_reps():
+    agg = aggregate_sets([
+        ("c1", "bench", DAY, 5, 80.0),
+        ("c1", "bench", DAY, 7, 80.0),
+        ("c1", "bench", DAY, 6, 80.0),
+    ])[("c1", "bench", DAY)]
+
+    assert (agg["top_set_weight_kg"], agg["top_set_reps"]) == (80.0, 7)
+
+
+def test_bodyweight_sets_count_reps_without_volume():
+    agg = aggregate_sets([
+        ("c1", "pullup", DAY, 10, None),
+        ("c1", "pullup", DAY, 12, None),
+        ("c1", "pullup", DAY, None, None),
+    ])[("c1", "pullup", DAY)]
+
+    assert agg["total_sets"] == 3
+    assert agg["total_reps"] == 22
+    assert agg["volume_load"] == 0.0
+    assert agg["best_e1rm"] is None
+    assert (agg["top_set_weight_kg"], agg["top_set_reps"]) == (None, 12)
+
+
+def test_weighted_set_beats_bodyweight_top_set():
+    agg = aggregate_sets([
+        ("c1", "dip", DAY, 15, None),
+        ("c1", "dip", DAY, 6, 10.0),
+        ("c1", "dip", DAY, 20, None),
+    ])[("c1", "dip", DAY)]
+
+    assert (agg["top_set_weight_kg"], agg["top_set_reps"]) == (10.0, 6)
+
+
+def test_keys_split_by_client_exercise_and_day():
+    other_day = date(2024, 5, 7)
+    aggregates = aggregate_sets([
+        ("c1", "squat", DAY, 5, 100.0),
+        ("c2", "squat", DAY, 5, 100.0),
+        ("c1", "deadlift", DAY, 5, 140.0),
+        ("c1", "squat", other_day, 5, 100.0),
+    ])
+
+    assert set(aggregates) == {
+        ("c1", "squat", DAY), ("c2", "squat", DAY),
+        ("c1", "deadlift", DAY), ("c1", "squat", other_day),
+    }
+    assert all(agg["total_sets"] == 1 for agg in aggregates.values())
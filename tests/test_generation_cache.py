@@ -0,0 +1,114 @@
+"""Tests de la clave de la caché de generación y del LRU en memoria."""
+import time
+
+import pytest
+
+from core.config import settings
+from schemas.ai_generator import AIWorkoutRequest
+from services.generation_cache import MemoryLRUCache, generation_cache_key
+
+FINGERPRINT = "catalog-v1"
+MODEL = "claude-test"
+
+
+def _request(**overrides):
+    data = {
+        "user_profile": {"fitness_level": "intermediate", "age": 30, "weight_kg": 80},
+        "goals": {"primary_goal": "hypertrophy"},
+        "availability": {"days_per_week": 4, "session_duration_minutes": 60},
+        "equipment": {"has_gym_access": True, "available_equipment": ["barbell", "dumbbells"]},
+        "program_duration": {"total_weeks": 8, "mesocycle_weeks": 4, "start_date": "2024-06-03"},
+        "client_id": "client-1",
+        "patient_context": {
+            "identity": {"full_name": "Ana Pérez", "document_id": "123"},
+            "contact": {"email": "ana@example.com"},
+            "lifestyle": {"sleep_hours": 7},
+            "context_version": "v1",
+        },
+    }
+    for path, value in overrides.items():
+        target = data
+        *parents, field = path.split("__")
+        for parent in parents:
+            target = target[parent]
+        target[field] = value
+    return AIWorkoutRequest.model_validate(data)
+
+
+def _key(request, kind="full", model=MODEL, fingerprint=FINGERPRINT):
+    return generation_cache_key(request, fingerprint, kind, model)
+
+
+@pytest.fixture
+def base_key():
+    return _key(_request())
+
+
+@pytest.mark.parametrize("overrides", [
+    {"client_id": "client-2"},
+    {"client_id": None},
+    {"template_name": "Plantilla hipertrofia"},
+    {"creation_mode": "template"},
+    {"context_version": "v9"},
+    {"program_duration__start_date": "2025-01-06"},
+    {"patient_context__identity": {"full_name": "Otra Persona"}},
+    {"patient_context__contact": None},
+    {"patient_context__context_version": "v2"},
+    {"additional_notes": None},
+])
+def test_fields_outside_the_prompt_do_not_change_the_key(base_key, overrides):
+    assert _key(_request(**overrides)) == base_key
+
+
+@pytest.mark.parametrize("overrides", [
+    {"goals__primary_goal": "strength"},
+    {"availability__days_per_week": 5},
+    {"program_duration__total_weeks": 12},
+    {"equipment__available_equipment": ["barbell"]},
+    {"patient_context__lifestyle": {"sleep_hours": 5}},
+    {"additional_notes": "Rodilla izquierda sensible"},
+])
+def test_prompt_fields_change_the_key(base_key, overrides):
+    assert _key(_request(**overrides)) != base_key
+
+
+def test_kind_model_and_catalog_are_part_of_the_key(base_key):
+    request = _request()
+    assert _key(request, kind="preview") != base_key
+    assert _key(request, model="other-model") != base_key
+    assert _key(request, fingerprint="catalog-v2") != base_key
+
+
+def test_generation_flags_are_part_of_the_key(base_key, monkeypatch):
+    monkeypatch.setattr(settings, "AI_USE_PHASED_GENERATION", not settings.AI_USE_PHASED_GENERATION)
+    assert _key(_request()) != base_key
+
+
+def test_key_is_stable_hex_digest(base_key):
+    key = _key(_request())
+    assert key == base_key
+    assert len(key) == 64
+    int(key, 16)
+
+
+def test_memory_lru_evicts_least_recently_used():
+    cache = MemoryLRUCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    assert cache.get("a") == "1"  # "b" pasa a ser el menos usado
+    cache.set("c", "3")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.get("c") == "3"
+    assert len(cache) == 2
+
+
+def test_memory_lru_expires_entries(monkeypatch):
+    cache = MemoryLRUCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", "1")
+
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 61)
+    assert cache.get("a") is None
+    assert len(cache) == 0
@@ -0,0 +1,79 @@
+"""Tests del extractor incremental de objetos en respuestas JSON en streaming."""
+import json
+
+import pytest
+
+from services.incremental_json import StreamingObjectExtractor
+
+DOCUMENT = json.dumps({
+    "meta": {"note": "llaves { y [ dentro de un string", "td": "no es arreglo"},
+    "training_days": [
+        {"n": 1, "name": "Empuje \"A\"", "ex": [{"id": "e1"}, {"id": "e2"}]},
+        {"n": 2, "name": "Tirón \\ espalda", "notes": "}]},{"},
+        {"n": 3, "name": "Piernas", "ex": []},
+    ],
+    "td": [{"n": 4}],
+}, ensure_ascii=False)
+
+EXPECTED = [
+    {"n": 1, "name": "Empuje \"A\"", "ex": [{"id": "e1"}, {"id": "e2"}]},
+    {"n": 2, "name": "Tirón \\ espalda", "notes": "}]},{"},
+    {"n": 3, "name": "Piernas", "ex": []},
+    {"n": 4},
+]
+
+
+def _feed_in_chunks(text, size):
+    extractor = StreamingObjectExtractor(["training_days", "td"])
+    found = []
+    for start in range(0, len(text), size):
+        found.extend(extractor.feed(text[start:start + size]))
+    return extractor, found
+
+
+def test_whole_document():
+    extractor, found = _feed_in_chunks(DOCUMENT, len(DOCUMENT))
+    assert found == EXPECTED
+    assert extractor.text == DOCUMENT
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 16])
+def test_chunk_boundaries_anywhere(size):
+    # Con fragmentos de 1-3 caracteres hay cortes dentro de strings, escapes y claves
+    _, found = _feed_in_chunks(DOCUMENT, size)
+    assert found == EXPECTED
+
+
+def test_split_inside_escape_sequence():
+    extractor = StreamingObjectExtractor(["td"])
+    assert extractor.feed('{"td": [{"s": "a\\') == []
+    assert extractor.feed('"b"}, ') == [{"s": 'a"b'}]
+    assert extractor.feed('{"s": "c"}]}') == [{"s": "c"}]
+
+
+def test_split_inside_key():
+    extractor = StreamingObjectExtractor(["training_days"])
+    assert extractor.feed('{"training_') == []
+    assert extractor.feed('days": [{"n": 1}]}') == [{"n": 1}]
+
+
+def test_escaped_key_is_decoded():
+    extractor = StreamingObjectExtractor(["td"])
+    assert extractor.feed('{"\\u0074d": [{"n": 1}]}') == [{"n": 1}]
+
+
+def test_preamble_before_first_brace_is_ignored():
+    extractor = StreamingObjectExtractor(["td"])
+    text = 'Aquí va el programa ("td": [x]) ```json\n{"td": [{"n": 1}]}\n```'
+    assert extractor.feed(text) == [{"n": 1}]
+
+
+def test_objects_outside_listed_arrays_are_not_emitted():
+    extractor = StreamingObjectExtractor(["td"])
+    assert extractor.feed('{"other": [{"n": 1}], "td": {"n": 2}, "nested": {"td": [{"n": 3}]}}') == [{"n": 3}]
+
+
+def test_truncated_document_emits_only_completed_objects():
+    text = DOCUMENT[:DOCUMENT.index('"n": 3')]
+    _, found = _feed_in_chunks(text, 5)
+    assert found == EXPECTED[:2]
@@ -0,0 +1,102 @@
+"""Tests del semáforo con cola de prioridad para las llamadas a la IA."""
+import asyncio
+
+import pytest
+
+from services.llm_client import LLMPriority, PriorityLimiter
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+async def test_acquires_immediately_below_limit():
+    limiter = PriorityLimiter(2)
+    await limiter.acquire(LLMPriority.GENERATION)
+    await limiter.acquire(LLMPriority.GENERATION)
+    assert limiter.stats() == {"limit": 2, "active": 2, "queued": 0, "queued_previews": 0}
+
+    limiter.release()
+    limiter.release()
+    assert limiter.stats()["active"] == 0
+
+
+async def test_previews_first_then_arrival_order():
+    limiter = PriorityLimiter(1)
+    await limiter.acquire(LLMPriority.GENERATION)
+    order = []
+
+    async def worker(name, priority):
+        async with limiter.slot(priority):
+            order.append(name)
+            await asyncio.sleep(0)
+
+    tasks = [
+        asyncio.create_task(worker("gen-1", LLMPriority.GENERATION)),
+        asyncio.create_task(worker("preview-1", LLMPriority.PREVIEW)),
+        asyncio.create_task(worker("gen-2", LLMPriority.GENERATION)),
+        asyncio.create_task(worker("preview-2", LLMPriority.PREVIEW)),
+    ]
+    await _settle()
+    assert limiter.stats() == {"limit": 1, "active": 1, "queued": 4, "queued_previews": 2}
+
+    limiter.release()
+    await asyncio.gather(*tasks)
+
+    assert order == ["preview-1", "preview-2", "gen-1", "gen-2"]
+    assert limiter.stats()["active"] == 0
+
+
+async def test_free_slot_goes_to_queue_before_newcomers():
+    limiter = PriorityLimiter(1)
+    await limiter.acquire(LLMPriority.PREVIEW)
+    waiting = asyncio.create_task(limiter.acquire(LLMPriority.GENERATION))
+    await _settle()
+
+    limiter.release()
+    newcomer = asyncio.create_task(limiter.acquire(LLMPriority.PREVIEW))
+    await _settle()
+
+    assert waiting.done()
+    assert not newcomer.done()
+    limiter.release()
+    await newcomer
+    limiter.release()
+    assert limiter.stats()["active"] == 0
+
+
+async def test_cancelled_waiter_is_skipped():
+    limiter = PriorityLimiter(1)
+    await limiter.acquire(LLMPriority.GENERATION)
+    cancelled = asyncio.create_task(limiter.acquire(LLMPriority.PREVIEW))
+    waiting = asyncio.create_task(limiter.acquire(LLMPriority.GENERATION))
+    await _settle()
+
+    cancelled.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await cancelled
+    assert limiter.stats()["queued"] == 1
+
+    limiter.release()
+    await waiting
+    assert limiter.stats() == {"limit": 1, "active": 1, "queued": 0, "queued_previews": 0}
+
+
+async def test_cancel_after_handoff_passes_the_slot_on():
+    limiter = PriorityLimiter(1)
+    await limiter.acquire(LLMPriority.GENERATION)
+    first = asyncio.create_task(limiter.acquire(LLMPriority.PREVIEW))
+    second = asyncio.create_task(limiter.acquire(LLMPriority.GENERATION))
+    await _settle()
+
+    # El cupo se entrega a `first`, que se cancela antes de reanudarse
+    limiter.release()
+    first.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await first
+
+    await asyncio.wait_for(second, timeout=1)
+    assert limiter.stats()["active"] == 1
+    limiter.release()
+    assert limiter.stats()["active"] == 0
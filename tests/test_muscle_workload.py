@@ -0,0 +1,142 @@
+"""Tests del estado incremental de carga aguda:crónica por músculo."""
+from datetime import date, timedelta
+
+import pytest
+
+from models.muscle_workload import MuscleWorkload
+from services.muscle_workload import (
+    ACUTE_LAMBDA,
+    CHRONIC_LAMBDA,
+    CHRONIC_WINDOW_DAYS,
+    _new_state,
+    apply_load,
+    decay_workload,
+    workload_risk,
+)
+
+START = date(2024, 1, 1)
+
+
+def _state(load_date=START):
+    return MuscleWorkload(**_new_state("c1", "chest", load_date))
+
+
+def _day(offset):
+    return START + timedelta(days=offset)
+
+
+def test_first_load_seeds_ewma_and_windows():
+    state = _state()
+    apply_load(state, START, 1000.0)
+
+    assert state.acute_ewma == pytest.approx(ACUTE_LAMBDA * 1000)
+    assert state.chronic_ewma == pytest.approx(CHRONIC_LAMBDA * 1000)
+    assert state.daily_loads == {START.isoformat(): 1000.0}
+    assert state.acute_load == 1000.0
+    assert state.chronic_load == pytest.approx(250.0)
+    assert state.acwr_simple == 4.0
+
+
+def test_ewma_decays_over_rest_days():
+    state = _state()
+    apply_load(state, START, 1000.0)
+    apply_load(state, _day(3), 500.0)
+
+    acute = ACUTE_LAMBDA * 1000 * (1 - ACUTE_LAMBDA) ** 3 + ACUTE_LAMBDA * 500
+    chronic = CHRONIC_LAMBDA * 1000 * (1 - CHRONIC_LAMBDA) ** 3 + CHRONIC_LAMBDA * 500
+    assert state.last_load_date == _day(3)
+    assert state.acute_ewma == pytest.approx(acute)
+    assert state.chronic_ewma == pytest.approx(chronic)
+    assert state.acwr_ewma == pytest.approx(round(acute / chronic, 3))
+
+
+def test_late_load_matches_in_order_application():
+    in_order = _state()
+    apply_load(in_order, START, 1000.0)
+    apply_load(in_order, _day(2), 800.0)
+    apply_load(in_order, _day(5), 600.0)
+
+    late = _state()
+    apply_load(late, START, 1000.0)
+    apply_load(late, _day(5), 600.0)
+    apply_load(late, _day(2), 800.0)  # Workout completado tarde
+
+    assert late.acute_ewma == pytest.approx(in_order.acute_ewma)
+    assert late.chronic_ewma == pytest.approx(in_order.chronic_ewma)
+    assert late.daily_loads == in_order.daily_loads
+    assert late.last_load_date == in_order.last_load_date
+
+
+def test_daily_loads_keep_only_the_chronic_window():
+    state = _state()
+    for offset in range(0, 40, 2):
+        apply_load(state, _day(offset), 100.0)
+
+    window_start = (state.last_load_date - timedelta(days=CHRONIC_WINDOW_DAYS - 1)).isoformat()
+    assert min(state.daily_loads) >= window_start
+    assert len(state.daily_loads) == 14
+
+    # Una carga anterior a la ventana mueve las EWMA pero no las ventanas simples
+    before = dict(state.daily_loads)
+    apply_load(state, START, 100.0)
+    assert state.daily_loads == before
+
+
+def test_negative_load_undoes_a_reopened_workout():
+    state = _state()
+    apply_load(state, START, 1000.0)
+    apply_load(state, _day(4), 700.0)
+    expected_acute, expected_chronic = state.acute_ewma, state.chronic_ewma
+    expected_daily = dict(state.daily_loads)
+
+    apply_load(state, _day(2), 300.0)
+    apply_load(state, _day(2), -300.0)
+
+    assert state.acute_ewma == pytest.approx(expected_acute)
+    assert state.chronic_ewma == pytest.approx(expected_chronic)
+    assert state.daily_loads == expected_daily
+
+
+def test_removing_all_load_clamps_at_zero():
+    state = _state()
+    apply_load(state, START, 1000.0)
+    apply_load(state, START, -1000.0)
+
+    assert state.acute_ewma >= 0
+    assert state.chronic_ewma >= 0
+    assert state.daily_loads == {}
+    assert state.acwr_simple is None
+
+
+def test_decay_on_read_does_not_touch_the_row():
+    state = _state()
+    apply_load(state, START, 1000.0)
+    stored = (state.acute_ewma, state.chronic_ewma, dict(state.daily_loads))
+
+    snapshot = decay_workload(state, _day(10))
+
+    assert snapshot.acute_ewma == pytest.approx(stored[0] * (1 - ACUTE_LAMBDA) ** 10)
+    assert snapshot.chronic_ewma == pytest.approx(stored[1] * (1 - CHRONIC_LAMBDA) ** 10)
+    assert snapshot.acute_load == 0  # Fuera de la ventana aguda
+    assert snapshot.chronic_load == pytest.approx(250.0)
+    assert snapshot.acwr_simple == 0
+    assert (state.acute_ewma, state.chronic_ewma, state.daily_loads) == stored
+
+    # Pasada la ventana crónica ya no queda carga
+    assert decay_workload(state, _day(CHRONIC_WINDOW_DAYS)).acwr_simple is None
+
+
+def test_decay_before_last_load_date_is_a_no_op():
+    state = _state()
+    apply_load(state, _day(5), 1000.0)
+    snapshot = decay_workload(state, START)
+
+    assert snapshot.acute_ewma == state.acute_ewma
+    assert snapshot.acute_load == state.acute_load
+
+
+@pytest.mark.parametrize("acwr, risk", [
+    (None, None), (0.5, "low"), (0.8, "optimal"), (1.3, "optimal"), (1.4, "high"), (1.5, "high_risk"),
+])
+def test_workload_risk(acwr, risk):
+    assert workload_risk(acwr) == risk
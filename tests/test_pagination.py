@@ -0,0 +1,84 @@
+"""Tests de core.pagination: cursores opacos y paginación keyset/offset."""
+from datetime import date, datetime
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import Column, Date, Integer, String, create_engine
+from sqlalchemy.orm import Session, declarative_base
+
+from core.pagination import decode_cursor, encode_cursor, paginate
+from models.mesocycle import MesocycleStatus
+
+Base = declarative_base()
+
+
+class Row(Base):
+    __tablename__ = "rows"
+
+    id = Column(String, primary_key=True)
+    performed_on = Column(Date, nullable=False)
+    position = Column(Integer, nullable=False)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        # Fechas repetidas para que el desempate por id importe
+        session.add_all([
+            Row(id=f"r{i:02d}", performed_on=date(2024, 1, 1 + i // 3), position=i)
+            for i in range(10)
+        ])
+        session.commit()
+        yield session
+
+
+def test_cursor_round_trip_keeps_types():
+    values = [datetime(2024, 3, 1, 8, 30), date(2024, 3, 1), MesocycleStatus.ACTIVE, 42, "abc", None]
+    cursor = encode_cursor(values)
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor, len(values)) == [
+        datetime(2024, 3, 1, 8, 30), date(2024, 3, 1), MesocycleStatus.ACTIVE.value, 42, "abc", None
+    ]
+
+
+@pytest.mark.parametrize("cursor", ["not-base64!", encode_cursor([1]), encode_cursor([1, 2, 3]), "e30"])
+def test_decode_cursor_rejects_malformed_or_wrong_size(cursor):
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(cursor, 2)
+    assert exc.value.status_code == 400
+
+
+@pytest.mark.parametrize("descending", [False, True])
+def test_keyset_pages_cover_every_row_once(db, descending):
+    sort_columns = [Row.performed_on, Row.id]
+    seen = []
+    cursor = None
+    while True:
+        rows, cursor = paginate(db.query(Row), sort_columns, descending, limit=4, cursor=cursor)
+        seen.extend(row.id for row in rows)
+        if cursor is None:
+            break
+
+    expected = sorted((f"r{i:02d}" for i in range(10)), reverse=descending)
+    assert seen == expected
+
+
+def test_last_page_has_no_cursor(db):
+    rows, cursor = paginate(db.query(Row), [Row.performed_on, Row.id], False, limit=10)
+    assert len(rows) == 10
+    assert cursor is None
+
+
+def test_skip_is_used_without_cursor(db):
+    rows, cursor = paginate(db.query(Row), [Row.performed_on, Row.id], False, limit=3, skip=4)
+    assert [row.id for row in rows] == ["r04", "r05", "r06"]
+    assert cursor is not None
+
+
+def test_cursor_takes_precedence_over_skip(db):
+    _, cursor = paginate(db.query(Row), [Row.performed_on, Row.id], False, limit=3)
+    rows, _ = paginate(db.query(Row), [Row.performed_on, Row.id], False, limit=3, cursor=cursor, skip=8)
+    assert [row.id for row in rows] == ["r03", "r04", "r05"]
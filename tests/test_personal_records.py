@@ -0,0 +1,67 @@
+"""Tests de la detección de récords personales sobre la fila compacta."""
+import pytest
+
+from models.exercise_performance import ExercisePersonalBest, PersonalRecordType
+from services.exercise_performance import estimate_1rm
+from services.personal_records import MAX_REP_MAX_REPS, apply_set
+
+
+@pytest.fixture
+def best():
+    return ExercisePersonalBest(client_id="c1", exercise_id="squat", best_e1rm=None, rep_maxes={})
+
+
+def test_first_mark_is_baseline_not_record(best):
+    assert apply_set(best, 5, 100.0) == []
+    assert best.best_e1rm == estimate_1rm(100.0, 5)
+    assert best.rep_maxes == {"5": 100.0}
+
+
+def test_heavier_set_beats_e1rm_and_rep_max(best):
+    apply_set(best, 5, 100.0)
+    records = apply_set(best, 5, 105.0)
+
+    assert records == [
+        {"record_type": PersonalRecordType.E1RM, "value": estimate_1rm(105.0, 5),
+         "previous_value": estimate_1rm(100.0, 5)},
+        {"record_type": PersonalRecordType.REP_MAX, "value": 105.0, "previous_value": 100.0},
+    ]
+    assert best.rep_maxes == {"5": 105.0}
+
+
+def test_new_rep_count_is_baseline_for_rep_max(best):
+    apply_set(best, 5, 100.0)
+    records = apply_set(best, 3, 110.0)  # e1RM mayor, pero primeras 3 reps
+
+    assert [r["record_type"] for r in records] == [PersonalRecordType.E1RM]
+    assert best.rep_maxes == {"5": 100.0, "3": 110.0}
+
+
+def test_equal_or_lighter_set_is_not_a_record(best):
+    apply_set(best, 5, 100.0)
+    assert apply_set(best, 5, 100.0) == []
+    assert apply_set(best, 5, 95.0) == []
+    assert best.rep_maxes == {"5": 100.0}
+
+
+def test_rep_max_limited_to_max_reps(best):
+    apply_set(best, MAX_REP_MAX_REPS + 5, 40.0)
+    assert best.rep_maxes == {}
+
+    apply_set(best, MAX_REP_MAX_REPS, 40.0)
+    records = apply_set(best, MAX_REP_MAX_REPS, 45.0)
+    assert {"record_type": PersonalRecordType.REP_MAX, "value": 45.0, "previous_value": 40.0} in records
+
+
+@pytest.mark.parametrize("reps, weight_kg", [(0, 100.0), (None, 100.0), (5, None), (5, 0)])
+def test_sets_without_reps_or_weight_are_ignored(best, reps, weight_kg):
+    assert apply_set(best, reps, weight_kg) == []
+    assert best.best_e1rm is None
+    assert best.rep_maxes == {}
+
+
+def test_rep_maxes_is_reassigned_for_change_tracking(best):
+    original = best.rep_maxes
+    apply_set(best, 5, 100.0)
+    assert best.rep_maxes is not original
+    assert original == {}
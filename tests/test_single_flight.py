@@ -0,0 +1,110 @@
+"""Tests de la coalescencia de llamadas idénticas concurrentes."""
+import asyncio
+
+import pytest
+
+from services.single_flight import SingleFlight
+
+
+class _Factory:
+    """Factory que cuenta sus llamadas y termina cuando se libera `gate`."""
+
+    def __init__(self, result="programa", error=None):
+        self.calls = 0
+        self.gate = asyncio.Event()
+        self.result = result
+        self.error = error
+
+    async def __call__(self):
+        self.calls += 1
+        await self.gate.wait()
+        if self.error:
+            raise self.error
+        return self.result
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+async def test_concurrent_calls_share_one_execution():
+    flights = SingleFlight()
+    factory = _Factory()
+
+    tasks = [asyncio.create_task(flights.run("k", factory)) for _ in range(3)]
+    await _settle()
+    assert flights.stats() == {"in_flight": 1, "coalesced": 2}
+
+    factory.gate.set()
+    results = await asyncio.gather(*tasks)
+
+    assert factory.calls == 1
+    assert results == [("programa", True), ("programa", False), ("programa", False)]
+    assert flights.stats()["in_flight"] == 0
+
+
+async def test_different_keys_run_separately():
+    flights = SingleFlight()
+    first, second = _Factory("a"), _Factory("b")
+    tasks = [asyncio.create_task(flights.run("k1", first)), asyncio.create_task(flights.run("k2", second))]
+    await _settle()
+    first.gate.set()
+    second.gate.set()
+
+    assert await asyncio.gather(*tasks) == [("a", True), ("b", True)]
+    assert flights.stats()["coalesced"] == 0
+
+
+async def test_finished_flight_is_not_reused():
+    flights = SingleFlight()
+    factory = _Factory()
+    factory.gate.set()
+
+    assert await flights.run("k", factory) == ("programa", True)
+    assert await flights.run("k", factory) == ("programa", True)
+    assert factory.calls == 2
+
+
+async def test_exception_reaches_every_waiter():
+    flights = SingleFlight()
+    factory = _Factory(error=ValueError("respuesta inválida"))
+    tasks = [asyncio.create_task(flights.run("k", factory)) for _ in range(2)]
+    await _settle()
+    factory.gate.set()
+
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    assert all(isinstance(result, ValueError) for result in results)
+    assert factory.calls == 1
+
+
+async def test_cancelled_leader_does_not_cancel_waiters():
+    flights = SingleFlight()
+    factory = _Factory()
+    leader = asyncio.create_task(flights.run("k", factory))
+    waiter = asyncio.create_task(flights.run("k", factory))
+    await _settle()
+
+    leader.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+    assert flights.stats()["in_flight"] == 1
+
+    factory.gate.set()
+    assert await waiter == ("programa", False)
+    assert factory.calls == 1
+
+
+async def test_cancelled_waiter_does_not_cancel_the_flight():
+    flights = SingleFlight()
+    factory = _Factory()
+    leader = asyncio.create_task(flights.run("k", factory))
+    waiter = asyncio.create_task(flights.run("k", factory))
+    await _settle()
+
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    factory.gate.set()
+    assert await leader == ("programa", True)
@@ -0,0 +1,114 @@
+"""Tests del predictor de max_tokens y latencia a partir del historial de uso."""
+import time
+
+import pytest
+
+from core.config import settings
+from services.token_predictor import (
+    MAX_MAX_TOKENS,
+    MIN_MAX_TOKENS,
+    SAFETY_MARGIN,
+    LinearFit,
+    TokenPredictor,
+    _ModelSnapshot,
+    _linear_fit,
+    _quantile,
+    units_for,
+)
+
+MODEL = "claude-test"
+
+
+@pytest.fixture(autouse=True)
+def adaptive(monkeypatch):
+    monkeypatch.setattr(settings, "AI_ADAPTIVE_GENERATION", True)
+    monkeypatch.setattr(settings, "AI_MAX_TOKENS_PERCENTILE", 0.9)
+
+
+def _predictor(tokens, latency=None):
+    predictor = TokenPredictor()
+    predictor._snapshots[MODEL] = _ModelSnapshot(time.monotonic(), {}, tokens, latency or {})
+    return predictor
+
+
+def test_quantile_interpolates():
+    values = [0.0, 10.0, 20.0, 30.0, 40.0]
+    assert _quantile(values, 0) == 0
+    assert _quantile(values, 1) == 40
+    assert _quantile(values, 0.5) == 20
+    assert _quantile(values, 0.9) == pytest.approx(36.0)
+    assert _quantile([7.0], 0.9) == 7
+
+
+def test_linear_fit_recovers_line_and_sorts_residuals():
+    xs = [1, 2, 3, 4]
+    ys = [110, 190, 310, 390]
+    fit = _linear_fit(xs, ys)
+
+    assert fit.slope == pytest.approx(96.0)
+    assert fit.intercept == pytest.approx(10.0)
+    assert list(fit.residuals) == sorted(fit.residuals)
+    assert sum(fit.residuals) == pytest.approx(0)
+    assert fit.predict(5) == pytest.approx(490.0)
+
+
+def test_linear_fit_without_variance_or_negative_slope():
+    flat = _linear_fit([4, 4, 4], [100, 200, 300])
+    assert (flat.intercept, flat.slope) == (200, 0)
+
+    decreasing = _linear_fit([1, 2, 3], [300, 200, 100])
+    assert decreasing.slope == 0
+    assert decreasing.intercept == pytest.approx(200)
+
+
+def test_units_per_phase():
+    assert units_for("single", 8, 4) == 32
+    assert units_for("base_week", 8, 4) == 4
+    assert units_for("progression", 8, 4) == 8
+
+
+def test_predict_max_tokens_uses_percentile_and_margin():
+    fit = LinearFit(intercept=1000, slope=250, residuals=(-100.0, 0.0, 100.0, 200.0, 300.0))
+    predictor = _predictor({("single", True): fit})
+
+    expected = (1000 + 250 * 32 + _quantile(fit.residuals, 0.9)) * SAFETY_MARGIN
+    max_tokens = predictor.predict_max_tokens(MODEL, "single", True, 32, default=16000)
+
+    assert max_tokens % 256 == 0
+    assert expected <= max_tokens < expected + 256
+
+
+def test_predict_max_tokens_is_clamped():
+    small = _predictor({("single", True): LinearFit(10, 0, (0.0,))})
+    assert small.predict_max_tokens(MODEL, "single", True, 4, default=16000) == MIN_MAX_TOKENS
+
+    large = _predictor({("single", True): LinearFit(0, 10000, (0.0,))})
+    assert large.predict_max_tokens(MODEL, "single", True, 52, default=16000) == MAX_MAX_TOKENS
+
+
+def test_predict_max_tokens_falls_back_to_default(monkeypatch):
+    predictor = _predictor({("single", True): LinearFit(1000, 250, (0.0,))})
+
+    assert predictor.predict_max_tokens("other-model", "single", True, 32, default=16000) == 16000
+    assert predictor.predict_max_tokens(MODEL, "single", False, 32, default=16000) == 16000
+    assert predictor.predict_max_tokens(MODEL, "base_week", True, 4, default=8000) == 8000
+
+    monkeypatch.setattr(settings, "AI_ADAPTIVE_GENERATION", False)
+    assert predictor.predict_max_tokens(MODEL, "single", True, 32, default=16000) == 16000
+
+
+def test_prefers_phased_compares_base_week_plus_one_progression():
+    zero = (0.0,)
+    tokens = {
+        ("single", True): LinearFit(0, 300, zero),       # 8 sem × 4 días → 9600 tokens
+        ("base_week", True): LinearFit(0, 600, zero),    # 4 días → 2400 tokens
+        ("progression", True): LinearFit(0, 400, zero),  # 8 semanas → 3200 tokens
+    }
+    latency = {key: LinearFit(500, 10, zero) for key in tokens}
+    predictor = _predictor(tokens, latency)
+
+    assert predictor.predict_latency_ms(MODEL, "single", True, 32) == pytest.approx(96500)
+    assert predictor.prefers_phased(MODEL, True, total_weeks=8, days_per_week=4) is True
+
+    del tokens[("progression", True)]
+    assert predictor.prefers_phased(MODEL, True, total_weeks=8, days_per_week=4) is None